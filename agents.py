@@ -0,0 +1,448 @@
+import os
+import re
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import autogen
+import openai
+from autogen.oai.client import OpenAIClient
+from finrobot.toolkits import register_toolkits
+from finrobot.functional import TextUtils
+from finrobot.utils import get_current_date
+
+import streaming
+import tracing
+from compaction import compacted_tools, compact_result, conversation_budget
+from tool_cache import cached_tools
+from statements import get_sec_report, analyze_balance_sheet, analyze_income_stmt, analyze_cash_flow, analyze_business_highlights
+from indicators import get_technical_indicators
+from price_store import get_stock_data
+from news_index import get_company_news
+from vendor_guard import get_company_profile, get_basic_financials
+from rate_limiter import shared_limiter, estimate_tokens, parse_duration
+from tool_executor import register_parallel_tool_calls
+from code_workers import WarmCodeExecutor
+from model_router import shared_router, turn_role, role_hint, SLOW_COOLDOWN, DEFAULT_RATE_LIMIT_COOLDOWN
+
+
+# Using Groq with Llama 3.1 8B Instant (14.4K requests/day free!)
+# Configured model and the scheduler's quota; each turn is routed through model_router.MODEL_TIERS
+LLM_MODEL = "llama-3.1-8b-instant"
+
+
+def get_llm_config(stream=False):
+    config_list = [
+        {
+            "model": LLM_MODEL,
+            "api_key": os.environ.get("GROQ_API_KEY"),
+            "base_url": os.environ.get("GROQ_BASE_URL", "https://api.groq.com/openai/v1"),
+            # Every completion goes through the shared Groq scheduler (see RateLimitedGroqClient)
+            "model_client_cls": "RateLimitedGroqClient",
+        }
+    ]
+    return {
+        "config_list": config_list,
+        "timeout": 120,
+        "temperature": 0.5,
+        # Streamed completions are surfaced token by token through streaming.RunStream
+        "stream": stream,
+        # Completions are cached through llm_cache.TieredLLMCache, not autogen's legacy seed cache
+        "cache_seed": None,
+    }
+
+
+class RateLimitedGroqClient(OpenAIClient):
+    """OpenAI-compatible Groq client that waits on the process-wide rate limiter of the model it calls."""
+
+    MAX_ATTEMPTS = 5
+
+    def __init__(self, config, limiters=None, router=None, **kwargs):
+        # The scheduler owns retries; openai's own blind retries are switched off
+        client = openai.OpenAI(
+            api_key=config.get("api_key"),
+            base_url=config.get("base_url"),
+            timeout=config.get("timeout", 120),
+            max_retries=0,
+        )
+        super().__init__(client)
+        self.limiters = limiters or shared_limiter()
+        self.router = router or shared_router()
+
+    def create(self, params):
+        # autogen forwards the config entry as-is; the client class name is not an API parameter
+        params = {k: v for k, v in params.items() if k != "model_client_cls"}
+        # The configured model is replaced by the tiers routed for this turn's role
+        role = turn_role(params)
+        candidates = self.router.candidates(role)
+        for position, (tier, model) in enumerate(candidates):
+            last = position == len(candidates) - 1
+            try:
+                response = self._complete({**params, "model": model}, role, tier, last)
+            except openai.RateLimitError as e:
+                if last:
+                    raise
+                self.router.cool_down(model, parse_duration(e.response.headers.get("retry-after")) or DEFAULT_RATE_LIMIT_COOLDOWN)
+            except openai.APITimeoutError:
+                if last:
+                    raise
+                self.router.cool_down(model, SLOW_COOLDOWN)
+            else:
+                # autogen keys the completion cache on the configured model; see TieredLLMCache.set
+                response.rerouted = model != params.get("model")
+                return response
+
+    def _complete(self, params, role, tier, last):
+        estimate = estimate_tokens(params)
+        model = params["model"]
+        # Each tier waits on, is charged to and resyncs from its own model's quota
+        limiter = self.limiters.for_model(model)
+        bytes_in = len(json.dumps(params.get("messages", []), default=str))
+        route = {"role": role, "tier": tier}
+        if not last:
+            # A tier that runs over the role's budget is abandoned for the next one
+            params = {**params, "timeout": self.router.budget(role)}
+        # Only the last tier waits out 429s; the others hand over to the next tier at once
+        for attempt in range(self.MAX_ATTEMPTS if last else 1):
+            # Spans cover the scheduler wait too; queue_wait says how much of it that was
+            started = time.perf_counter()
+            waited = limiter.acquire(estimate)
+            headers = {}
+            try:
+                if params.get("stream", False):
+                    # Streamed responses are assembled by OpenAIClient; they carry no usable headers
+                    response = super().create(params)
+                else:
+                    raw = self._oai_client.chat.completions.with_raw_response.create(**{**params, "stream": False})
+                    headers = raw.headers
+                    response = raw.parse()
+            except openai.RateLimitError as e:
+                tracing.record("llm", model, started, bytes_in=bytes_in, bytes_out=0, queue_wait=round(waited, 4), error="429 rate limited", **route)
+                if not last:
+                    raise
+                limiter.on_rate_limited(e.response.headers, attempt)
+                if attempt == self.MAX_ATTEMPTS - 1:
+                    raise
+                continue
+            except Exception as e:
+                tracing.record("llm", model, started, bytes_in=bytes_in, bytes_out=0, queue_wait=round(waited, 4), error=str(e), **route)
+                raise
+            usage = response.usage
+            tracing.record(
+                "llm",
+                model,
+                started,
+                bytes_in=bytes_in,
+                bytes_out=len(response.model_dump_json()),
+                prompt_tokens=usage.prompt_tokens if usage else None,
+                completion_tokens=usage.completion_tokens if usage else None,
+                queue_wait=round(waited, 4),
+                **route,
+            )
+            limiter.settle(estimate, usage.total_tokens if usage else None)
+            limiter.update_from_headers(headers)
+            return response
+
+
+def register_model_client(agent, limiters=None):
+    agent.register_model_client(model_client_cls=RateLimitedGroqClient, limiters=limiters)
+
+
+def register_stream_hooks(*agents):
+    for agent in agents:
+        agent.register_hook("process_message_before_send", streaming.forward_message)
+
+
+def is_termination_msg(x):
+    return x.get("content", "") and x.get("content", "").strip().endswith("TERMINATE")
+
+
+# --- Market Forecaster ---
+def forecaster_tools():
+    return [
+        {"function": get_company_profile, "name": "get_company_profile", "description": "get company profile"},
+        {"function": get_company_news, "name": "get_company_news", "description": "get the most relevant company news, duplicates collapsed"},
+        {"function": get_basic_financials, "name": "get_financial_basics", "description": "get financial basics"},
+        {"function": get_stock_data, "name": "get_stock_data", "description": "get stock data"},
+        {
+            "function": get_technical_indicators,
+            "name": "get_technical_indicators",
+            "description": "get technical indicators (returns, volatility, RSI, MACD, moving-average crossovers, ATR, drawdown)",
+        },
+    ]
+
+
+def build_forecaster(llm_config, tool_cache=None, limiters=None):
+    # 1. Market Analyst Agent
+    analyst = autogen.AssistantAgent(
+        name="Market_Analyst",
+        system_message="As a Market Analyst for the Indian Stock Market (NSE/BSE), you possess strong analytical abilities. "
+        "Collect financial info and news using provided tools. "
+        "Focus on Indian market context, regulatory updates (SEBI), and local economic factors. "
+        "Request independent tools together in one reply; they run concurrently. "
+        "Reply TERMINATE when the task is done.",
+        llm_config=llm_config,
+    )
+
+    # 2. User Proxy Agent
+    user_proxy = autogen.UserProxyAgent(
+        name="User_Proxy",
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=10,
+        is_termination_msg=is_termination_msg,
+        # Code blocks run in a pre-warmed worker with a workspace private to this agent pair
+        code_execution_config={"executor": WarmCodeExecutor("coding")},
+    )
+
+    tools = forecaster_tools()
+    if tool_cache is not None:
+        tools = cached_tools(tools, tool_cache)
+    register_toolkits(compacted_tools(tracing.traced_tools(tools)), analyst, user_proxy)
+    # Several tool calls in one reply run concurrently, so the turn takes as long as the slowest
+    register_parallel_tool_calls(user_proxy)
+    # Tool registration rebuilds the agent's client, so the custom client is registered last
+    register_model_client(analyst, limiters)
+    register_stream_hooks(analyst, user_proxy)
+    return analyst, user_proxy
+
+
+def prior_section(prior):
+    # The baseline anchors the prediction; the model's turn is to explain it, not to guess from scratch
+    if not prior:
+        return ""
+    return (
+        f"\n\nQuantitative baseline: {prior} Start from this baseline: explain it with the data, "
+        f"and move away from it only for a reason you state."
+    )
+
+
+def forecast_prompt(company, today, prior=None):
+    return (
+        f"Use all tools to retrieve info for {company} (Indian Stock) as of {today}. "
+        f"Analyze positive developments and concerns (focus on Indian market impact). "
+        f"Make a prediction (up/down %) for next week. Provide a summary."
+        f"{prior_section(prior)}"
+    )
+
+
+def prefetch_forecast_data(company, today, tool_cache=None, budget=None):
+    """Call the forecaster tools concurrently, returning {tool name: compacted text}."""
+    tools = forecaster_tools()
+    if tool_cache is not None:
+        tools = cached_tools(tools, tool_cache)
+    functions = {tool["name"]: tool["function"] for tool in tracing.traced_tools(tools)}
+    # Calls run on pool threads but belong to the caller's trace
+    trace = tracing.current()
+
+    end = datetime.strptime(today, "%Y-%m-%d")
+    week_ago = (end - timedelta(days=7)).strftime("%Y-%m-%d")
+    month_ago = (end - timedelta(days=30)).strftime("%Y-%m-%d")
+    year_ago = (end - timedelta(days=365)).strftime("%Y-%m-%d")
+    calls = {
+        "get_company_profile": (company,),
+        "get_company_news": (company, week_ago, today),
+        "get_financial_basics": (company,),
+        "get_stock_data": (company, month_ago, today),
+        "get_technical_indicators": (company, year_ago, today),
+    }
+
+    def call(name):
+        try:
+            with tracing.using(trace):
+                return functions[name](*calls[name])
+        except Exception as e:
+            return f"Error: {name} failed: {e}"
+
+    with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        results = dict(zip(calls, executor.map(call, calls)))
+    # Charge the budget in a fixed order so truncation does not depend on which call finished first
+    return {name: compact_result(name, result, budget) for name, result in results.items()}
+
+
+def forecast_prompt_with_data(company, today, data, prior=None):
+    sections = "\n\n".join(f"### {name}\n{text}" for name, text in data.items())
+    return (
+        f"The data below was already retrieved for {company} (Indian Stock) as of {today}; do not call tools. "
+        f"Analyze positive developments and concerns (focus on Indian market impact). "
+        f"Make a prediction (up/down %) for next week. Provide a summary and reply TERMINATE."
+        f"{prior_section(prior)}\n\n"
+        f"{sections}"
+    )
+
+
+# Summary prompt used by the watchlist so every ticker lands in the same table columns
+FORECAST_SUMMARY_PROMPT = (
+    "Summarize the forecast above as a JSON object with the keys "
+    '"direction" ("up" or "down"), "move_pct" (expected % move over the next week, a number), '
+    '"confidence" ("low", "medium" or "high") and "key_drivers" (a list of at most 3 short phrases). '
+    "Return only the JSON object."
+)
+
+
+def run_forecast(pool, company, cache=None, today=None, summary_prompt=None, prefetched=None, budget=None, prior=None):
+    today = today or get_current_date()
+    if prefetched:
+        message = forecast_prompt_with_data(company, today, prefetched, prior)
+    else:
+        message = forecast_prompt(company, today, prior)
+    summary_args = {"summary_prompt": summary_prompt} if summary_prompt else {}
+    # With the data in the prompt every turn is analysis, although the pooled agent still offers its tools
+    hint = role_hint("analysis") if prefetched else nullcontext()
+    with pool.lease() as (analyst, user_proxy), conversation_budget(budget), hint:
+        return user_proxy.initiate_chat(
+            analyst,
+            cache=cache,
+            message=message,
+            summary_method="reflection_with_llm",
+            summary_args=summary_args,
+        )
+
+
+def count_llm_turns(chat_history):
+    # The proxy opens the chat and the two agents alternate, so odd entries are model replies
+    return len(chat_history) // 2
+
+
+def parse_watchlist(text, limit=50):
+    tickers = []
+    for token in re.split(r"[\s,;]+", text.upper()):
+        if token and token not in tickers:
+            tickers.append(token)
+    return tickers[:limit]
+
+
+def parse_forecast(summary):
+    # Prefer the JSON the summary prompt asked for, fall back to scraping the prose
+    summary = summary or ""
+    match = re.search(r"\{.*\}", summary, re.DOTALL)
+    data = {}
+    if match:
+        try:
+            data = json.loads(match.group(0))
+        except ValueError:
+            data = {}
+    direction = str(data.get("direction", "")).lower()
+    move = data.get("move_pct")
+    if move is None:
+        pct = re.search(r"([+-]?\d+(?:\.\d+)?)\s*%", summary)
+        move = float(pct.group(1)) if pct else None
+    try:
+        move = abs(float(move))
+    except (TypeError, ValueError):
+        move = None
+    if direction not in ("up", "down"):
+        words = set(re.findall(r"\b(up|down)\b", summary.lower()))
+        direction = words.pop() if len(words) == 1 else ""
+    if move is not None and direction == "down":
+        move = -move
+    drivers = data.get("key_drivers", [])
+    if isinstance(drivers, str):
+        drivers = [drivers]
+    return {
+        "predicted_move_pct": move,
+        "direction": direction.upper() or "N/A",
+        "confidence": str(data.get("confidence", "N/A")).upper(),
+        "key_drivers": "; ".join(str(d) for d in drivers),
+    }
+
+
+# --- Annual Report ---
+def report_tools():
+    # Note: SEC reports do not exist for NS tickers, so we emphasize financial statement analysis.
+    # All tools read one shared statement bundle per (ticker, year); see statements.py
+    return [
+        {"function": get_sec_report, "name": "get_sec_report", "description": "get SEC report"},
+        {"function": analyze_balance_sheet, "name": "analyze_balance_sheet", "description": "analyze balance sheet"},
+        {"function": analyze_income_stmt, "name": "analyze_income_stmt", "description": "analyze income statement"},
+        {"function": analyze_cash_flow, "name": "analyze_cash_flow", "description": "analyze cash flow"},
+        {"function": analyze_business_highlights, "name": "analyze_business_highlights", "description": "analyze business highlights"},
+        {"function": TextUtils.check_text_length, "name": "check_text_length", "description": "check text length"},
+    ]
+
+
+def build_report_expert(llm_config, tool_cache=None, limiters=None):
+    expert = autogen.AssistantAgent(
+        name="Expert_Investor",
+        system_message="Role: Expert Investor for Indian Markets. "
+        "Responsibility: Generate Customized Financial Analysis Reports. "
+        "Use tools to fetch financial statements (Balance Sheet, Income Stmt, Cash Flow). "
+        "If SEC 10-K is not available (common for Indian stocks), use FMP financial statements directly. "
+        "Request independent tools together in one reply; they run concurrently. "
+        "Reply TERMINATE when detailed analysis is done.",
+        llm_config=llm_config,
+    )
+
+    user_proxy_rep = autogen.UserProxyAgent(
+        name="User_Proxy_Report",
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=10,
+        is_termination_msg=is_termination_msg,
+        code_execution_config={"executor": WarmCodeExecutor("report_coding")},
+    )
+
+    tools_rep = report_tools()
+    if tool_cache is not None:
+        tools_rep = cached_tools(tools_rep, tool_cache)
+    register_toolkits(compacted_tools(tracing.traced_tools(tools_rep)), expert, user_proxy_rep)
+    register_parallel_tool_calls(user_proxy_rep)
+    register_model_client(expert, limiters)
+    register_stream_hooks(expert, user_proxy_rep)
+    return expert, user_proxy_rep
+
+
+def report_prompt(company, year):
+    return (
+        f"Analyze the financial health of {company} (Indian Stock) for the year {year}. "
+        f"1. Retrieve/Analyze Balance Sheet, Income Statement, and Cash Flow. "
+        f"2. Summarize key financial metrics (Profitability, Liquidity, Solvency). "
+        f"3. Provide an investment recommendation based on these metrics. "
+        f"Format the output as a structured Annual Performance Report."
+    )
+
+
+def run_report(pool, company, year, cache=None, budget=None):
+    with pool.lease() as (expert, user_proxy_rep), conversation_budget(budget):
+        return user_proxy_rep.initiate_chat(
+            expert,
+            cache=cache,
+            message=report_prompt(company, year),
+            summary_method="reflection_with_llm",
+        )
+
+
+class AgentPool:
+    """Agent pairs built once and reused across runs.
+
+    A pair is leased to one run at a time and reset when it comes back, so
+    concurrent sessions never share conversation state.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.created = 0
+        self.leased = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def lease(self):
+        with self._lock:
+            pair = self._idle.pop() if self._idle else None
+            self.leased += 1
+        if pair is None:
+            pair = self.factory()
+            with self._lock:
+                self.created += 1
+        try:
+            yield pair
+        finally:
+            for agent in pair:
+                agent.reset()
+                # autogen's reset() leaves the code executor alone; restart ends the run's worker and workspace
+                if agent.code_executor is not None:
+                    agent.code_executor.restart()
+            with self._lock:
+                self._idle.append(pair)
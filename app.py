@@ -1,11 +1,24 @@
+import time
+_script_start = time.perf_counter()
+
 import streamlit as st
 import os
+import sys
+import hashlib
 from dotenv import load_dotenv
-import autogen
-from finrobot.utils import get_current_date, register_keys_from_json
-from finrobot.data_source import FinnHubUtils, YFinanceUtils, FMPUtils
-from finrobot.toolkits import register_toolkits
-from finrobot.functional import ReportChartUtils, ReportAnalysisUtils, ReportLabUtils, TextUtils
+from tool_cache import ToolCache
+from llm_cache import TieredLLMCache, CACHE_MODES
+from rate_limiter import shared_limiter, set_priority
+from model_router import shared_router
+from jobs import JobRunner, FINISHED, run_key
+from report_store import ReportStore
+import tracing
+
+# Heavy imports (autogen, finrobot) live in agents.py and are only loaded when a run starts
+
+JOB_POLL_SECONDS = 1
+# Tickers one quick forecast may score
+QUICK_FORECAST_LIMIT = 500
 
 # Load environment variables
 load_dotenv()
@@ -13,279 +26,12 @@ load_dotenv()
 # --- Neo-Brutalism Design System ---
 st.set_page_config(layout="wide", page_title="FinRobot Agent", page_icon="📊")
 
-st.markdown("""
-<style>
-    /* Import Font */
-    @import url('https://fonts.googleapis.com/css2?family=Space+Mono:wght@400;700&family=Space+Grotesk:wght@500;700&display=swap');
-    
-    /* Global Styles */
-    .stApp {
-        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f0f23 100%);
-        color: #ffffff;
-        font-family: 'Space Mono', monospace;
-    }
-    
-    /* Main Container */
-    .main .block-container {
-        padding: 2rem 3rem;
-        max-width: 1400px;
-    }
-    
-    /* Custom Title */
-    .neo-title {
-        font-family: 'Space Grotesk', sans-serif;
-        font-size: 3.5rem;
-        font-weight: 700;
-        color: #00FF88;
-        text-shadow: 6px 6px 0px #FF00FF, -2px -2px 0px #00FFFF;
-        letter-spacing: -2px;
-        margin-bottom: 0;
-        line-height: 1.1;
-    }
-    
-    .neo-subtitle {
-        font-family: 'Space Mono', monospace;
-        font-size: 1rem;
-        color: #FFD700;
-        text-transform: uppercase;
-        letter-spacing: 4px;
-        margin-top: 0.5rem;
-        padding: 8px 16px;
-        background: rgba(255, 215, 0, 0.1);
-        border: 2px solid #FFD700;
-        display: inline-block;
-    }
-    
-    /* Buttons - Neo Brutalism */
-    .stButton > button {
-        background-color: #00FF88 !important;
-        color: #000000 !important;
-        border: 4px solid #000000 !important;
-        border-radius: 0px !important;
-        box-shadow: 8px 8px 0px 0px #000000 !important;
-        font-family: 'Space Mono', monospace !important;
-        font-weight: 700 !important;
-        font-size: 14px !important;
-        transition: all 0.15s ease !important;
-        text-transform: uppercase !important;
-        padding: 12px 24px !important;
-        letter-spacing: 2px !important;
-    }
-    .stButton > button:hover {
-        transform: translate(-4px, -4px) !important;
-        box-shadow: 12px 12px 0px 0px #000000 !important;
-        background-color: #00FFFF !important;
-    }
-    .stButton > button:active {
-        transform: translate(4px, 4px) !important;
-        box-shadow: 4px 4px 0px 0px #000000 !important;
-        background-color: #FF00FF !important;
-        color: #ffffff !important;
-    }
-
-    /* Text Inputs - Neo Brutalism */
-    .stTextInput > div > div > input {
-        border: 3px solid #00FF88 !important;
-        border-radius: 0px !important;
-        box-shadow: 5px 5px 0px 0px #00FF88 !important;
-        background-color: rgba(0, 255, 136, 0.05) !important;
-        color: #ffffff !important;
-        font-family: 'Space Mono', monospace !important;
-        font-weight: 700 !important;
-        padding: 12px !important;
-    }
-    .stTextInput > div > div > input:focus {
-        border-color: #FF00FF !important;
-        box-shadow: 8px 8px 0px 0px #FF00FF !important;
-        background-color: rgba(255, 0, 255, 0.05) !important;
-    }
-    
-    .stTextInput label {
-        color: #00FF88 !important;
-        font-family: 'Space Mono', monospace !important;
-        font-weight: 700 !important;
-        text-transform: uppercase !important;
-        letter-spacing: 1px !important;
-    }
-
-    /* Headers */
-    h1, h2, h3 {
-        font-family: 'Space Grotesk', sans-serif !important;
-        color: #ffffff !important;
-        text-transform: uppercase !important;
-        font-weight: 700 !important;
-    }
-    
-    h2 {
-        color: #00FFFF !important;
-        text-shadow: 3px 3px 0px #FF00FF !important;
-    }
-    
-    h3 {
-        color: #FFD700 !important;
-        border-left: 6px solid #FFD700;
-        padding-left: 16px;
-    }
-    
-    /* Expanders - Neo Style */
-    .streamlit-expanderHeader {
-        border: 3px solid #00FFFF !important;
-        border-radius: 0px !important;
-        background-color: rgba(0, 255, 255, 0.1) !important;
-        color: #00FFFF !important;
-        font-family: 'Space Mono', monospace !important;
-        font-weight: 700 !important;
-        box-shadow: 4px 4px 0px 0px #00FFFF !important;
-    }
-    
-    /* Tabs - Neo Brutalism */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0px;
-        background-color: transparent;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 60px;
-        background-color: rgba(255, 255, 255, 0.05);
-        border: 3px solid #ffffff;
-        border-radius: 0px;
-        box-shadow: 5px 5px 0px 0px rgba(255,255,255,0.3);
-        font-family: 'Space Mono', monospace;
-        font-weight: 700;
-        color: #ffffff;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        margin-right: 10px;
-        transition: all 0.15s ease;
-    }
-    .stTabs [data-baseweb="tab"]:hover {
-        background-color: rgba(0, 255, 136, 0.2);
-        border-color: #00FF88;
-    }
-    .stTabs [data-baseweb="tab"][aria-selected="true"] {
-        background-color: #FF00FF !important;
-        color: #ffffff !important;
-        border-color: #000000 !important;
-        transform: translate(-3px, -3px);
-        box-shadow: 8px 8px 0px 0px #000000 !important;
-    }
-    
-    /* Sidebar - Neo Style */
-    [data-testid="stSidebar"] {
-        background: linear-gradient(180deg, #0d0d1a 0%, #1a1a2e 100%);
-        border-right: 4px solid #00FF88;
-    }
-    
-    [data-testid="stSidebar"] .stMarkdown h2 {
-        color: #00FF88 !important;
-        text-shadow: none !important;
-        border-bottom: 3px solid #00FF88;
-        padding-bottom: 10px;
-    }
-    
-    /* Info/Warning boxes */
-    .stAlert {
-        border-radius: 0px !important;
-        border: 3px solid !important;
-        box-shadow: 5px 5px 0px 0px rgba(0,0,0,0.5) !important;
-    }
-    
-    /* Spinner */
-    .stSpinner > div {
-        border-color: #00FF88 !important;
-    }
-    
-    /* Success message */
-    .stSuccess {
-        background-color: rgba(0, 255, 136, 0.2) !important;
-        border: 3px solid #00FF88 !important;
-        border-radius: 0px !important;
-        box-shadow: 5px 5px 0px 0px #00FF88 !important;
-    }
-    
-    /* Error message */
-    .stError {
-        background-color: rgba(255, 0, 100, 0.2) !important;
-        border: 3px solid #FF0064 !important;
-        border-radius: 0px !important;
-        box-shadow: 5px 5px 0px 0px #FF0064 !important;
-    }
-    
-    /* Divider */
-    hr {
-        border: none;
-        height: 3px;
-        background: linear-gradient(90deg, #00FF88, #00FFFF, #FF00FF);
-        margin: 2rem 0;
-    }
-    
-    /* IMPORTANT: Text visibility fixes */
-    p, span, li, div {
-        color: #ffffff !important;
-    }
-    
-    .stMarkdown p, .stMarkdown li, .stMarkdown span {
-        color: #e0e0e0 !important;
-    }
-    
-    /* Placeholder text */
-    .stTextInput > div > div > input::placeholder {
-        color: rgba(255, 255, 255, 0.5) !important;
-        font-style: italic;
-    }
-    
-    /* Labels and help text */
-    .stTextInput label p {
-        color: #00FF88 !important;
-    }
-    
-    small, .stHelp {
-        color: #888888 !important;
-    }
-    
-    /* Sidebar text */
-    [data-testid="stSidebar"] p, 
-    [data-testid="stSidebar"] span,
-    [data-testid="stSidebar"] li {
-        color: #ffffff !important;
-    }
-    
-    /* Expander content */
-    .streamlit-expanderContent {
-        background-color: rgba(0, 0, 0, 0.3) !important;
-        border: 2px solid #00FFFF !important;
-        border-top: none !important;
-    }
-    
-    .streamlit-expanderContent p {
-        color: #e0e0e0 !important;
-    }
-    
-    /* Card Style */
-    .neo-card {
-        background: rgba(255, 255, 255, 0.03);
-        border: 4px solid #00FF88;
-        padding: 24px;
-        box-shadow: 10px 10px 0px 0px #000000;
-        margin: 20px 0;
-    }
-    
-    /* Result Card */
-    .result-card {
-        background: linear-gradient(135deg, rgba(0, 255, 136, 0.1) 0%, rgba(0, 255, 255, 0.05) 100%);
-        border: 4px solid #00FF88;
-        padding: 24px;
-        box-shadow: 10px 10px 0px 0px rgba(0, 255, 136, 0.5);
-        font-family: 'Space Mono', monospace;
-        color: #ffffff;
-        line-height: 1.8;
-    }
-    
-    /* Hide Streamlit branding */
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    
-</style>
-""", unsafe_allow_html=True)
+@st.cache_data
+def load_css():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css")) as f:
+        return f.read()
+
+st.markdown(f"<style>{load_css()}</style>", unsafe_allow_html=True)
 
 # --- App Header ---
 st.markdown("""
@@ -325,6 +71,11 @@ with st.sidebar:
     else:
         st.markdown("🔴 **FINNHUB**")
 
+    st.markdown("---")
+    llm_cache_label = st.selectbox("🧠 LLM CACHE", list(CACHE_MODES), help="READ / WRITE reuses identical completions, REPLAY ONLY never calls Groq, BYPASS always calls Groq")
+    llm_cache_mode = CACHE_MODES[llm_cache_label]
+    live_streaming = st.toggle("📡 LIVE STREAMING", value=True, help="Show each message, tool call and tool result as it happens, and stream completion tokens")
+
 # Environment Setup
 if groq_api_key:
     os.environ["GROQ_API_KEY"] = groq_api_key
@@ -343,23 +94,257 @@ if missing_keys:
     st.warning(f"⚠️ MISSING API KEYS: {', '.join(missing_keys)}")
 
 # --- Helper Functions ---
-def get_llm_config():
-    # Using Groq with Llama 3.1 8B Instant (14.4K requests/day free!)
-    config_list = [
-        {
-            "model": "llama-3.1-8b-instant",
-            "api_key": os.environ.get("GROQ_API_KEY"),
-            "base_url": "https://api.groq.com/openai/v1"
-        }
-    ]
-    return {
-        "config_list": config_list,
-        "timeout": 120,
-        "temperature": 0.5,
-    }
+@st.cache_resource
+def get_startup_timings():
+    # Survives reruns: the first script run in this process is the cold start
+    return {"cold_ms": None, "runs": 0}
+
+def get_key_fingerprint():
+    keys = "|".join(os.environ.get(k, "") for k in ("GROQ_API_KEY", "FMP_API_KEY", "FINNHUB_API_KEY"))
+    return hashlib.sha256(keys.encode()).hexdigest()[:16]
+
+@st.cache_resource
+def get_tool_cache():
+    # One disk-backed cache shared by every session in this process
+    cache = ToolCache()
+    tracing.shared_metrics().watch_cache("tool", cache)
+    return cache
+
+@st.cache_resource
+def get_llm_cache():
+    cache = TieredLLMCache()
+    tracing.shared_metrics().watch_cache("llm", cache)
+    return cache
+
+@st.cache_resource
+def get_report_store():
+    # Completed forecasts and reports, served again while fresh and searchable in REPORT HISTORY
+    return ReportStore()
+
+@st.cache_resource
+def get_forecaster_pool(key_fingerprint, stream=False):
+    # Agents and tool registrations are built once per key set and reset between runs
+    import agents
+    tool_cache = get_tool_cache()
+    return agents.AgentPool(lambda: agents.build_forecaster(agents.get_llm_config(stream), tool_cache))
+
+@st.cache_resource
+def get_report_pool(key_fingerprint, stream=False):
+    import agents
+    tool_cache = get_tool_cache()
+    return agents.AgentPool(lambda: agents.build_report_expert(agents.get_llm_config(stream), tool_cache))
+
+def render_feed_message(event):
+    message = event["message"]
+    stamp = f"`{event['elapsed']:5.1f}s`"
+    for call in message.get("tool_calls") or []:
+        function = call.get("function", {})
+        st.markdown(f"{stamp} 🛠️ **{event['sender'].upper()} → {function.get('name', '')}** `{function.get('arguments', '')}`")
+    for response in message.get("tool_responses") or []:
+        st.markdown(f"{stamp} 📦 **TOOL RESULT**")
+        st.code(str(response.get("content", ""))[:1500])
+    if message.get("content") and not message.get("tool_responses"):
+        st.markdown(f"{stamp} **{event['sender'].upper()}:** {message['content']}")
+
+@st.cache_resource
+def get_job_runner():
+    # One worker pool and job table per process; jobs outlive the session that submitted them
+    return JobRunner()
+
+def attach_job(slot, job_id):
+    # Also kept in the URL, so a browser reload reattaches to the same job
+    st.session_state[slot] = job_id
+    st.query_params[slot] = job_id
+
+def attached_job(slot):
+    return st.session_state.get(slot) or st.query_params.get(slot)
+
+def render_feed(events):
+    # Replays a job's feed: every message so far, plus the completion being streamed right now
+    partial = ""
+    for event in events:
+        if event["kind"] == "message":
+            render_feed_message(event)
+        elif event["kind"] == "token":
+            partial += event["text"]
+        elif event["kind"] == "completion_end":
+            partial = ""
+    if partial:
+        st.markdown(f"✍️ {partial}")
+
+def render_chat_history(chat_history):
+    for msg in chat_history:
+        role = msg['role'].upper()
+        content = msg['content']
+        if content:
+            st.markdown(f"**{role}:** {content}")
+            st.divider()
+
+def render_waterfall(trace):
+    # One bar per tool call / completion, positioned on the run's time axis
+    spans = trace["spans"]
+    total = max([trace["total_s"]] + [span["start"] + span["duration"] for span in spans]) or 1
+    llm = [span for span in spans if span["kind"] == "llm"]
+    tools = [span for span in spans if span["kind"] == "tool"]
+    st.caption(
+        f"TOTAL {trace['total_s']:.1f}s // LLM {sum(s['duration'] for s in llm):.1f}s IN {len(llm)} CALLS "
+        f"({sum(s.get('queue_wait', 0) for s in llm):.1f}s QUEUED) // TOOLS {sum(s['duration'] for s in tools):.1f}s IN {len(tools)} CALLS"
+    )
+    rows = []
+    for span in spans:
+        if span["kind"] == "llm":
+            detail = f"{span.get('prompt_tokens') or 0}+{span.get('completion_tokens') or 0} tok"
+        else:
+            detail = f"{span.get('bytes_out', 0) / 1024:.1f} KB"
+        css = "error" if span.get("error") else span["kind"]
+        rows.append(
+            f'<div class="waterfall-row"><div class="waterfall-label">{span["kind"].upper()} {span["name"]} · {span["duration"]:.2f}s · {detail}</div>'
+            f'<div class="waterfall-track"><div class="waterfall-bar {css}" style="left: {span["start"] / total:.2%}; width: {span["duration"] / total:.2%};"></div></div></div>'
+        )
+    st.markdown("".join(rows) or "No tool or LLM calls recorded.", unsafe_allow_html=True)
+
+def render_stored_notice(result):
+    if result.get("stored_at"):
+        st.info(f"SERVED FROM REPORT STORE // SAVED {(time.time() - result['stored_at']) / 60:.0f} MIN AGO // TURN ON REGENERATE TO RUN THE AGENTS AGAIN")
+
+def render_agent_progress(job, stream, live):
+    if live and stream is not None:
+        st.markdown("### 📡 LIVE AGENT FEED")
+        render_feed(list(stream.log))
+    elif job["kind"] == "report":
+        st.markdown("⏳ **FETCHING AND ANALYZING ANNUAL REPORT...**")
+    else:
+        st.markdown("⏳ **AGENTS DEPLOYED. ANALYZING MARKET DATA...**")
+
+def render_forecast_result(job):
+    result = job["result"]
+    run_timing = result["timing"]
+    # Keyed by job so reruns and reattaches do not add the same run twice
+    forecast_timings = st.session_state.setdefault("forecast_timings", {})
+    if not result.get("stored_at"):
+        forecast_timings[job["id"]] = run_timing
+
+    st.success("ANALYSIS COMPLETE")
+    render_stored_notice(result)
+    st.markdown(f"### 📊 FORECAST REPORT // {result['ticker']}")
+    st.markdown(f"""
+    <div class="result-card">
+        {result['summary']}
+    </div>
+    """, unsafe_allow_html=True)
+
+    if result.get("prior"):
+        st.caption(f"📐 BASELINE GIVEN TO THE ANALYST: {result['prior']}")
+    st.caption(f"MODE: {run_timing['mode']} // PREFETCH {run_timing['prefetch_s']}s // FIRST CONTENT {run_timing['first_content_s']}s // TOTAL {run_timing['total_s']}s // LLM TURNS {run_timing['llm_turns']} // TOOL TOKENS {run_timing['tool_tokens']}/{run_timing['tool_budget']} ({run_timing['tokens_saved']} SAVED)")
+    with st.expander("⏱️ MODE COMPARISON"):
+        st.dataframe(list(forecast_timings.values())[-10:], use_container_width=True, hide_index=True)
+
+    if result.get("trace"):
+        with st.expander("⏱️ RUN TIMELINE"):
+            render_waterfall(result["trace"])
+
+    with st.expander("VIEW FULL CONVERSATION LOG"):
+        render_chat_history(result["chat_history"])
+
+def render_watchlist_table(rows):
+    import pandas as pd
+    st.dataframe(pd.DataFrame(rows).sort_values("predicted_move_pct", ascending=False), use_container_width=True, hide_index=True)
+
+def render_watchlist_progress(job, stream, live):
+    tickers = job["params"]["tickers"]
+    events = list(stream.log) if stream is not None else []
+    rows = [event["row"] for event in events if event["kind"] == "row"]
+    failed = sum(1 for event in events if event["kind"] == "failure")
+    st.markdown(f"### 🗂️ WATCHLIST FORECAST // {len(tickers)} TICKERS")
+    st.progress((len(rows) + failed) / len(tickers))
+    if rows:
+        render_watchlist_table(rows)
+
+def render_watchlist_result(job):
+    result = job["result"]
+    st.markdown(f"### 🗂️ WATCHLIST FORECAST // {len(result['tickers'])} TICKERS")
+    if result["rows"]:
+        render_watchlist_table(result["rows"])
+    st.success(f"WATCHLIST COMPLETE IN {result['wall_s']:.0f}s (SUM OF RUNS {result['serial_s']:.0f}s)")
+    for failure in result["failures"]:
+        st.error(f"EXECUTION FAILED: {failure}")
+
+def render_quick_progress(job, stream, live):
+    st.markdown(f"### 📐 QUICK FORECAST // {len(job['params']['tickers'])} TICKERS")
+    st.info("SCORING WITH THE BASELINE MODEL...")
+
+def render_quick_result(job):
+    import pandas as pd
+    result = job["result"]
+    st.markdown(f"### 📐 QUICK FORECAST // {len(result['tickers'])} TICKERS")
+    if result["rows"]:
+        st.dataframe(pd.DataFrame(result["rows"]).sort_values("expected_move_pct", ascending=False), use_container_width=True, hide_index=True)
+    model = result["model"] or {}
+    quality = f" // OUT-OF-SAMPLE MAE {model['mae_pct']:.2f}% // HIT RATE {model['hit_rate']:.0%}" if model.get("mae_pct") is not None else ""
+    st.caption(f"LOCAL BASELINE, NEXT 5 SESSIONS, NO LLM // {result['wall_s']:.1f}s // TRAINED ON {model.get('samples', 0)} SESSIONS OF {model.get('tickers', 0)} TICKERS{quality}")
+    if result.get("learning"):
+        st.info(f"NOT SCORED YET, LEARNING IN THE BACKGROUND: {', '.join(result['learning'])}. RUN AGAIN IN A MINUTE.")
+    if result["missing"]:
+        st.warning(f"NO PRICE HISTORY FOR: {', '.join(result['missing'])}")
+
+def render_report_result(job):
+    result = job["result"]
+    st.success("REPORT GENERATION COMPLETE")
+    render_stored_notice(result)
+    st.markdown(f"### 📈 ANNUAL PERFORMANCE REPORT // {result['ticker']}")
+    st.markdown(f"""
+    <div class="result-card">
+        {result['summary']}
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.caption(f"FIRST CONTENT {result['first_content_s']:.1f}s // TOTAL {result['total_s']:.1f}s // TOOL TOKENS {result['tool_tokens']}/{result['tool_budget']} ({result['tokens_saved']} SAVED)")
+    if result.get("trace"):
+        with st.expander("⏱️ RUN TIMELINE"):
+            render_waterfall(result["trace"])
+
+    with st.expander("VIEW ANALYSIS STEPS"):
+        render_chat_history(result["chat_history"])
+
+# Job kind -> (progress view while it runs, result view once done)
+JOB_VIEWS = {
+    "forecast": (render_agent_progress, render_forecast_result),
+    "watchlist": (render_watchlist_progress, render_watchlist_result),
+    "report": (render_agent_progress, render_report_result),
+    "quick": (render_quick_progress, render_quick_result),
+}
+
+def job_panel(job_id, live, polling):
+    runner = get_job_runner()
+    job = runner.get(job_id)
+    if job is None:
+        return
+    render_progress, render_result = JOB_VIEWS[job["kind"]]
+    if job["status"] in FINISHED:
+        if polling:
+            # Stop the poll timer; the next full run renders the result
+            st.rerun()
+        if job["status"] == "failed":
+            st.error(f"EXECUTION FAILED: {job['error']}")
+        else:
+            render_result(job)
+        return
+    shared = f" // SHARED BY {runner.joined[job_id] + 1} REQUESTS" if runner.joined[job_id] else ""
+    st.caption(f"JOB {job_id} // {job['label']} // {job['status'].upper()} // {time.time() - job['created']:.0f}s{shared}")
+    render_progress(job, runner.stream(job_id), live)
+
+def show_job(slot, live):
+    job_id = attached_job(slot)
+    job = get_job_runner().get(job_id) if job_id else None
+    if job is None:
+        return
+    polling = job["status"] not in FINISHED
+    # While the job runs, only this fragment reruns to poll it; the rest of the page stays interactive
+    panel = st.experimental_fragment(job_panel, run_every=JOB_POLL_SECONDS) if polling else job_panel
+    panel(job_id, live, polling)
 
 # Tabs
-tab1, tab2 = st.tabs(["📈 MARKET FORECASTER", "📋 ANNUAL REPORT"])
+tab1, tab2, tab3 = st.tabs(["📈 MARKET FORECASTER", "📋 ANNUAL REPORT", "🗃️ REPORT HISTORY"])
 
 with tab1:
     st.markdown("### 🚀 MARKET MOMENTUM PREDICTOR")
@@ -372,7 +357,16 @@ with tab1:
         st.markdown("#### CONFIGURATION")
         ticker_1 = st.text_input("TICKER SYMBOL", value="", placeholder="Enter ticker (e.g., RELIANCE.NS)", help="E.g., RELIANCE.NS, TCS.NS, INFY.NS", key="ticker1")
         st.markdown("")
+        prefetch_1 = st.toggle("⚡ PREFETCH DATA", value=False, key="prefetch1", help="Fetch profile, news, financials and prices concurrently before the chat and hand them to the analyst, instead of one tool call per turn")
+        regenerate_1 = st.toggle("🔁 REGENERATE", value=False, key="regenerate1", help="Run the agents even if a fresh forecast for this ticker is already stored")
         run_btn_1 = st.button("⚡ RUN FORECAST", key="btn1", use_container_width=True)
+
+        st.markdown("---")
+        st.markdown("#### WATCHLIST")
+        watchlist_1 = st.text_area("TICKERS", value="", placeholder="TCS.NS, INFY.NS, HDFCBANK.NS ...", help="Up to 50 tickers for the agents (500 for a quick forecast), separated by commas or new lines", key="watchlist1")
+        workers_1 = st.slider("PARALLEL AGENTS", min_value=1, max_value=8, value=int(os.environ.get("FINROBOT_WATCHLIST_WORKERS", "4")), key="workers1")
+        run_watchlist_1 = st.button("🗂️ RUN WATCHLIST", key="btn_watchlist", use_container_width=True)
+        run_quick_1 = st.button("📐 QUICK FORECAST", key="btn_quick", use_container_width=True, help="Score the watchlist (or the ticker above) with the local baseline model only: no LLM, no API keys, results in seconds")
         
         st.markdown("---")
         st.markdown("##### 💡 TIPS")
@@ -381,90 +375,142 @@ with tab1:
         - Use `.BO` suffix for BSE stocks
         - Example: `TCS.NS`, `INFY.NS`
         """)
-    
-    with col2:
-        output_1 = st.empty()
 
-        
     if run_btn_1 and not missing_keys:
-        with st.spinner("AGENTS DEPLOYED. ANALYZING MARKET DATA..."):
-            try:
-                # Agent Configuration
-                llm_config = get_llm_config()
-                
-                # 1. Market Analyst Agent
-                analyst = autogen.AssistantAgent(
-                    name="Market_Analyst",
-                    system_message="As a Market Analyst for the Indian Stock Market (NSE/BSE), you possess strong analytical abilities. "
-                    "Collect financial info and news using provided tools. "
-                    "Focus on Indian market context, regulatory updates (SEBI), and local economic factors. "
-                    "Reply TERMINATE when the task is done.",
-                    llm_config=llm_config,
-                )
-
-                # 2. User Proxy Agent
-                user_proxy = autogen.UserProxyAgent(
-                    name="User_Proxy",
-                    human_input_mode="NEVER",
-                    max_consecutive_auto_reply=10,
-                    is_termination_msg=lambda x: x.get("content", "") and x.get("content", "").strip().endswith("TERMINATE"),
-                    code_execution_config={
-                        "work_dir": "coding",
-                        "use_docker": False,
-                    }, 
-                )
-                
-                # Register Tools
-                tools = [
-                    {"function": FinnHubUtils.get_company_profile, "name": "get_company_profile", "description": "get company profile"},
-                    {"function": FinnHubUtils.get_company_news, "name": "get_company_news", "description": "get company news"},
-                    {"function": FinnHubUtils.get_basic_financials, "name": "get_financial_basics", "description": "get financial basics"},
-                    {"function": YFinanceUtils.get_stock_data, "name": "get_stock_data", "description": "get stock data"}
-                ]
-                register_toolkits(tools, analyst, user_proxy)
-                
-                # Prompt Construction
-                today = get_current_date()
-                company = ticker_1
-                prompt = (
-                    f"Use all tools to retrieve info for {company} (Indian Stock) as of {today}. "
-                    f"Analyze positive developments and concerns (focus on Indian market impact). "
-                    f"Make a prediction (up/down %) for next week. Provide a summary."
-                )
-                
-                # Run Chat
-                chat_res = user_proxy.initiate_chat(
-                    analyst,
-                    message=prompt,
-                    summary_method="reflection_with_llm",
-                )
-                
-                # Display Output
-                with output_1.container():
-                    st.success("ANALYSIS COMPLETE")
-                    
-                    # Extract the summary or last message
-                    summary = chat_res.summary
-                    st.markdown(f"### 📊 FORECAST REPORT // {company}")
-                    st.markdown(f"""
-                    <div class="result-card">
-                        {summary}
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    with st.expander("VIEW FULL CONVERSATION LOG"):
-                        for msg in chat_res.chat_history:
-                            role = msg['role'].upper()
-                            content = msg['content']
-                            if content:
-                                st.markdown(f"**{role}:** {content}")
-                                st.divider()
-                                
-            except Exception as e:
-                st.error(f"EXECUTION FAILED: {str(e)}")
+        import agents
+        import baseline_model
+        from compaction import TokenBudget
+        from statements import normalize_ticker
+
+        # Normalized once, so " tcs.ns" and "TCS.NS" share jobs, cache entries and stored reports
+        company = normalize_ticker(ticker_1)
+        prefetch = prefetch_1
+        pool = get_forecaster_pool(get_key_fingerprint(), live_streaming)
+        llm_cache = get_llm_cache().for_mode(llm_cache_mode)
+        tool_cache = get_tool_cache()
+        report_store = get_report_store()
+        stored = None if regenerate_1 else report_store.fresh("forecast", company, agents.LLM_MODEL)
+
+        def run_forecast_job(stream):
+            # Runs on a job worker; everything it needs is captured above
+            budget = TokenBudget()
+            started = time.perf_counter()
+            with tracing.traced_run("forecast", company) as trace:
+                # Optional fast path: fetch all tool data up front
+                prefetched = None
+                if prefetch:
+                    prefetched = agents.prefetch_forecast_data(company, agents.get_current_date(), tool_cache, budget)
+                prefetch_s = time.perf_counter() - started
+                # Local quantitative baseline, handed to the analyst as its starting point
+                prior = baseline_model.forecast_prior(company, agents.get_current_date())
+                chat_res = agents.run_forecast(pool, company, cache=llm_cache, prefetched=prefetched, budget=budget, prior=prior)
+            run_timing = {
+                "ticker": company,
+                "mode": "PREFETCH" if prefetch else "TOOL CALLS",
+                "prefetch_s": round(prefetch_s, 1),
+                "first_content_s": round(stream.first_content_s or 0, 1),
+                "total_s": round(time.perf_counter() - started, 1),
+                "llm_turns": agents.count_llm_turns(chat_res.chat_history),
+                "tool_tokens": budget.used,
+                "tool_budget": budget.limit,
+                "tokens_saved": budget.saved,
+            }
+            chat_history = [{"role": msg.get("role", ""), "content": msg.get("content")} for msg in chat_res.chat_history]
+            result = {"ticker": company, "summary": chat_res.summary, "chat_history": chat_history, "timing": run_timing, "prior": prior, "trace": trace.to_dict()}
+            report_store.save("forecast", company, agents.LLM_MODEL, result)
+            return result
+
+        params = {"ticker": company, "prefetch": prefetch, "llm_cache": llm_cache_mode}
+        if stored:
+            job_id = get_job_runner().complete("forecast", company, {**params, "report_id": stored["id"]}, {**stored["result"], "stored_at": stored["created"]})
+        else:
+            # Identical requests already in flight (e.g. from other sessions) share that run
+            job_id = get_job_runner().submit("forecast", company, params, run_forecast_job, key=run_key("forecast", company, agents.LLM_MODEL, prefetch=prefetch, llm_cache=llm_cache_mode))
+        attach_job("forecast_job", job_id)
     elif run_btn_1:
          st.error("CONFIGURE API KEYS IN SIDEBAR FIRST.")
 
+    if run_watchlist_1 and not missing_keys:
+        import agents
+        import baseline_model
+
+        watchlist = agents.parse_watchlist(watchlist_1)
+        if not watchlist:
+            st.error("ENTER AT LEAST ONE TICKER.")
+        else:
+            prefetch = prefetch_1
+            workers = workers_1
+            pool = get_forecaster_pool(get_key_fingerprint())
+            llm_cache = get_llm_cache().for_mode(llm_cache_mode)
+            tool_cache = get_tool_cache()
+
+            def run_watchlist_job(stream):
+                from compaction import TokenBudget
+                from concurrent.futures import ThreadPoolExecutor, as_completed
+
+                def forecast_ticker(ticker):
+                    # Runs on a worker thread with its own leased agent pair; yields to interactive runs
+                    set_priority("batch")
+                    started = time.perf_counter()
+                    budget = TokenBudget()
+                    with tracing.traced_run("watchlist", ticker):
+                        prefetched = agents.prefetch_forecast_data(ticker, agents.get_current_date(), tool_cache, budget) if prefetch else None
+                        prior = baseline_model.forecast_prior(ticker, agents.get_current_date())
+                        chat_res = agents.run_forecast(pool, ticker, cache=llm_cache, summary_prompt=agents.FORECAST_SUMMARY_PROMPT, prefetched=prefetched, budget=budget, prior=prior)
+                    return {"ticker": ticker, **agents.parse_forecast(chat_res.summary), "seconds": round(time.perf_counter() - started, 1), "tokens_saved": budget.saved}
+
+                rows = []
+                failures = []
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {executor.submit(forecast_ticker, ticker): ticker for ticker in watchlist}
+                    # Report each ticker as it finishes
+                    for future in as_completed(futures):
+                        try:
+                            rows.append(future.result())
+                            stream.emit("row", row=rows[-1])
+                        except Exception as e:
+                            failures.append(f"{futures[future]}: {str(e)}")
+                            stream.emit("failure", failure=failures[-1])
+                wall = time.perf_counter() - started
+                serial = sum(row["seconds"] for row in rows)
+                return {"tickers": watchlist, "rows": rows, "failures": failures, "wall_s": wall, "serial_s": serial}
+
+            job_id = get_job_runner().submit("watchlist", f"{len(watchlist)} TICKERS", {"tickers": watchlist, "prefetch": prefetch, "workers": workers}, run_watchlist_job)
+            attach_job("forecast_job", job_id)
+    elif run_watchlist_1:
+        st.error("CONFIGURE API KEYS IN SIDEBAR FIRST.")
+
+    if run_quick_1:
+        import agents
+
+        # Needs no Groq or Finnhub key: prices come from yfinance through the local price store
+        quick_tickers = agents.parse_watchlist(watchlist_1 or ticker_1, limit=QUICK_FORECAST_LIMIT)
+        if not quick_tickers:
+            st.error("ENTER A TICKER OR A WATCHLIST.")
+        else:
+            def run_quick_job(stream):
+                import baseline_model
+
+                started = time.perf_counter()
+                scores = baseline_model.quick_forecast(quick_tickers)
+                scored = scores[scores["status"] == "scored"].drop(columns="status")
+                rows = [{"ticker": ticker, **row} for ticker, row in scored.to_dict("index").items()]
+                return {
+                    "tickers": quick_tickers,
+                    "rows": rows,
+                    "learning": scores.index[scores["status"] == "learning"].tolist(),
+                    "missing": scores.index[scores["status"] == "no price history"].tolist(),
+                    "wall_s": time.perf_counter() - started,
+                    "model": baseline_model.model_summary(),
+                }
+
+            job_id = get_job_runner().submit("quick", f"{len(quick_tickers)} TICKERS", {"tickers": quick_tickers}, run_quick_job)
+            attach_job("forecast_job", job_id)
+
+    with col2:
+        show_job("forecast_job", live_streaming)
+
 with tab2:
     st.markdown("### 📋 ANNUAL REPORT DEEP DIVE")
     st.markdown("*Comprehensive financial analysis using AI-powered document parsing*")
@@ -475,6 +521,7 @@ with tab2:
         st.markdown("#### CONFIGURATION")
         ticker_2 = st.text_input("COMPANY TICKER", value="", placeholder="Enter ticker (e.g., TCS.NS)", help="E.g., TCS.NS, INFY.NS", key="ticker2")
         st.markdown("")
+        regenerate_2 = st.toggle("🔁 REGENERATE", value=False, key="regenerate2", help="Run the agents even if a fresh report for this ticker is already stored")
         run_btn_2 = st.button("📄 ANALYZE REPORT", key="btn2", use_container_width=True)
         
         st.markdown("---")
@@ -485,91 +532,210 @@ with tab2:
         - Cash Flow Assessment
         - Investment Recommendation
         """)
-        
-    with col2_2:
-        output_2 = st.empty()
-        
+
     if run_btn_2 and not missing_keys:
-        with st.spinner("FETCHING AND ANALYZING ANNUAL REPORT..."):
-            try:
-                # Agent Configuration
-                llm_config = get_llm_config()
-                
-                # Agents
-                expert = autogen.AssistantAgent(
-                    name="Expert_Investor",
-                    system_message="Role: Expert Investor for Indian Markets. "
-                    "Responsibility: Generate Customized Financial Analysis Reports. "
-                    "Use tools to fetch financial statements (Balance Sheet, Income Stmt, Cash Flow). "
-                    "If SEC 10-K is not available (common for Indian stocks), use FMP financial statements directly. "
-                    "Reply TERMINATE when detailed analysis is done.",
-                    llm_config=llm_config,
-                )
-                
-                user_proxy_rep = autogen.UserProxyAgent(
-                    name="User_Proxy_Report",
-                    human_input_mode="NEVER",
-                    max_consecutive_auto_reply=10,
-                    is_termination_msg=lambda x: x.get("content", "") and x.get("content", "").strip().endswith("TERMINATE"),
-                    code_execution_config={
-                        "work_dir": "report_coding",
-                        "use_docker": False,
-                    },
-                )
-                        
-                # Register Tools
-                # We register basic financial tools + report tools
-                # Note: FMPUtils.get_sec_report might fail for NS tickers, so we emphasize financial statement analysis
-                tools_rep = [
-                    {"function": FMPUtils.get_sec_report, "name": "get_sec_report", "description": "get SEC report"},
-                    {"function": ReportAnalysisUtils.analyze_balance_sheet, "name": "analyze_balance_sheet", "description": "analyze balance sheet"},
-                    {"function": ReportAnalysisUtils.analyze_income_stmt, "name": "analyze_income_stmt", "description": "analyze income statement"},
-                    {"function": ReportAnalysisUtils.analyze_cash_flow, "name": "analyze_cash_flow", "description": "analyze cash flow"},
-                    {"function": ReportAnalysisUtils.analyze_business_highlights, "name": "analyze_business_highlights", "description": "analyze business highlights"},
-                    {"function": TextUtils.check_text_length, "name": "check_text_length", "description": "check text length"},
-                ]
-                register_toolkits(tools_rep, expert, user_proxy_rep)
-                
-                # Prompt
-                company_2 = ticker_2
-                year = "2024" # Default to recent
-                prompt_rep = (
-                    f"Analyze the financial health of {company_2} (Indian Stock) for the year {year}. "
-                    f"1. Retrieve/Analyze Balance Sheet, Income Statement, and Cash Flow. "
-                    f"2. Summarize key financial metrics (Profitability, Liquidity, Solvency). "
-                    f"3. Provide an investment recommendation based on these metrics. "
-                    f"Format the output as a structured Annual Performance Report."
-                )
-                
-                # Run Chat
-                chat_res_rep = user_proxy_rep.initiate_chat(
-                    expert,
-                    message=prompt_rep,
-                    summary_method="reflection_with_llm",
-                )
-                
-                # Output
-                with output_2.container():
-                    st.success("REPORT GENERATION COMPLETE")
-                    summary_rep = chat_res_rep.summary
-                    
-                    st.markdown(f"### 📈 ANNUAL PERFORMANCE REPORT // {company_2}")
-                    st.markdown(f"""
-                    <div class="result-card">
-                        {summary_rep}
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    with st.expander("VIEW ANALYSIS STEPS"):
-                        for msg in chat_res_rep.chat_history:
-                            role = msg['role'].upper()
-                            content = msg['content']
-                            if content:
-                                st.markdown(f"**{role}:** {content}")
-                                st.divider()
-
-            except Exception as e:
-                st.error(f"EXECUTION FAILED: {str(e)}")
+        import agents
+        from compaction import TokenBudget
+        from statements import normalize_ticker
+
+        # Prompt
+        company_2 = normalize_ticker(ticker_2)
+        year = "2024" # Default to recent
+
+        pool = get_report_pool(get_key_fingerprint(), live_streaming)
+        llm_cache = get_llm_cache().for_mode(llm_cache_mode)
+        report_store = get_report_store()
+        stored = None if regenerate_2 else report_store.fresh("report", company_2, agents.LLM_MODEL)
+
+        def run_report_job(stream):
+            started = time.perf_counter()
+            budget = TokenBudget()
+            with tracing.traced_run("report", company_2) as trace:
+                chat_res_rep = agents.run_report(pool, company_2, year, cache=llm_cache, budget=budget)
+            result = {
+                "ticker": company_2,
+                "summary": chat_res_rep.summary,
+                "chat_history": [{"role": msg.get("role", ""), "content": msg.get("content")} for msg in chat_res_rep.chat_history],
+                "first_content_s": stream.first_content_s or 0,
+                "total_s": time.perf_counter() - started,
+                "tool_tokens": budget.used,
+                "tool_budget": budget.limit,
+                "tokens_saved": budget.saved,
+                "trace": trace.to_dict(),
+            }
+            report_store.save("report", company_2, agents.LLM_MODEL, result)
+            return result
+
+        params = {"ticker": company_2, "year": year, "llm_cache": llm_cache_mode}
+        if stored:
+            job_id = get_job_runner().complete("report", company_2, {**params, "report_id": stored["id"]}, {**stored["result"], "stored_at": stored["created"]})
+        else:
+            job_id = get_job_runner().submit("report", company_2, params, run_report_job, key=run_key("report", company_2, agents.LLM_MODEL, year=year, llm_cache=llm_cache_mode))
+        attach_job("report_job", job_id)
     elif run_btn_2:
         st.error("CONFIGURE API KEYS IN SIDEBAR FIRST.")
 
+    with col2_2:
+        show_job("report_job", live_streaming)
+
+with tab3:
+    st.markdown("### 🗃️ REPORT HISTORY")
+    st.markdown("*Every completed forecast and annual report, searchable by ticker or content*")
+    st.markdown("---")
+
+    col1_3, col2_3 = st.columns([1, 2])
+    with col1_3:
+        history_query = st.text_input("SEARCH", value="", placeholder="e.g. TCS.NS margin pressure", key="history_query")
+        history_flow = st.selectbox("FLOW", ["ALL", "FORECAST", "REPORT"], key="history_flow")
+    flow_filter = None if history_flow == "ALL" else history_flow.lower()
+    history = get_report_store().search(history_query, flow=flow_filter) if history_query.strip() else get_report_store().recent(flow=flow_filter)
+    with col2_3:
+        if not history:
+            st.markdown("No stored reports match.")
+        else:
+            st.dataframe(
+                [{
+                    "saved": time.strftime("%Y-%m-%d %H:%M", time.localtime(report["created"])),
+                    "flow": report["flow"].upper(),
+                    "ticker": report["ticker"],
+                    "model": report["model"],
+                    "match": report.get("snippet") or report["summary"][:160],
+                } for report in history],
+                use_container_width=True,
+                hide_index=True,
+            )
+            listed = {report["id"]: report for report in history}
+            opened = st.selectbox(
+                "OPEN REPORT",
+                list(listed),
+                index=None,
+                format_func=lambda report_id: f"{listed[report_id]['flow'].upper()} // {listed[report_id]['ticker']} // {listed[report_id]['date']}",
+                key="history_open",
+            )
+            report = get_report_store().get(opened) if opened else None
+            if report:
+                st.markdown(f"### {report['flow'].upper()} // {report['ticker']} // {report['date']}")
+                st.markdown(f"""
+                <div class="result-card">
+                    {report['result']['summary']}
+                </div>
+                """, unsafe_allow_html=True)
+                with st.expander("VIEW FULL CONVERSATION LOG"):
+                    render_chat_history(report["result"]["chat_history"])
+
+# Cache status (rendered last so it reflects any run above)
+with st.sidebar:
+    st.markdown("---")
+    st.markdown("### 🗄️ DATA CACHE")
+    cache_stats = get_tool_cache().summary()
+    st.markdown(f"**HITS:** {cache_stats['hits']} // **MISSES:** {cache_stats['misses']} // **HIT RATE:** {cache_stats['hit_rate']:.0%}")
+    st.markdown(f"**ENTRIES:** {cache_stats['entries']} ({cache_stats['bytes'] / 1024:.0f} KB)")
+    if st.button("🧹 CLEAR CACHE", key="clear_tool_cache"):
+        get_tool_cache().clear()
+    llm_stats = get_llm_cache().summary()
+    st.markdown(f"**LLM HITS:** {llm_stats['memory_hits']} mem / {llm_stats['disk_hits']} disk // **MISSES:** {llm_stats['misses']}")
+    report_stats = get_report_store().summary()
+    st.markdown(f"**REPORTS:** {report_stats['reports']} stored for {report_stats['tickers']} tickers // **SERVED:** {report_stats['served']}")
+    # Read once a run has imported them, so numpy and pandas stay off the cold-start path
+    price_store = sys.modules.get("price_store")
+    if price_store is not None:
+        price_stats = price_store.shared_prices().summary()
+        st.markdown(f"**PRICES:** {price_stats['tickers']} tickers ({price_stats['bytes'] / 1024:.0f} KB) // **FROM DISK:** {price_stats['served']} // **FETCHES:** {price_stats['fetched']}")
+    news_index = sys.modules.get("news_index")
+    news_stats = news_index.index_summary() if news_index is not None else None
+    if news_stats is not None:
+        st.markdown(f"**NEWS INDEX:** {news_stats['articles']} articles // **EMBEDDED:** {news_stats['embedded']} // **REUSED:** {news_stats['reused']} // **DUPLICATES:** {news_stats['collapsed']}")
+
+# Vendor budgets and circuit breakers (see vendor_guard), once a run has loaded them
+vendor_guard = sys.modules.get("vendor_guard")
+if vendor_guard is not None:
+    with st.sidebar:
+        st.markdown("### 🛡️ DATA SOURCES")
+        guard_stats = vendor_guard.shared_guard().summary()
+        for source, source_stats in guard_stats["sources"].items():
+            state = {"closed": "🟢", "half-open": "🟡", "open": "🔴"}[source_stats["state"]]
+            line = (
+                f"{state} **{source.upper()}:** {source_stats['calls']} calls // {source_stats['errors']} errors // "
+                f"{source_stats['timeouts']} over {source_stats['budget']:g}s // {source_stats['rejected']} failed fast"
+            )
+            if source_stats["state"] == "half-open":
+                line += " // PROBING"
+            elif source_stats["state"] == "open":
+                line += f" // RETRY IN {source_stats['retry_in']:.0f}s"
+            st.markdown(line)
+        st.markdown(f"**HEDGED:** {guard_stats['hedged']} // **FALLBACKS:** {guard_stats['fallbacks']} // **ALTERNATE WON:** {guard_stats['alternate_wins']}")
+
+# Groq scheduler status (shared by every session in this process)
+with st.sidebar:
+    st.markdown("### 🚦 GROQ SCHEDULER")
+    # Each model has its own quota
+    for model, limiter_stats in shared_limiter().summary().items():
+        waits = limiter_stats["waits"]
+        st.markdown(
+            f"**{model}:** QUEUED {limiter_stats['queued']} // 429s {limiter_stats['rate_limited']} // "
+            f"TOKENS LEFT {limiter_stats['tokens_available']}/min"
+        )
+        st.markdown(f"**AVG WAIT:** {waits['interactive']['avg_wait']:.1f}s interactive / {waits['batch']['avg_wait']:.1f}s batch")
+
+# Model tiers per turn role (see model_router)
+with st.sidebar:
+    st.markdown("### 🔀 MODEL TIERS")
+    router_stats = shared_router().summary()
+    for role, models in router_stats["tiers"].items():
+        st.markdown(f"**{role.upper()}:** {' → '.join(models)}")
+    for model, seconds in router_stats["cooling"].items():
+        st.markdown(f"**COOLING:** {model} for {seconds:.0f}s")
+    for route in tracing.shared_metrics().snapshot()["routes"]:
+        st.markdown(
+            f"**{route['flow'] or 'other'}/{route['role']}:** T{route['tier']} {route['model']} "
+            f"× {route['count']} ({route['errors']} failed) // p50 {route['p50_s']:.1f}s // "
+            f"{route['prompt_tokens'] + route['completion_tokens']} tokens"
+        )
+
+# Background jobs (shared by every session in this process)
+def reattach_selected_job():
+    job = get_job_runner().get(st.session_state["reattach_job"])
+    if job:
+        attach_job("report_job" if job["kind"] == "report" else "forecast_job", job["id"])
+
+with st.sidebar:
+    st.markdown("### 🧵 JOBS")
+    job_counts = get_job_runner().store.counts()
+    st.markdown(f"**QUEUED:** {job_counts['queued']} // **RUNNING:** {job_counts['running']} // **DONE:** {job_counts['done']} // **FAILED:** {job_counts['failed']}")
+    runner_stats = get_job_runner().summary()
+    st.markdown(f"**COALESCED:** {runner_stats['coalesced']} duplicate requests joined a running job")
+    recent_jobs = {job["id"]: job for job in get_job_runner().store.recent(limit=10)}
+    st.selectbox(
+        "REATTACH JOB",
+        list(recent_jobs),
+        index=None,
+        format_func=lambda job_id: f"{recent_jobs[job_id]['kind'].upper()} // {recent_jobs[job_id]['label']} // {recent_jobs[job_id]['status'].upper()}",
+        key="reattach_job",
+        on_change=reattach_selected_job,
+    )
+
+# Call metrics (also written to FINROBOT_METRICS_DIR after every run)
+with st.sidebar:
+    st.markdown("### 📈 METRICS")
+    metrics = tracing.shared_metrics()
+    metric_series = metrics.snapshot()["series"]
+    st.markdown(f"**CALLS:** {sum(series['count'] for series in metric_series)} // **ERRORS:** {sum(series['errors'] for series in metric_series)}")
+    for series in metric_series:
+        if series["kind"] == "llm":
+            st.markdown(f"**{series['name']}:** p50 {series['p50_s']:.1f}s / p95 {series['p95_s']:.1f}s")
+    col_m1, col_m2 = st.columns(2)
+    with col_m1:
+        st.download_button("PROMETHEUS", metrics.prometheus(), file_name="finrobot.prom", mime="text/plain", use_container_width=True)
+    with col_m2:
+        st.download_button("JSON LINES", metrics.json_lines(), file_name="metrics.jsonl", mime="application/x-ndjson", use_container_width=True)
+
+# Startup timing (cold start = first script run in this process)
+_script_ms = (time.perf_counter() - _script_start) * 1000
+startup_timings = get_startup_timings()
+startup_timings["runs"] += 1
+if startup_timings["cold_ms"] is None:
+    startup_timings["cold_ms"] = _script_ms
+with st.sidebar:
+    st.markdown("---")
+    st.markdown("### ⏱️ STARTUP")
+    st.markdown(f"**COLD START:** {startup_timings['cold_ms']:.0f} ms // **THIS RERUN:** {_script_ms:.0f} ms")
@@ -0,0 +1,409 @@
+"""Local quantitative baseline for the next-week move, trained on price history.
+
+A linear model (scikit-learn SGDRegressor, Huber loss) maps scale-free price
+features (returns, volatility, RSI, MACD, distance from moving averages,
+drawdown, ATR) to the return over the next HORIZON sessions. Features are
+computed for every date and ticker of a panel at once, so scoring a universe
+is one matrix product. The model is trained incrementally: each update only
+feeds sessions newer than the ones a ticker was last trained on (all of its
+history for a new ticker) through partial_fit, and the artifact is saved under
+FINROBOT_BASELINE_PATH. Errors are measured prequentially, i.e. on each batch
+before the model learns from it.
+
+Forecasts only score the published model. Updates train a private copy and
+publish it when done, with one updater at a time across processes (a lock
+file next to the artifact); other processes reload the artifact when it
+changes.
+
+    python baseline_model.py universe.txt            # update the model, score the universe
+"""
+import os
+import sys
+import copy
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: one updater per process only
+    fcntl = None
+
+from tool_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# "0" runs the analyst without the baseline in its prompt
+BASELINE_PRIOR = os.environ.get("FINROBOT_BASELINE_PRIOR", "1") != "0"
+BASELINE_PATH = os.environ.get("FINROBOT_BASELINE_PATH", os.path.join(CACHE_DIR, "models", "baseline.joblib"))
+# Sessions ahead the model predicts ("next week")
+HORIZON = 5
+# History a new ticker is trained on
+TRAIN_YEARS = int(os.environ.get("FINROBOT_BASELINE_TRAIN_YEARS", "5"))
+# Calendar days of history the features need (SMA 200 and the 1-year high)
+LOOKBACK_DAYS = 400
+# Passes of partial_fit over each batch
+EPOCHS = 3
+# Share of the very first batch held out (its latest sessions) to measure the error band
+HOLDOUT = 0.2
+# Forward returns are clipped to this (%), so a single gap does not dominate a batch
+TARGET_CLIP = 20.0
+FEATURES = (
+    "return_1d_pct",
+    "return_5d_pct",
+    "return_21d_pct",
+    "return_63d_pct",
+    "volatility_21d_pct",
+    "rsi_14",
+    "macd_hist_pct",
+    "price_vs_sma20_pct",
+    "price_vs_sma50_pct",
+    "price_vs_sma200_pct",
+    "drawdown_1y_pct",
+    "atr_pct",
+)
+
+
+def feature_panel(close, high, low):
+    """{feature: DataFrame date x ticker} for every date of the panel."""
+    returns = close.pct_change(fill_method=None)
+    features = {f"return_{n}d_pct": (close / close.shift(n) - 1) * 100 for n in (1, 5, 21, 63)}
+    features["volatility_21d_pct"] = returns.rolling(21).std() * np.sqrt(252) * 100
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    features["rsi_14"] = 100 - 100 / (1 + avg_gain / avg_loss)
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    features["macd_hist_pct"] = (macd - macd.ewm(span=9, adjust=False).mean()) / close * 100
+    for n in (20, 50, 200):
+        features[f"price_vs_sma{n}_pct"] = (close / close.rolling(n).mean() - 1) * 100
+    features["drawdown_1y_pct"] = (close / close.rolling(252, min_periods=1).max() - 1) * 100
+    prev_close = close.shift(1)
+    true_range = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+    features["atr_pct"] = true_range.ewm(alpha=1 / 14, adjust=False).mean() / close * 100
+    return features
+
+
+def forward_return(close):
+    return ((close.shift(-HORIZON) / close - 1) * 100).clip(-TARGET_CLIP, TARGET_CLIP)
+
+
+def stacked(features):
+    """Feature panels -> (MultiIndex (date, ticker), matrix) with one row per complete observation."""
+    import pandas as pd
+
+    frame = pd.concat({name: features[name].stack(future_stack=True) for name in FEATURES}, axis=1)
+    frame = frame.replace([np.inf, -np.inf], np.nan).dropna()
+    return frame.index, frame.to_numpy(dtype=np.float64)
+
+
+def load_panel(symbols, start, end):
+    from price_store import shared_prices
+
+    panel = shared_prices().panel(symbols, start, end)
+    return panel["Close"], panel["High"], panel["Low"]
+
+
+class BaselineModel:
+    """Scaler and regressor updated with partial_fit, plus what each ticker was trained through."""
+
+    def __init__(self):
+        from sklearn.linear_model import SGDRegressor
+        from sklearn.preprocessing import StandardScaler
+
+        self.scaler = StandardScaler()
+        self.model = SGDRegressor(loss="huber", epsilon=2.0, alpha=1e-3, learning_rate="invscaling", eta0=0.005, random_state=0)
+        self.trained_through = {}
+        self.stats = {"samples": 0, "abs_error": 0.0, "squared_error": 0.0, "hits": 0, "scored": 0, "updated": None}
+        self.features = FEATURES
+        self.fitted = False
+
+    @classmethod
+    def load(cls, path=None):
+        import joblib
+
+        path = path or BASELINE_PATH
+        if not os.path.exists(path):
+            return cls()
+        model = joblib.load(path)
+        # An artifact trained on a different feature set starts over
+        return model if getattr(model, "features", None) == FEATURES else cls()
+
+    def save(self, path=None):
+        import joblib
+
+        path = path or BASELINE_PATH
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # Written atomically through a private file, so a concurrent load never reads half an artifact
+        fd, tmp = tempfile.mkstemp(prefix=".baseline.", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                joblib.dump(self, f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _learn(self, X, y):
+        self.scaler.partial_fit(X)
+        scaled = self.scaler.transform(X)
+        order = np.random.default_rng(self.stats["samples"]).permutation(len(y))
+        for _ in range(EPOCHS):
+            self.model.partial_fit(scaled[order], y[order])
+        self.stats["samples"] += len(y)
+        self.fitted = True
+
+    def fit_more(self, X, y):
+        """Learn from a batch ordered oldest first, scoring it beforehand."""
+        if not self.fitted:
+            # Nothing to score with yet: learn the older part first and score the rest with it
+            split = int(len(y) * (1 - HOLDOUT))
+            if not split:
+                self._learn(X, y)
+                return
+            self._learn(X[:split], y[:split])
+            X, y = X[split:], y[split:]
+        error = self.model.predict(self.scaler.transform(X)) - y
+        self.stats["abs_error"] += float(np.abs(error).sum())
+        self.stats["squared_error"] += float((error**2).sum())
+        self.stats["hits"] += int((np.sign(error + y) == np.sign(y)).sum())
+        self.stats["scored"] += len(y)
+        self._learn(X, y)
+
+    def update(self, symbols, today=None):
+        """Train on the sessions of `symbols` whose forward return is known and not yet learned; returns rows used."""
+        today = date.fromisoformat(today) if isinstance(today, str) else today or date.today()
+        first = today - timedelta(days=365 * TRAIN_YEARS)
+        since = {s: date.fromisoformat(self.trained_through[s]) if s in self.trained_through else first for s in symbols}
+        close, high, low = load_panel(symbols, min(since.values()) - timedelta(days=LOOKBACK_DAYS), today + timedelta(days=1))
+        if close.empty:
+            return 0
+        index, X = stacked(feature_panel(close, high, low))
+        target = forward_return(close).stack(future_stack=True).reindex(index).to_numpy()
+        dates = index.get_level_values(0).date
+        tickers = index.get_level_values(1)
+        cutoff = np.array([since[t] for t in tickers])
+        new = (dates > cutoff) & ~np.isnan(target)
+        if not new.any():
+            return 0
+        # Oldest first, so the first batch's holdout is its most recent sessions
+        order = np.argsort(dates[new], kind="stable")
+        self.fit_more(X[new][order], target[new][order])
+        for ticker in set(tickers[new]):
+            self.trained_through[ticker] = max(dates[new & (tickers == ticker)]).isoformat()
+        self.stats["updated"] = time.time()
+        return int(new.sum())
+
+    def predict(self, symbols, today=None):
+        """DataFrame indexed by ticker: expected move over HORIZON sessions, 1-sigma band and top drivers."""
+        import pandas as pd
+
+        empty = pd.DataFrame(columns=["as_of", "expected_move_pct", "low_pct", "high_pct", "direction", "drivers"])
+        if not self.fitted:
+            # Nothing to score with, so no reason to touch the price store
+            return empty
+        today = date.fromisoformat(today) if isinstance(today, str) else today or date.today()
+        close, high, low = load_panel(symbols, today - timedelta(days=LOOKBACK_DAYS), today + timedelta(days=1))
+        if close.empty:
+            return empty
+        features = feature_panel(close, high, low)
+        last = pd.DataFrame({name: features[name].ffill().iloc[-1] for name in FEATURES}).replace([np.inf, -np.inf], np.nan).dropna()
+        scaled = self.scaler.transform(last.to_numpy(dtype=np.float64))
+        expected = self.model.predict(scaled)
+        sigma = self.residual_std()
+        # Linear model: each feature's contribution is its coefficient times its scaled value
+        contributions = scaled * self.model.coef_
+        drivers = [
+            ", ".join(f"{FEATURES[j]} {last.iloc[i, j]:+.1f} ({contributions[i, j]:+.2f}%)" for j in np.argsort(-np.abs(contributions[i]))[:3])
+            for i in range(len(last))
+        ]
+        as_of = close.apply(lambda c: c.last_valid_index()).reindex(last.index)
+        return pd.DataFrame(
+            {
+                "as_of": [d.strftime("%Y-%m-%d") for d in as_of],
+                "expected_move_pct": expected.round(2),
+                "low_pct": (expected - sigma).round(2),
+                "high_pct": (expected + sigma).round(2),
+                "direction": np.where(expected >= 0, "UP", "DOWN"),
+                "drivers": drivers,
+            },
+            index=last.index,
+        )
+
+    def residual_std(self):
+        scored = self.stats["scored"]
+        return float(np.sqrt(self.stats["squared_error"] / scored)) if scored else float("nan")
+
+    def summary(self):
+        scored = self.stats["scored"]
+        return {
+            "tickers": len(self.trained_through),
+            "samples": self.stats["samples"],
+            "mae_pct": self.stats["abs_error"] / scored if scored else None,
+            "hit_rate": self.stats["hits"] / scored if scored else None,
+            "updated": self.stats["updated"],
+        }
+
+
+_shared = None
+_shared_mtime = None
+# Guards only the swap of the published model; scoring never waits on training or downloads
+_shared_lock = threading.Lock()
+# One updater per process; the file lock makes it one across processes
+_update_lock = threading.Lock()
+
+
+def current_model(path=None):
+    """The published model, reloaded when the artifact on disk has changed (e.g. saved by precompute)."""
+    global _shared, _shared_mtime
+    path = path or BASELINE_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _shared_lock:
+        if _shared is not None and mtime == _shared_mtime:
+            return _shared
+    model = BaselineModel.load(path)
+    with _shared_lock:
+        _shared, _shared_mtime = model, mtime
+        return model
+
+
+@contextmanager
+def update_owner(path):
+    """Yields True to the single updater of the artifact at `path`, False to anyone else (who should skip)."""
+    if not _update_lock.acquire(blocking=False):
+        yield False
+        return
+    try:
+        if fcntl is None:
+            yield True
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(f"{path}.lock", "w") as f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+    finally:
+        _update_lock.release()
+
+
+def refresh(symbols, today=None, path=None):
+    """Train on the new sessions of `symbols` and publish the result.
+
+    Returns the rows learned, or None if another thread or process is already updating.
+    """
+    global _shared, _shared_mtime
+    path = path or BASELINE_PATH
+    symbols = [s.strip().upper() for s in symbols]
+    with update_owner(path) as owner:
+        if not owner:
+            return None
+        # A private copy trains while forecasts keep scoring the published model
+        model = copy.deepcopy(current_model(path))
+        learned = model.update(symbols, today)
+        if learned:
+            model.save(path)
+            with _shared_lock:
+                _shared, _shared_mtime = model, os.stat(path).st_mtime_ns
+        return learned
+
+
+def refresh_in_background(symbols, today=None, path=None):
+    def run():
+        try:
+            refresh(symbols, today, path)
+        except Exception as e:
+            logger.warning("baseline refresh for %s failed: %s", ", ".join(symbols), e)
+
+    threading.Thread(target=run, name="baseline-refresh", daemon=True).start()
+
+
+def quick_forecast(symbols, today=None, path=None):
+    """Score `symbols` with the published model, one row per ticker in input order.
+
+    Nothing is trained here: tickers the model has not learned yet are learned in the
+    background for the next call. `status` is "scored", "learning" (no score yet, being
+    learned) or "no price history".
+    """
+    symbols = [s.strip().upper() for s in symbols]
+    model = current_model(path)
+    scores = model.predict(symbols, today)
+    unseen = [s for s in symbols if s not in model.trained_through]
+    if unseen:
+        refresh_in_background(unseen, today, path)
+    scored = set(scores.index)
+    scores = scores.reindex(symbols)
+    scores["status"] = ["scored" if s in scored else "learning" if s in unseen else "no price history" for s in symbols]
+    return scores
+
+
+def model_summary():
+    with _shared_lock:
+        return _shared.summary() if _shared is not None else None
+
+
+def forecast_prior(symbol, today=None, learn_missing=True):
+    """Baseline for one ticker as a sentence for the analyst's prompt, or None if it cannot be computed.
+
+    Only scores the published model. A ticker it has not been trained on is learned
+    in the background (if `learn_missing`) for later forecasts.
+    """
+    import tracing
+
+    if not BASELINE_PRIOR:
+        return None
+    symbol = symbol.strip().upper()
+    started = time.perf_counter()
+    try:
+        model = current_model()
+        scores = model.predict([symbol], today)
+    except Exception as e:
+        logger.warning("baseline forecast for %s failed: %s", symbol, e)
+        tracing.record("model", "baseline", started, error=str(e))
+        return None
+    tracing.record("model", "baseline", started, tickers=1)
+    if learn_missing and symbol not in model.trained_through:
+        refresh_in_background([symbol], today)
+    if symbol not in scores.index:
+        return None
+    row = scores.loc[symbol]
+    return (
+        f"A local quantitative model trained on price history expects {row['expected_move_pct']:+.2f}% over the next "
+        f"{HORIZON} sessions (typical error band {row['low_pct']:+.2f}% to {row['high_pct']:+.2f}%), as of {row['as_of']}. "
+        f"Largest contributions: {row['drivers']}."
+    )
+
+
+def main():
+    import argparse
+
+    from dotenv import load_dotenv
+    from precompute import read_universe
+
+    parser = argparse.ArgumentParser(description="Update the baseline model on a universe and print its forecasts")
+    parser.add_argument("universe", help="file of tickers, as for precompute.py")
+    args = parser.parse_args()
+    load_dotenv()
+    started = time.perf_counter()
+    universe = read_universe(args.universe)
+    # The nightly update: trained here and now, not in the background
+    refresh(universe)
+    scores = quick_forecast(universe)
+    print(scores.sort_values("expected_move_pct", ascending=False).to_string())
+    summary = model_summary()
+    print(f"scored {len(scores)} tickers in {time.perf_counter() - started:.1f}s; model: {summary}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Micro-benchmark for indicators.compute_features.
+
+Times the batched (one pass over a date x ticker panel) computation against
+calling it once per ticker, on synthetic random-walk prices.
+
+    python bench/bench_indicators.py --symbols 500 --years 5
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indicators import compute_features  # noqa: E402
+
+
+def synthetic_panel(symbols, sessions, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2024-12-31", periods=sessions)
+    columns = [f"SYM{i:04d}.NS" for i in range(symbols)]
+    log_returns = rng.normal(0.0003, 0.018, size=(sessions, symbols))
+    close = pd.DataFrame(100 * np.exp(np.cumsum(log_returns, axis=0)), index=index, columns=columns)
+    spread = np.abs(rng.normal(0, 0.01, size=(sessions, symbols)))
+    return close, close * (1 + spread), close * (1 - spread)
+
+
+def best_of(repeat, func):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    close, high, low = synthetic_panel(args.symbols, args.years * 252)
+    print(f"{args.symbols} symbols x {len(close)} sessions")
+
+    batched = best_of(args.repeat, lambda: compute_features(close, high, low))
+    looped = best_of(
+        max(1, args.repeat // 2),
+        lambda: [compute_features(close[[c]], high[[c]], low[[c]]) for c in close.columns],
+    )
+    print(f"batched:    {batched * 1000:8.1f} ms  ({batched / args.symbols * 1e6:7.1f} us/symbol)")
+    print(f"per-ticker: {looped * 1000:8.1f} ms  ({looped / args.symbols * 1e6:7.1f} us/symbol)")
+    print(f"speed-up:   {looped / batched:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Recorded vendor data standing in for the Finnhub, yfinance, FMP and SEC utilities.
+
+`install(fixtures)` swaps the finrobot data-source methods for fixture-backed
+versions with the same signatures and return shapes, so the agents and every
+layer above them (tool cache, compaction, statement bundle) run unchanged.
+`inject()` makes one data source hang or fail, to exercise vendor_guard.py.
+"""
+import os
+import json
+import time
+import inspect
+import threading
+from functools import wraps
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures.json")
+
+PROFILE_TEMPLATE = (
+    "[Company Introduction]:\n\n{name} is a leading entity in the {finnhubIndustry} sector. "
+    "Incorporated and publicly traded since {ipo}, the company has established its reputation as "
+    "one of the key players in the market. As of today, {name} has a market capitalization "
+    "of {marketCapitalization:.2f} in {currency}, with {shareOutstanding:.2f} shares outstanding."
+    "\n\n{name} operates primarily in the {country}, trading under the ticker {ticker} on the {exchange}. "
+    "As a dominant force in the {finnhubIndustry} space, the company continues to innovate and drive "
+    "progress within the industry."
+)
+
+
+class Fixtures:
+    """Fixture-backed vendor calls, each delayed by `latency` seconds and counted."""
+
+    def __init__(self, path=FIXTURES_PATH, latency=0.1):
+        with open(path) as f:
+            self.data = json.load(f)
+        self.latency = latency
+        self.calls = Counter()
+        # finrobot class name -> {"delay": seconds, "error": message}
+        self.faults = {}
+        self._released = threading.Event()
+        self._lock = threading.Lock()
+        self._prices = self._price_history(self.data["prices"])
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            fault = self.faults.get(SOURCE_CLASS[name])
+            released = self._released
+        if self.latency:
+            time.sleep(self.latency)
+        if fault:
+            released.wait(fault["delay"])
+            if fault["error"]:
+                raise ConnectionError(fault["error"])
+
+    def inject(self, class_name, delay=0.0, error=None):
+        """Make every call to one data source (e.g. "FinnHubUtils") hang for `delay` seconds, then raise `error` if given."""
+        with self._lock:
+            self.faults[class_name] = {"delay": delay, "error": error}
+
+    def clear_faults(self):
+        with self._lock:
+            self.faults = {}
+            # Calls still hanging return now
+            self._released.set()
+            self._released = threading.Event()
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+
+    @staticmethod
+    def _price_history(spec):
+        rng = np.random.default_rng(spec["seed"])
+        index = pd.bdate_range(spec["start"], spec["end"], tz="Asia/Kolkata")
+        returns = rng.normal(spec["drift"], spec["volatility"], len(index))
+        close = spec["first_close"] * np.exp(np.cumsum(returns))
+        spread = np.abs(rng.normal(0, spec["volatility"] / 2, len(index)))
+        return pd.DataFrame(
+            {
+                "Open": np.r_[spec["first_close"], close[:-1]],
+                "High": close * (1 + spread),
+                "Low": close * (1 - spread),
+                "Close": close,
+                "Volume": rng.integers(spec["volume"] // 2, spec["volume"] * 2, len(index)),
+                "Dividends": 0.0,
+                "Stock Splits": 0.0,
+            },
+            index=pd.DatetimeIndex(index, name="Date"),
+        )
+
+    @staticmethod
+    def _statement(table):
+        return pd.DataFrame(table).rename(columns=pd.Timestamp)
+
+    # FinnHubUtils
+    def get_company_profile(self, symbol):
+        self._call("get_company_profile")
+        return PROFILE_TEMPLATE.format(ticker=symbol, **self.data["profile"])
+
+    def get_company_news(self, symbol, start_date, end_date, max_news_num=10, save_path=None):
+        self._call("get_company_news")
+        news = [
+            {"date": pd.Timestamp(n["datetime"], unit="s").strftime("%Y%m%d%H%M%S"), "headline": n["headline"], "summary": n["summary"]}
+            for n in self.data["news"][:max_news_num]
+        ]
+        return pd.DataFrame(sorted(news, key=lambda n: n["date"]))
+
+    def get_basic_financials(self, symbol, selected_columns=None):
+        self._call("get_basic_financials")
+        metrics = self.data["basic_financials"]
+        if selected_columns:
+            metrics = {k: v for k, v in metrics.items() if k in selected_columns}
+        return json.dumps(metrics, indent=2)
+
+    # YFinanceUtils
+    def get_stock_info(self, symbol):
+        self._call("get_stock_info")
+        # The quote summary yfinance would have for the same company
+        profile, metrics = self.data["profile"], self.data["basic_financials"]
+        return {
+            "longName": profile["name"],
+            "industry": profile["finnhubIndustry"],
+            "sector": profile["finnhubIndustry"],
+            "country": profile["country"],
+            "currency": profile["currency"],
+            "exchange": "NSI",
+            "marketCap": profile["marketCapitalization"] * 1e6,
+            "sharesOutstanding": profile["shareOutstanding"] * 1e6,
+            "trailingPE": metrics.get("peTTM"),
+            "trailingEps": metrics.get("epsAnnual"),
+            "beta": metrics.get("beta"),
+            "fiftyTwoWeekHigh": metrics.get("52WeekHigh"),
+            "fiftyTwoWeekLow": metrics.get("52WeekLow"),
+            "currentRatio": metrics.get("currentRatioAnnual"),
+        }
+
+    def get_stock_data(self, symbol, start_date, end_date, save_path=None):
+        self._call("get_stock_data")
+        index = self._prices.index.tz_localize(None)
+        return self._prices[(index >= pd.Timestamp(start_date)) & (index < pd.Timestamp(end_date))]
+
+    def get_income_stmt(self, symbol):
+        self._call("get_income_stmt")
+        return self._statement(self.data["income_stmt"])
+
+    def get_balance_sheet(self, symbol):
+        self._call("get_balance_sheet")
+        return self._statement(self.data["balance_sheet"])
+
+    def get_cash_flow(self, symbol):
+        self._call("get_cash_flow")
+        return self._statement(self.data["cash_flow"])
+
+    # FMPUtils / SECUtils
+    def get_sec_report(self, ticker_symbol, fyear="latest"):
+        self._call("get_sec_report")
+        return f"Link: https://www.sec.gov/Archives/edgar/data/{ticker_symbol}/{fyear}-10k.htm\nFiling Date: {fyear}-05-30"
+
+    def get_10k_section(self, ticker_symbol, fyear, section, report_address=None, save_path=None):
+        self._call("get_10k_section")
+        return f"Item {section} of the {fyear} annual report of {ticker_symbol}. " * 20
+
+
+# (finrobot class name, method name)
+PATCHED = [
+    ("FinnHubUtils", "get_company_profile"),
+    ("FinnHubUtils", "get_company_news"),
+    ("FinnHubUtils", "get_basic_financials"),
+    ("YFinanceUtils", "get_stock_info"),
+    ("YFinanceUtils", "get_stock_data"),
+    ("YFinanceUtils", "get_income_stmt"),
+    ("YFinanceUtils", "get_balance_sheet"),
+    ("YFinanceUtils", "get_cash_flow"),
+    ("FMPUtils", "get_sec_report"),
+    ("SECUtils", "get_10k_section"),
+]
+SOURCE_CLASS = {name: class_name for class_name, name in PATCHED}
+
+
+def _stand_in(original, replacement):
+    signature = inspect.signature(original)
+
+    # Keeps the original signature (and so the tool schema the LLM sees)
+    @wraps(original)
+    def method(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return replacement(**bound.arguments)
+
+    return method
+
+
+def install(fixtures):
+    """Route the finrobot data sources to `fixtures`. Returns a function that undoes it."""
+    from finrobot import data_source
+
+    originals = []
+    for class_name, name in PATCHED:
+        cls = getattr(data_source, class_name)
+        original = getattr(cls, name)
+        originals.append((cls, name, original))
+        setattr(cls, name, _stand_in(original, getattr(fixtures, name)))
+
+    def uninstall():
+        for cls, name, original in originals:
+            setattr(cls, name, original)
+
+    return uninstall
@@ -0,0 +1,131 @@
+"""Local OpenAI-compatible stand-in for Groq with scripted responses.
+
+The script is the same for every conversation: call each offered tool once,
+`tools_per_turn` per turn (all at once if None), in the order the tools are
+offered, then write a forecast or report and TERMINATE. A request whose last message is a system prompt (the
+reflection_with_llm summary) gets a JSON summary. Usage is reported at ~4
+characters per token so token counts track prompt size.
+"""
+import json
+import time
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHARS_PER_TOKEN = 4
+
+FINAL_ANSWER = (
+    "Positive developments: steady revenue growth, a new multi-year deal and an expanded AI partnership. "
+    "Concerns: brokerages trimmed sector growth estimates and discretionary spending is slow. "
+    "Prediction: up 1.5% next week, supported by a weaker rupee and improving sentiment in IT services. TERMINATE"
+)
+SUMMARY = json.dumps(
+    {"direction": "up", "move_pct": 1.5, "confidence": "medium", "key_drivers": ["new deal wins", "weaker rupee", "sector estimate cuts"]}
+)
+
+
+def count_tokens(payload):
+    return len(json.dumps(payload, default=str)) // CHARS_PER_TOKEN + 1
+
+
+def argument_value(name, spec, context):
+    # Plausible arguments from the parameter name, falling back on its JSON type
+    if name in ("symbol", "ticker_symbol", "ticker"):
+        return context["ticker"]
+    if name == "start_date":
+        return context["start_date"]
+    if name == "end_date":
+        return context["today"]
+    if name == "fyear":
+        return context["fyear"]
+    if name == "save_path":
+        return f"{context['work_dir']}/{context['tool']}.txt"
+    if name == "text":
+        return FINAL_ANSWER
+    if name == "min_length":
+        return 100
+    if name == "max_length":
+        return 5000
+    return {"integer": 10, "number": 1.0, "boolean": False, "array": []}.get(spec.get("type"), "")
+
+
+class ScriptedLLM:
+    def __init__(self, context, latency=0.2, tools_per_turn=1):
+        self.context = context
+        self.latency = latency
+        self.tools_per_turn = tools_per_turn
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+    def _count(self, **values):
+        with self._lock:
+            self.stats.update(values)
+
+    def reply(self, body):
+        messages = body["messages"]
+        called = {
+            call["function"]["name"]
+            for message in messages
+            for call in message.get("tool_calls") or []
+        }
+        prefetched = "do not call tools" in str(messages[1].get("content", "") if len(messages) > 1 else "")
+        if messages[-1].get("role") == "system":
+            return {"role": "assistant", "content": SUMMARY}
+        pending = [] if prefetched else [tool["function"] for tool in body.get("tools") or [] if tool["function"]["name"] not in called]
+        if pending:
+            tool_calls = []
+            for function in pending[: self.tools_per_turn]:
+                context = {**self.context, "tool": function["name"]}
+                properties = function.get("parameters", {}).get("properties", {})
+                required = function.get("parameters", {}).get("required", list(properties))
+                arguments = {name: argument_value(name, properties[name], context) for name in required}
+                call_id = f"call_{len(called) + len(tool_calls) + 1}"
+                tool_calls.append({"id": call_id, "type": "function", "function": {"name": function["name"], "arguments": json.dumps(arguments)}})
+            return {"role": "assistant", "content": None, "tool_calls": tool_calls}
+        return {"role": "assistant", "content": FINAL_ANSWER}
+
+    def complete(self, body):
+        if self.latency:
+            time.sleep(self.latency)
+        message = self.reply(body)
+        prompt_tokens = count_tokens(body["messages"]) + count_tokens(body.get("tools") or [])
+        completion_tokens = count_tokens(message)
+        self._count(
+            requests=1,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            tool_calls=len(message.get("tool_calls") or []),
+        )
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop", "message": message}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+
+def serve(llm, port=0):
+    """Start the server on a daemon thread; returns (server, base_url)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            payload = json.dumps(llm.complete(body)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
@@ -0,0 +1,254 @@
+"""Offline end-to-end benchmark of the forecaster and annual report flows.
+
+Drives the real agents against a local scripted LLM (mock_llm.py) and recorded
+vendor data (fixtures.json), so no Groq, FMP or Finnhub quota is used.
+
+    python bench/run_bench.py                   # run, compare against bench/baseline.json
+    python bench/run_bench.py --save-baseline   # run and record a new baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import platform
+import statistics
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures  # noqa: E402
+import mock_llm  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TICKER = "TCS.NS"
+# The fixtures answer the same for every symbol, so the watchlist differs from one ticker only in concurrency
+WATCHLIST = ["TCS.NS", "INFY.NS", "WIPRO.NS", "HCLTECH.NS"]
+TODAY = "2024-06-28"
+FYEAR = "2024"
+
+# Allowed growth over the baseline before a metric counts as a regression
+TOLERANCES = {
+    "wall_s": 0.25,
+    "llm_turns": 0.0,
+    "llm_requests": 0.0,
+    "prompt_tokens": 0.10,
+    "completion_tokens": 0.10,
+    "tool_calls": 0.0,
+    "vendor_calls": 0.0,
+    "peak_mb": 0.25,
+}
+
+
+class QuietStream:
+    # autogen IOStream that drops the console transcript
+    def print(self, *objects, sep=" ", end="\n", flush=False):
+        pass
+
+    def input(self, prompt="", *, password=False):
+        return ""
+
+
+class Bench:
+    def __init__(self, llm_latency, vendor_latency):
+        self.work_dir = tempfile.mkdtemp(prefix="finrobot-bench-")
+        self.fixtures = fixtures.Fixtures(latency=vendor_latency)
+        self.uninstall = fixtures.install(self.fixtures)
+        self.llm = mock_llm.ScriptedLLM(
+            {"ticker": TICKER, "today": TODAY, "start_date": "2024-05-28", "fyear": FYEAR, "work_dir": self.work_dir},
+            latency=llm_latency,
+        )
+        self.server, base_url = mock_llm.serve(self.llm)
+        os.environ["GROQ_BASE_URL"] = base_url
+        os.environ.setdefault("GROQ_API_KEY", "bench")
+        # Fixture prices must not land in the real price store; each bench run starts with an empty one
+        os.environ["FINROBOT_PRICE_DIR"] = os.path.join(self.work_dir, "prices")
+        # Ranking needs the embedding model, which may not be downloadable; the bench serves news unranked
+        os.environ["FINROBOT_NEWS_RANKING"] = "0"
+        # Vendor budgets scaled to the fixture latency, so the fault scenarios finish in seconds
+        os.environ["FINROBOT_FINNHUB_BUDGET"] = "1"
+        os.environ["FINROBOT_HEDGE_AFTER"] = "0.3"
+        # The baseline prior is scored from a model trained on the fixture prices, not the real artifact
+        os.environ["FINROBOT_BASELINE_PATH"] = os.path.join(self.work_dir, "models", "baseline.joblib")
+
+        import agents
+        import baseline_model
+        from rate_limiter import ModelLimiters
+
+        self.agents = agents
+        # The scheduler is exercised, but with limits the mock never reaches
+        limiters = ModelLimiters({}, default={"requests_per_minute": 10**6, "tokens_per_minute": 10**9, "requests_per_day": 10**9})
+        llm_config = agents.get_llm_config()
+        self.forecaster = agents.AgentPool(lambda: agents.build_forecaster(llm_config, None, limiters))
+        self.report_expert = agents.AgentPool(lambda: agents.build_report_expert(llm_config, None, limiters))
+        self.baseline_model = baseline_model
+        # Trained up front, as precompute --baseline does overnight; forecasts then only score it
+        baseline_model.refresh(WATCHLIST, TODAY)
+
+    def close(self):
+        self.server.shutdown()
+        self.uninstall()
+
+    # --- Scenarios ---
+    def forecast(self, budget, prefetch=False, tools_per_turn=1, ticker=TICKER):
+        self.llm.tools_per_turn = tools_per_turn
+        prefetched = self.agents.prefetch_forecast_data(ticker, TODAY, None, budget) if prefetch else None
+        # As in the app, every forecast starts from the baseline prior
+        prior = self.baseline_model.forecast_prior(ticker, TODAY, learn_missing=False)
+        return self.agents.run_forecast(self.forecaster, ticker, today=TODAY, prefetched=prefetched, budget=budget, prior=prior)
+
+    def watchlist(self, budget, workers=4):
+        from concurrent.futures import ThreadPoolExecutor
+        from autogen.io import IOStream
+        from vendor_guard import shared_guard
+
+        # Every run starts with closed breakers, whichever fault scenario ran before it
+        shared_guard().reset()
+
+        def forecast_ticker(ticker):
+            # The default stream is per thread
+            with IOStream.set_default(QuietStream()):
+                return self.forecast(budget, prefetch=True, ticker=ticker)
+
+        # Prefetched forecasts on concurrent workers, as the app's watchlist job runs them
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(forecast_ticker, WATCHLIST))
+
+    def forecast_with_fault(self, budget, delay=0.0, error=None, tools_per_turn=1):
+        from vendor_guard import shared_guard
+
+        # Every run starts with closed breakers, as a fresh process would
+        shared_guard().reset()
+        self.fixtures.inject("FinnHubUtils", delay=delay, error=error)
+        try:
+            return self.forecast(budget, tools_per_turn=tools_per_turn)
+        finally:
+            self.fixtures.clear_faults()
+
+    def report(self, budget):
+        from statements import shared_statements
+
+        # Every run starts without bundles, as a fresh process would
+        shared_statements().clear()
+        self.llm.tools_per_turn = 1
+        return self.agents.run_report(self.report_expert, TICKER, FYEAR, budget=budget)
+
+    def scenarios(self):
+        return {
+            "forecast_tool_calls": lambda budget: self.forecast(budget),
+            "forecast_prefetch": lambda budget: self.forecast(budget, prefetch=True),
+            # The model requests every tool in its first reply; the calls run concurrently
+            "forecast_parallel_tools": lambda budget: self.forecast(budget, tools_per_turn=None),
+            "annual_report": self.report,
+            # Finnhub errors on every call: profile and financials fall back to yfinance, news fails fast
+            "forecast_finnhub_down": lambda budget: self.forecast_with_fault(budget, error="503 Service Unavailable"),
+            # Finnhub hangs: profile and financials are hedged to yfinance, news is given up at its budget
+            "forecast_finnhub_hung": lambda budget: self.forecast_with_fault(budget, delay=30, tools_per_turn=None),
+            "watchlist": self.watchlist,
+        }
+
+    def run(self, name, repeat):
+        from compaction import TokenBudget
+
+        scenario = self.scenarios()[name]
+        # Untimed warm-up: builds the agent pair and fills lazy imports
+        scenario(TokenBudget())
+        walls = []
+        for _ in range(repeat):
+            self.llm.reset()
+            self.fixtures.reset()
+            budget = TokenBudget()
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            results = scenario(budget)
+            walls.append(time.perf_counter() - started)
+            peak = tracemalloc.get_traced_memory()[1]
+        # Everything but wall time is deterministic, so the last repeat stands for all
+        results = results if isinstance(results, list) else [results]
+        return {
+            "wall_s": round(statistics.median(walls), 3),
+            "llm_turns": sum(self.agents.count_llm_turns(chat_res.chat_history) for chat_res in results),
+            "llm_requests": self.llm.stats["requests"],
+            "prompt_tokens": self.llm.stats["prompt_tokens"],
+            "completion_tokens": self.llm.stats["completion_tokens"],
+            "tool_calls": self.llm.stats["tool_calls"],
+            "vendor_calls": sum(self.fixtures.calls.values()),
+            "tool_tokens": budget.used,
+            "peak_mb": round(peak / 1024 / 1024, 2),
+        }
+
+
+def compare(current, baseline):
+    """Print current vs baseline per metric; returns the list of regressions."""
+    regressions = []
+    for name, metrics in current.items():
+        base = baseline.get(name)
+        print(f"\n{name}")
+        for metric, value in metrics.items():
+            if not base or metric not in base:
+                print(f"  {metric:<18} {value:>12}")
+                continue
+            before = base[metric]
+            delta = (value - before) / before if before else 0.0
+            flag = ""
+            if metric in TOLERANCES and value > before and delta > TOLERANCES[metric]:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}.{metric}: {before} -> {value}")
+            print(f"  {metric:<18} {value:>12}  (baseline {before}, {delta:+.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per mock completion")
+    parser.add_argument("--vendor-latency", type=float, default=0.1, help="seconds per fixture vendor call")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    from autogen.io import IOStream
+
+    bench = Bench(args.llm_latency, args.vendor_latency)
+    names = args.scenarios or list(bench.scenarios())
+    tracemalloc.start()
+    results = {}
+    try:
+        with IOStream.set_default(QuietStream()):
+            for name in names:
+                results[name] = bench.run(name, args.repeat)
+                print(f"{name}: {results[name]['wall_s']}s", flush=True)
+    finally:
+        tracemalloc.stop()
+        bench.close()
+
+    if args.save_baseline:
+        meta = {
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "llm_latency": args.llm_latency,
+            "vendor_latency": args.vendor_latency,
+        }
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": meta, "scenarios": results}, f, indent=2)
+        print(f"\nbaseline saved to {args.baseline}")
+        compare(results, {})
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+    regressions = compare(results, baseline)
+    if regressions:
+        print("\nregressions:\n  " + "\n  ".join(regressions))
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Pre-warmed Python workers for the code blocks agents write.
+
+autogen's local executor starts a fresh interpreter for every block, which
+re-imports pandas and matplotlib each time, and all sessions share one
+work_dir. Here a small pool keeps interpreters running with the common
+libraries already imported. Each agent pair leases its own worker and a
+private workspace for the length of a run, reuses it across turns, and
+hands it back on restart(): the worker is discarded (so nothing leaks to the
+next session), the workspace deleted, and a spare is already warming.
+
+Run as a script, this module is the worker itself.
+"""
+import os
+import re
+import sys
+import json
+import queue
+import shutil
+import hashlib
+import tempfile
+import threading
+import traceback
+import subprocess
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, timeouts still apply
+    resource = None
+
+from tool_cache import CACHE_DIR
+
+WORKSPACE_DIR = os.environ.get("FINROBOT_WORKSPACE_DIR", os.path.join(CACHE_DIR, "workspaces"))
+# Spare workers kept warm for the next session
+WARM_WORKERS = int(os.environ.get("FINROBOT_CODE_WORKERS", "2"))
+# Wall-clock seconds per code block
+CODE_TIMEOUT = float(os.environ.get("FINROBOT_CODE_TIMEOUT", "60"))
+CODE_MEMORY_MB = int(os.environ.get("FINROBOT_CODE_MEMORY_MB", "2048"))
+CODE_FILE_MB = int(os.environ.get("FINROBOT_CODE_FILE_MB", "100"))
+WARM_IMPORTS = ("numpy", "pandas", "matplotlib.pyplot")
+
+PYTHON_LANGUAGES = ("python", "py", "python3")
+SHELL_LANGUAGES = ("bash", "sh", "shell")
+FILENAME_COMMENT = re.compile(r"^\s*#\s*filename:\s*(\S+)")
+TIMEOUT_EXIT_CODE = 124
+
+
+def limit_resources():
+    # Applied inside the worker (and shell blocks) before any agent code runs
+    if resource is None:
+        return
+    memory = CODE_MEMORY_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    size = CODE_FILE_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_FSIZE, (size, size))
+
+
+# --- Worker process side ---
+def run_block(path, cwd):
+    """Execute one saved code block in a fresh namespace, capturing fd-level stdout/stderr."""
+    log = tempfile.TemporaryFile()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = (os.dup(1), os.dup(2))
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    os.chdir(cwd)
+    sys.path.insert(0, cwd)
+    exit_code = 0
+    try:
+        with open(path) as f:
+            code = compile(f.read(), path, "exec")
+        exec(code, {"__name__": "__main__", "__file__": path, "__builtins__": __builtins__})
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exit_code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException as e:
+        # Skip this frame, so the traceback reads as if the file had been run directly
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exit_code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        sys.path.remove(cwd)
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+    log.seek(0)
+    return {"exit_code": exit_code, "output": log.read().decode(errors="replace")}
+
+
+def serve():
+    limit_resources()
+    for name in WARM_IMPORTS:
+        try:
+            __import__(name)
+        except ImportError:
+            pass
+    # Requests and replies use private copies of stdin/stdout, so agent code can neither read nor corrupt them
+    requests = os.fdopen(os.dup(0))
+    replies = os.fdopen(os.dup(1), "w")
+    null = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(null, 0)
+    replies.write(json.dumps({"ready": True}) + "\n")
+    replies.flush()
+    for line in requests:
+        request = json.loads(line)
+        replies.write(json.dumps(run_block(request["path"], request["cwd"])) + "\n")
+        replies.flush()
+
+
+# --- App side ---
+class CodeWorker:
+    """One interpreter process that runs saved code blocks on request."""
+
+    def __init__(self):
+        env = {**os.environ, "MPLBACKEND": "Agg", "PYTHONUNBUFFERED": "1"}
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=env,
+        )
+        self._replies = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+        self.ready = False
+
+    def _read(self):
+        for line in self.process.stdout:
+            self._replies.put(json.loads(line))
+        self._replies.put(None)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def _reply(self, timeout):
+        try:
+            return self._replies.get(timeout=timeout)
+        except queue.Empty:
+            return False
+
+    def run(self, path, cwd, timeout):
+        """Returns (exit_code, output); a block that times out or kills the worker ends it."""
+        if not self.ready:
+            # Still importing; the first block of a cold worker waits for that too
+            if not self._reply(timeout):
+                self.stop()
+                return TIMEOUT_EXIT_CODE, "Timeout: code worker did not start"
+            self.ready = True
+        self.process.stdin.write(json.dumps({"path": path, "cwd": cwd}) + "\n")
+        self.process.stdin.flush()
+        reply = self._reply(timeout)
+        if reply is False:
+            self.stop()
+            return TIMEOUT_EXIT_CODE, f"Timeout: code block ran longer than {timeout:g}s"
+        if reply is None:
+            return 1, f"Code worker exited with status {self.process.wait()} (it may have hit the {CODE_MEMORY_MB} MB memory limit)"
+        return reply["exit_code"], reply["output"]
+
+    def stop(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+
+class WarmPool:
+    """Keeps `size` spare workers started, so leasing one costs no interpreter startup."""
+
+    def __init__(self, size=None):
+        self.size = WARM_WORKERS if size is None else size
+        self.stats = {"leased": 0, "cold": 0}
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def fill(self):
+        with self._lock:
+            self._idle = [worker for worker in self._idle if worker.alive()]
+            missing = self.size - len(self._idle)
+            self._idle += [CodeWorker() for _ in range(missing)]
+
+    def lease(self):
+        with self._lock:
+            worker = self._idle.pop(0) if self._idle else None
+            self.stats["leased"] += 1
+        if worker is None or not worker.alive():
+            with self._lock:
+                self.stats["cold"] += 1
+            worker = CodeWorker()
+        # Replace the spare in the background
+        threading.Thread(target=self.fill, daemon=True).start()
+        return worker
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_pool():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WarmPool()
+            threading.Thread(target=_shared.fill, daemon=True).start()
+        return _shared
+
+
+class WarmCodeExecutor:
+    """autogen CodeExecutor running python blocks in a leased warm worker, shell blocks in a subprocess.
+
+    Pass as `code_execution_config={"executor": WarmCodeExecutor("coding")}`. Blocks
+    run in a workspace private to this executor; restart() (called when the agent
+    pair goes back to its pool) ends the worker and deletes the workspace.
+    """
+
+    def __init__(self, name="coding", pool=None, timeout=None):
+        self.name = name
+        self.pool = pool or shared_pool()
+        self.timeout = timeout or CODE_TIMEOUT
+        self.workspace = None
+        self._worker = None
+
+    @property
+    def code_extractor(self):
+        from autogen.coding import MarkdownCodeExtractor
+
+        return MarkdownCodeExtractor()
+
+    def _save(self, code, suffix):
+        if self.workspace is None:
+            os.makedirs(WORKSPACE_DIR, exist_ok=True)
+            self.workspace = os.path.abspath(tempfile.mkdtemp(prefix=f"{self.name}-", dir=WORKSPACE_DIR))
+        match = FILENAME_COMMENT.match(code)
+        filename = match.group(1) if match else f"tmp_code_{hashlib.md5(code.encode()).hexdigest()}.{suffix}"
+        path = os.path.abspath(os.path.join(self.workspace, filename))
+        if os.path.commonpath([path, self.workspace]) != self.workspace:
+            return None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(code)
+        return path
+
+    def _run_python(self, path):
+        if self._worker is None or not self._worker.alive():
+            self._worker = self.pool.lease()
+        exit_code, output = self._worker.run(path, self.workspace, self.timeout)
+        if not self._worker.alive():
+            self._worker = None
+        return exit_code, output
+
+    def _run_shell(self, path):
+        try:
+            result = subprocess.run(
+                ["bash", path],
+                cwd=self.workspace,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                preexec_fn=limit_resources if resource is not None else None,
+            )
+        except subprocess.TimeoutExpired:
+            return TIMEOUT_EXIT_CODE, f"Timeout: code block ran longer than {self.timeout:g}s"
+        return result.returncode, result.stderr + result.stdout
+
+    def execute_code_blocks(self, code_blocks):
+        from autogen.coding import CodeResult
+
+        outputs = []
+        exit_code = 0
+        for block in code_blocks:
+            language = block.language.lower()
+            if language in PYTHON_LANGUAGES:
+                path = self._save(block.code, "py")
+                run = self._run_python
+            elif language in SHELL_LANGUAGES:
+                path = self._save(block.code, "sh")
+                run = self._run_shell
+            else:
+                exit_code, output = 1, f"unknown language {language}"
+                outputs.append(output)
+                break
+            if path is None:
+                exit_code, output = 1, "Filename is not in the workspace"
+            else:
+                exit_code, output = run(path)
+            outputs.append(output)
+            if exit_code:
+                break
+        return CodeResult(exit_code=exit_code, output="\n".join(outputs))
+
+    def restart(self):
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+        if self.workspace is not None:
+            shutil.rmtree(self.workspace, ignore_errors=True)
+            self.workspace = None
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import logging
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Tokens of tool output allowed into one conversation
+DEFAULT_BUDGET = int(os.environ.get("FINROBOT_TOOL_TOKEN_BUDGET", "4000"))
+CHARS_PER_TOKEN = 4
+NEWS_MAX_ITEMS = 8
+NEWS_SUMMARY_CHARS = 200
+
+_local = threading.local()
+
+
+def count_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def to_text(result):
+    if isinstance(result, pd.DataFrame):
+        return result.to_string()
+    return str(result)
+
+
+# --- Per-tool strategies ---
+def compact_prices(result):
+    if not isinstance(result, pd.DataFrame) or result.empty or "Close" not in result:
+        return to_text(result)
+    close = result["Close"]
+    returns = close.pct_change().dropna()
+    drawdown = close / close.cummax() - 1
+    stats = {
+        "period": f"{result.index[0]:%Y-%m-%d} to {result.index[-1]:%Y-%m-%d}",
+        "sessions": len(result),
+        "first_close": round(float(close.iloc[0]), 2),
+        "last_close": round(float(close.iloc[-1]), 2),
+        "change_pct": round(float(close.iloc[-1] / close.iloc[0] - 1) * 100, 2),
+        "high": round(float(result["High"].max()), 2),
+        "low": round(float(result["Low"].min()), 2),
+        "avg_volume": int(result["Volume"].mean()),
+        "daily_volatility_pct": round(float(returns.std() * 100), 2) if len(returns) > 1 else None,
+        "max_drawdown_pct": round(float(drawdown.min() * 100), 2),
+    }
+    recent = result[["Open", "High", "Low", "Close", "Volume"]].tail(5).round(2)
+    text = f"Price summary: {json.dumps(stats)}\nLast 5 sessions:\n{recent.to_string()}"
+    if isinstance(result.index, pd.DatetimeIndex) and len(result) > 10:
+        weekly = close.resample("W").last().dropna().round(2)
+        text += "\nWeekly closes: " + ", ".join(f"{d:%m-%d} {v}" for d, v in weekly.items())
+    return text
+
+
+def compact_news(result):
+    if isinstance(result, pd.DataFrame):
+        records = result.to_dict("records")
+    elif isinstance(result, list):
+        records = result
+    else:
+        return to_text(result)
+    seen = set()
+    lines = []
+    for record in sorted(records, key=lambda r: str(r.get("date", "")), reverse=True):
+        headline = str(record.get("headline", "")).strip()
+        # Syndicated copies differ only in punctuation/casing
+        key = re.sub(r"\W+", " ", headline.lower()).strip()[:80]
+        if not headline or key in seen:
+            continue
+        seen.add(key)
+        summary = str(record.get("summary", "")).strip()
+        if len(summary) > NEWS_SUMMARY_CHARS:
+            summary = summary[:NEWS_SUMMARY_CHARS].rsplit(" ", 1)[0] + "..."
+        # news_index collapses syndicated copies of a story into one record
+        duplicates = record.get("duplicates")
+        if duplicates and not pd.isna(duplicates):
+            summary += f" ({int(duplicates)} similar reports)"
+        lines.append(f"- {str(record.get('date', ''))[:8]} {headline}: {summary}")
+        if len(lines) >= NEWS_MAX_ITEMS:
+            break
+    return "\n".join(lines) if lines else "No company news found."
+
+
+def compact_financials(result):
+    try:
+        metrics = json.loads(result) if isinstance(result, str) else dict(result)
+    except (TypeError, ValueError):
+        return to_text(result)
+    numeric = {
+        k: round(v, 4) if isinstance(v, float) else v
+        for k, v in metrics.items()
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    }
+    return json.dumps(numeric, separators=(",", ":"))
+
+
+STRATEGIES = {
+    "get_stock_data": compact_prices,
+    "get_company_news": compact_news,
+    "get_financial_basics": compact_financials,
+}
+
+
+class TokenBudget:
+    """Caps the tool output admitted into one conversation and records the savings."""
+
+    def __init__(self, limit=None):
+        self.limit = limit or DEFAULT_BUDGET
+        self.used = 0
+        self.raw = 0
+        self.per_tool = {}
+        self._lock = threading.Lock()
+
+    def admit(self, name, raw_tokens, text):
+        with self._lock:
+            remaining = max(self.limit - self.used, 0)
+            tokens = count_tokens(text)
+            if tokens > remaining:
+                text = text[: remaining * CHARS_PER_TOKEN] + "\n[truncated: tool output budget for this conversation is used up]"
+                tokens = count_tokens(text)
+            self.used += tokens
+            self.raw += raw_tokens
+            stats = self.per_tool.setdefault(name, {"calls": 0, "raw_tokens": 0, "tokens": 0})
+            stats["calls"] += 1
+            stats["raw_tokens"] += raw_tokens
+            stats["tokens"] += tokens
+        return text
+
+    @property
+    def saved(self):
+        return max(self.raw - self.used, 0)
+
+    def summary(self):
+        return {"limit": self.limit, "used": self.used, "raw": self.raw, "saved": self.saved, "per_tool": self.per_tool}
+
+
+def compact_result(name, result, budget=None):
+    raw_tokens = count_tokens(to_text(result))
+    strategy = STRATEGIES.get(name, to_text)
+    text = strategy(result)
+    if budget is not None:
+        text = budget.admit(name, raw_tokens, text)
+    return text
+
+
+def current_budget():
+    return getattr(_local, "budget", None)
+
+
+@contextmanager
+def charged_to(budget):
+    # Charge tool calls on this thread to `budget` (e.g. inside a worker of a chat's turn)
+    previous = current_budget()
+    _local.budget = budget
+    try:
+        yield budget
+    finally:
+        _local.budget = previous
+
+
+@contextmanager
+def conversation_budget(budget=None):
+    # Tool calls made on this thread during the chat are charged to `budget`
+    budget = budget or TokenBudget()
+    # Restores the enclosing budget afterwards, so nested conversations do not drop it
+    with charged_to(budget):
+        try:
+            yield budget
+        finally:
+            logger.info("tool output compaction: %d raw tokens -> %d (%d saved)", budget.raw, budget.used, budget.saved)
+
+
+def compacted(func, name):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return compact_result(name, func(*args, **kwargs), current_budget())
+
+    return wrapper
+
+
+def compacted_tools(tools):
+    """Return a copy of a register_toolkits config whose results are compacted and budgeted."""
+    return [{**tool, "function": compacted(tool["function"], tool["name"])} for tool in tools]
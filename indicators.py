@@ -0,0 +1,116 @@
+import json
+from typing import Annotated
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def _last_valid(frame):
+    return frame.ffill().iloc[-1]
+
+
+def _days_since_change(trend):
+    # Sessions since the sign of `trend` last flipped, per column (NaN if it never did)
+    flips = (trend.ne(trend.shift()) & trend.notna() & trend.shift().notna()).to_numpy()
+    ago = np.argmax(flips[::-1], axis=0).astype(float)
+    ago[~flips.any(axis=0)] = np.nan
+    return pd.Series(ago, index=trend.columns)
+
+
+def compute_features(close, high=None, low=None):
+    """Indicator snapshot for every ticker in one vectorized pass.
+
+    `close`, `high` and `low` are DataFrames indexed by date with one column per
+    ticker. Returns a DataFrame indexed by ticker, one column per feature.
+    """
+    high = close if high is None else high
+    low = close if low is None else low
+    last = _last_valid(close)
+    returns = close.pct_change(fill_method=None)
+    features = {"last_close": last}
+
+    # Returns and volatility
+    for n in (1, 5, 21, 63):
+        features[f"return_{n}d_pct"] = (last / close.shift(n).iloc[-1] - 1) * 100
+    features["volatility_21d_pct"] = returns.iloc[-21:].std() * np.sqrt(TRADING_DAYS) * 100
+    features["volatility_63d_pct"] = returns.iloc[-63:].std() * np.sqrt(TRADING_DAYS) * 100
+
+    # RSI (Wilder smoothing)
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+    avg_loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+    features["rsi_14"] = (100 - 100 / (1 + avg_gain / avg_loss)).iloc[-1]
+
+    # MACD (12, 26, 9)
+    macd = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+    signal = macd.ewm(span=9, adjust=False).mean()
+    features["macd"] = macd.iloc[-1]
+    features["macd_signal"] = signal.iloc[-1]
+    features["macd_hist"] = (macd - signal).iloc[-1]
+
+    # Moving-average crossovers
+    sma_20 = close.rolling(20).mean()
+    sma_50 = close.rolling(50).mean()
+    sma_200 = close.rolling(200).mean()
+    features["price_vs_sma20_pct"] = (last / sma_20.iloc[-1] - 1) * 100
+    features["price_vs_sma50_pct"] = (last / sma_50.iloc[-1] - 1) * 100
+    features["price_vs_sma200_pct"] = (last / sma_200.iloc[-1] - 1) * 100
+    trend = np.sign(sma_50 - sma_200)
+    features["sma50_above_sma200"] = trend.iloc[-1]
+    features["sma_cross_days_ago"] = _days_since_change(trend)
+
+    # ATR (Wilder smoothing)
+    prev_close = close.shift(1)
+    true_range = np.maximum(high - low, np.maximum((high - prev_close).abs(), (low - prev_close).abs()))
+    atr = true_range.ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+    features["atr_14"] = atr
+    features["atr_pct"] = atr / last * 100
+
+    # Drawdown
+    drawdown = close / close.cummax() - 1
+    features["drawdown_pct"] = drawdown.iloc[-1] * 100
+    features["max_drawdown_pct"] = drawdown.min() * 100
+
+    return pd.DataFrame(features).round(3)
+
+
+def features_from_ohlcv(frames):
+    """compute_features for {ticker: OHLCV DataFrame}, aligning them on date first."""
+    close = pd.DataFrame({t: f["Close"] for t, f in frames.items()})
+    high = pd.DataFrame({t: f["High"] for t, f in frames.items()})
+    low = pd.DataFrame({t: f["Low"] for t, f in frames.items()})
+    return compute_features(close, high, low)
+
+
+def fetch_panel(symbols, start_date, end_date):
+    from price_store import shared_prices
+
+    # Served from the local price store; only missing ranges are downloaded
+    panel = shared_prices().panel(symbols, start_date, end_date)
+    return panel["Close"], panel["High"], panel["Low"]
+
+
+def batch_indicators(symbols, start_date, end_date):
+    """Indicator table for many tickers from the local price store."""
+    return compute_features(*fetch_panel(symbols, start_date, end_date))
+
+
+def to_feature_dict(row):
+    return {k: (None if pd.isna(v) else float(v)) for k, v in row.items()}
+
+
+def get_technical_indicators(
+    symbol: Annotated[str, "ticker symbol"],
+    start_date: Annotated[str, "start date of the price history to use, YYYY-mm-dd (a year or more is best)"],
+    end_date: Annotated[str, "end date of the price history to use, YYYY-mm-dd"],
+) -> str:
+    """compute returns, volatility, RSI, MACD, moving-average crossovers, ATR and drawdown for a ticker"""
+    from price_store import shared_prices
+
+    prices = shared_prices().frame(symbol, start_date, end_date)
+    if prices is None or prices.empty:
+        return f"Failed to retrieve price data for {symbol} from yfinance!"
+    features = features_from_ohlcv({symbol: prices}).loc[symbol]
+    return json.dumps({"symbol": symbol, **to_feature_dict(features)})
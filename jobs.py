@@ -0,0 +1,179 @@
+import os
+import time
+import json
+import uuid
+import sqlite3
+import logging
+import threading
+from datetime import date
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import streaming
+import tracing
+from tool_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get("FINROBOT_JOB_WORKERS", "4"))
+FINISHED = ("done", "failed")
+# Event logs of finished jobs kept in memory for replay
+MAX_STREAMS = 100
+
+
+def run_key(flow, ticker, model, **settings):
+    # Requests with the same key would produce the same output, so they share one run; `settings` are
+    # whatever else changes how it is produced (LLM cache mode, prefetch, ...)
+    return (flow, ticker.strip().upper(), date.today().isoformat(), model, *sorted(settings.items()))
+
+
+COLUMNS = ("id", "kind", "label", "params", "status", "result", "error", "created", "started", "finished")
+
+
+class JobStore:
+    """SQLite job table: queued -> running -> done | failed."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "jobs.sqlite")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT, label TEXT, params TEXT, status TEXT, "
+            "result TEXT, error TEXT, created REAL, started REAL, finished REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created)")
+        # Work queued or running in a previous process died with it
+        self._conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'interrupted by a server restart', finished = ? "
+            "WHERE status IN ('queued', 'running')",
+            (time.time(),),
+        )
+        self._conn.commit()
+
+    def create(self, kind, label, params):
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, label, params, status, created) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, kind, label, json.dumps(params, default=str), time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def _row(self, row):
+        job = dict(zip(COLUMNS, row))
+        job["params"] = json.loads(job["params"]) if job["params"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def recent(self, limit=20, kind=None):
+        query = "SELECT id, kind, label, status, error, created, started, finished FROM jobs"
+        args = ()
+        if kind:
+            query += " WHERE kind = ?"
+            args = (kind,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY created DESC LIMIT ?", (*args, limit)).fetchall()
+        return [dict(zip(("id", "kind", "label", "status", "error", "created", "started", "finished"), row)) for row in rows]
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: 0 for status in ("queued", "running", *FINISHED)} | dict(rows)
+
+
+class JobRunner:
+    """Local worker pool that runs analyses independently of any Streamlit session.
+
+    `run(stream)` executes on a worker thread with its messages and completion
+    tokens reported into `stream`; it must return something JSON-serializable,
+    which is stored as the job result. Pages poll the job table and replay the
+    stream's log, so they can drop and reattach at any time. A submission with
+    the `key` of a job still queued or running joins that job instead of
+    starting another one.
+    """
+
+    def __init__(self, store=None, workers=None):
+        self.store = store or JobStore()
+        self.workers = workers or JOB_WORKERS
+        self.streams = {}
+        self.inflight = {}
+        self.joined = Counter()
+        self.coalesced = Counter()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+
+    def submit(self, kind, label, params, run, key=None):
+        with self._lock:
+            if key is not None and key in self.inflight:
+                job_id = self.inflight[key]
+                self.joined[job_id] += 1
+                self.coalesced[kind] += 1
+                tracing.shared_metrics().record_coalesced(kind)
+                return job_id
+            job_id = self.store.create(kind, label, params)
+            stream = streaming.RunStream()
+            self.streams[job_id] = stream
+            if key is not None:
+                self.inflight[key] = job_id
+            self._prune()
+        self._executor.submit(self._execute, job_id, run, stream, key)
+        return job_id
+
+    def complete(self, kind, label, params, result):
+        """Record a job that is already done (e.g. served from the report store) without running anything."""
+        job_id = self.store.create(kind, label, params)
+        now = time.time()
+        self.store.update(job_id, status="done", result=result, started=now, finished=now)
+        return job_id
+
+    def _prune(self):
+        finished = [job_id for job_id, s in self.streams.items() if s.log and s.log[-1]["kind"] in ("done", "error")]
+        for job_id in finished[: max(len(self.streams) - MAX_STREAMS, 0)]:
+            del self.streams[job_id]
+
+    def _execute(self, job_id, run, stream, key=None):
+        self.store.update(job_id, status="running", started=time.time())
+        try:
+            with streaming.attached(stream):
+                result = run(stream)
+        except Exception as e:
+            logger.exception("job %s failed", job_id)
+            self._finish(job_id, key, status="failed", error=str(e))
+            stream.emit("error", error=e)
+        else:
+            self._finish(job_id, key, status="done", result=result)
+            stream.emit("done", result=result)
+
+    def _finish(self, job_id, key, **fields):
+        # The row is final before the key is released, so a later request finds the result, not a gap
+        self.store.update(job_id, finished=time.time(), **fields)
+        if key is not None:
+            with self._lock:
+                self.inflight.pop(key, None)
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def summary(self):
+        with self._lock:
+            return {"inflight": len(self.inflight), "coalesced": sum(self.coalesced.values()), "per_kind": dict(self.coalesced)}
+
+    def stream(self, job_id):
+        return self.streams.get(job_id)
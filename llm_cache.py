@@ -0,0 +1,118 @@
+import os
+import threading
+from collections import OrderedDict
+import diskcache
+
+from tool_cache import CACHE_DIR
+
+# Sidebar label -> cache mode
+CACHE_MODES = {
+    "READ / WRITE": "record",
+    "REPLAY ONLY": "replay",
+    "BYPASS": "off",
+}
+
+
+class ReplayMiss(RuntimeError):
+    pass
+
+
+class TieredLLMCache:
+    """Completion cache for autogen: an in-memory LRU in front of a disk store.
+
+    autogen computes the key from the full request (model, messages, tools,
+    temperature), so identical conversations are replayed without hitting Groq.
+    The key holds the configured model, not the tier the turn was routed to, so
+    only replies from the configured model are stored.
+    """
+
+    def __init__(self, path=None, memory_entries=None):
+        self.path = path or os.path.join(CACHE_DIR, "llm")
+        self.memory_entries = memory_entries or int(os.environ.get("FINROBOT_LLM_CACHE_ENTRIES", "512"))
+        self.disk = diskcache.Cache(self.path)
+        self.memory = OrderedDict()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def _remember(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self.memory[key]
+        value = self.disk.get(key, None)
+        with self._lock:
+            if value is None:
+                self.stats["misses"] += 1
+                return default
+            self.stats["disk_hits"] += 1
+            self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        if getattr(value, "rerouted", False):
+            # Replayed under this key it would pass for the configured model's reply
+            return
+        with self._lock:
+            self._remember(key, value)
+        self.disk.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self.disk.clear()
+
+    def summary(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return {**self.stats, "hit_rate": hits / total if total else 0.0, "memory_size": len(self.memory)}
+
+    def for_mode(self, mode):
+        # Cache object to hand to initiate_chat for the selected mode
+        if mode == "off":
+            return None
+        if mode == "replay":
+            return ReplayCache(self)
+        return self
+
+    # autogen wraps every lookup in a `with` block; the stores stay open across calls
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+class ReplayCache:
+    """Read-only view that refuses to fall through to the network."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, key, default=None):
+        value = self.cache.get(key, None)
+        if value is None:
+            raise ReplayMiss("No recorded completion for this request. Run once in READ / WRITE mode first.")
+        return value
+
+    def set(self, key, value):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
@@ -0,0 +1,117 @@
+"""Per-turn model routing with fallback down a tier list.
+
+Every completion is classified by the role it plays in the conversation:
+
+- tool:     tools are offered and some have not been called yet, so the turn
+            mostly picks the next call
+- analysis: the data is in (all tools called, or handed over up front) and
+            the turn writes the actual analysis
+- summary:  autogen's reflection turn that condenses the chat into its summary
+
+Each role has an ordered list of models. A tier that answers 429 or takes
+longer than the role's latency budget is skipped for a cool-down and the same
+request goes to the next tier; the last tier gets the full timeout and the
+scheduler's usual backoff. Override the tiers with FINROBOT_MODEL_TIERS, e.g.
+
+    FINROBOT_MODEL_TIERS='{"analysis": ["llama-3.3-70b-versatile", "llama-3.1-8b-instant"]}'
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+ROLES = ("tool", "analysis", "summary")
+
+# Fastest first; Groq rate-limits each model separately, so the next tier has its own quota (rate_limiter.MODEL_LIMITS)
+DEFAULT_TIERS = {role: ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"] for role in ROLES}
+MODEL_TIERS = {**DEFAULT_TIERS, **json.loads(os.environ.get("FINROBOT_MODEL_TIERS") or "{}")}
+
+# Seconds a tier may take before the turn falls back to the next one
+LATENCY_BUDGETS = {
+    "tool": float(os.environ.get("FINROBOT_TOOL_TURN_BUDGET", "20")),
+    "analysis": float(os.environ.get("FINROBOT_ANALYSIS_TURN_BUDGET", "60")),
+    "summary": float(os.environ.get("FINROBOT_SUMMARY_TURN_BUDGET", "30")),
+}
+# Seconds a tier is skipped after it ran over budget (a 429 uses its retry-after instead)
+SLOW_COOLDOWN = float(os.environ.get("FINROBOT_SLOW_COOLDOWN", "60"))
+DEFAULT_RATE_LIMIT_COOLDOWN = 30.0
+
+# Role for every non-summary turn of the current conversation, set where the caller knows better than the request
+_role_hint = ContextVar("role_hint", default=None)
+
+
+@contextmanager
+def role_hint(role):
+    """Route the turns of the conversation run inside this block as `role` (the summary turn excepted).
+
+    The prefetch path hands the data over in the prompt while the pooled agent still
+    offers its tools, so its turns would otherwise look like tool routing.
+    """
+    token = _role_hint.set(role)
+    try:
+        yield role
+    finally:
+        _role_hint.reset(token)
+
+
+def turn_role(params):
+    """Role of the completion described by `params` (the OpenAI request body)."""
+    messages = params.get("messages") or []
+    if messages and messages[-1].get("role") == "system":
+        # reflection_with_llm appends its summary prompt as a system message
+        return "summary"
+    if _role_hint.get() is not None:
+        return _role_hint.get()
+    offered = {tool.get("function", {}).get("name") for tool in params.get("tools") or []}
+    called = {call.get("function", {}).get("name") for msg in messages for call in msg.get("tool_calls") or []}
+    return "tool" if offered - called else "analysis"
+
+
+class ModelRouter:
+    """Picks the tiers to try for a role, skipping models that recently hit 429 or ran slow."""
+
+    def __init__(self, tiers=None, budgets=None):
+        self.tiers = tiers or MODEL_TIERS
+        self.budgets = budgets or LATENCY_BUDGETS
+        self.cooling = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, role):
+        """[(tier, model)] to try in order; never empty."""
+        tiers = list(enumerate(self.tiers.get(role) or self.tiers["analysis"]))
+        now = time.monotonic()
+        with self._lock:
+            ready = [(tier, model) for tier, model in tiers if self.cooling.get(model, 0) <= now]
+            if ready:
+                return ready
+            # Everything is cooling down: wait on the tier that recovers first
+            return [min(tiers, key=lambda entry: self.cooling.get(entry[1], 0))]
+
+    def budget(self, role):
+        return self.budgets.get(role)
+
+    def cool_down(self, model, seconds):
+        with self._lock:
+            self.cooling[model] = max(self.cooling.get(model, 0), time.monotonic() + seconds)
+
+    def summary(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "tiers": {role: list(models) for role, models in self.tiers.items()},
+                "cooling": {model: round(until - now, 1) for model, until in self.cooling.items() if until > now},
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_router():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModelRouter()
+        return _shared
@@ -0,0 +1,219 @@
+"""Relevance-ranked, deduplicated company news over a persistent local vector index.
+
+Articles from Finnhub are embedded once (sentence-transformers, on CPU, in
+batches) and kept in a chromadb collection under FINROBOT_NEWS_DIR, keyed by
+article ID, so later runs only embed articles they have not seen. A request
+embeds the query, ranks the window's articles by similarity to it, collapses
+near-duplicates (syndicated copies of one story) and hands the agent the top k.
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Annotated
+
+import numpy as np
+import pandas as pd
+
+from tool_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+NEWS_DIR = os.environ.get("FINROBOT_NEWS_DIR", os.path.join(CACHE_DIR, "news_index"))
+EMBEDDING_MODEL = os.environ.get("FINROBOT_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# "0" serves Finnhub's list as is (newest first, exact duplicates dropped)
+NEWS_RANKING = os.environ.get("FINROBOT_NEWS_RANKING", "1") != "0"
+NEWS_TOP_K = int(os.environ.get("FINROBOT_NEWS_TOP_K", "8"))
+# Cosine similarity above which two articles count as the same story
+DUPLICATE_SIMILARITY = float(os.environ.get("FINROBOT_NEWS_DUPLICATE_SIMILARITY", "0.9"))
+EMBED_BATCH = 64
+# Everything Finnhub has for the window; ranking replaces finrobot's random sample
+MAX_FETCHED = 1000
+
+# Seconds ranking is skipped after a transient index error, doubled per consecutive failure
+RETRY_SECONDS = 30
+MAX_RETRY_SECONDS = 15 * 60
+
+DEFAULT_QUERY = "{name} company news that moves the share price: results, guidance, orders, deals, regulation, management"
+
+
+class RankingUnavailable(RuntimeError):
+    pass
+
+
+def article_id(symbol, article):
+    # finrobot drops Finnhub's own ID; the same story for the same ticker always hashes the same
+    key = f"{symbol.upper()}|{article['date']}|{article['headline']}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def article_text(article):
+    return f"{article['headline']}. {article.get('summary') or ''}".strip()
+
+
+def collapse(candidates, embeddings, top_k, threshold=None):
+    """Greedy pass in relevance order keeping articles not too similar to one already kept.
+
+    Returns [(index, duplicates collapsed into it)].
+    """
+    threshold = DUPLICATE_SIMILARITY if threshold is None else threshold
+    kept = []
+    for i in candidates:
+        similar = [k for k, (j, _) in enumerate(kept) if float(embeddings[i] @ embeddings[j]) >= threshold]
+        if similar:
+            j, count = kept[similar[0]]
+            kept[similar[0]] = (j, count + 1)
+        elif len(kept) < top_k:
+            kept.append((i, 0))
+    return kept
+
+
+class NewsIndex:
+    """Persistent chromadb collection of article embeddings, shared by every ticker."""
+
+    def __init__(self, path=None, model_name=None, embed=None):
+        import chromadb
+
+        self.path = path or NEWS_DIR
+        self.model_name = model_name or EMBEDDING_MODEL
+        self.stats = {"embedded": 0, "reused": 0, "collapsed": 0}
+        self._embed = embed
+        self._model = None
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        client = chromadb.PersistentClient(path=self.path)
+        # Embeddings are always supplied, so chromadb's own embedding function is never used
+        self.collection = client.get_or_create_collection("news", metadata={"hnsw:space": "cosine"}, embedding_function=None)
+
+    def embed(self, texts):
+        """Unit-length embeddings, computed on CPU in batches."""
+        if self._embed is not None:
+            return np.asarray(self._embed(texts), dtype=np.float32)
+        if self._model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                self._model = SentenceTransformer(self.model_name, device="cpu")
+            except Exception as e:
+                raise RankingUnavailable(f"embedding model {self.model_name} could not be loaded: {e}") from e
+        return self._model.encode(list(texts), batch_size=EMBED_BATCH, normalize_embeddings=True, convert_to_numpy=True)
+
+    def add(self, symbol, articles):
+        """Index the articles not already in the collection; returns their IDs in order."""
+        ids = [article_id(symbol, a) for a in articles]
+        with self._lock:
+            known = set(self.collection.get(ids=list(dict.fromkeys(ids)), include=[])["ids"]) if ids else set()
+            new = {i: a for i, a in zip(ids, articles) if i not in known}
+            self.stats["reused"] += len(set(ids)) - len(new)
+            for start in range(0, len(new), EMBED_BATCH):
+                batch = list(new.items())[start : start + EMBED_BATCH]
+                self.collection.add(
+                    ids=[i for i, _ in batch],
+                    embeddings=self.embed([article_text(a) for _, a in batch]).tolist(),
+                    documents=[article_text(a) for _, a in batch],
+                    metadatas=[
+                        {"symbol": symbol.upper(), "date": str(a["date"]), "headline": a["headline"], "summary": a.get("summary") or ""}
+                        for _, a in batch
+                    ],
+                )
+                self.stats["embedded"] += len(batch)
+        return ids
+
+    def top(self, ids, query, top_k):
+        """The `top_k` articles among `ids` most relevant to `query`, near-duplicates collapsed, as records."""
+        ids = list(dict.fromkeys(ids))
+        with self._lock:
+            stored = self.collection.get(ids=ids, include=["metadatas", "embeddings"])
+            query_embedding = self.embed([query])[0]
+        if not stored["ids"]:
+            return []
+        metadatas = stored["metadatas"]
+        embeddings = np.asarray(stored["embeddings"], dtype=np.float32)
+        relevance = embeddings @ query_embedding
+        kept = collapse(np.argsort(-relevance), embeddings, top_k)
+        self.stats["collapsed"] += sum(count for _, count in kept)
+        return [
+            {
+                "date": metadatas[i]["date"],
+                "headline": metadatas[i]["headline"],
+                "summary": metadatas[i]["summary"],
+                "relevance": round(float(relevance[i]), 3),
+                "duplicates": count,
+            }
+            for i, count in kept
+        ]
+
+    def summary(self):
+        return {"articles": self.collection.count(), **self.stats}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+# Set once chromadb or the embedding model cannot be loaded; news is then served unranked
+_unavailable = None
+# Consecutive transient failures and the monotonic time until which ranking is skipped
+_retry = {"failures": 0, "until": 0.0}
+
+
+def shared_news_index():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = NewsIndex()
+        return _shared
+
+
+def index_summary():
+    # Without building the index: chromadb is only loaded once news is first requested
+    with _shared_lock:
+        index = _shared
+    return index.summary() if index is not None else None
+
+
+def latest_distinct(records, top_k):
+    seen = set()
+    distinct = []
+    for record in sorted(records, key=lambda r: r["date"], reverse=True):
+        if record["headline"] not in seen:
+            seen.add(record["headline"])
+            distinct.append(record)
+    return distinct[:top_k]
+
+
+def get_company_news(
+    symbol: Annotated[str, "ticker symbol"],
+    start_date: Annotated[str, "start date of the search period for the company's news, yyyy-mm-dd"],
+    end_date: Annotated[str, "end date of the search period for the company's news, yyyy-mm-dd"],
+    max_news_num: Annotated[int, "maximum number of news to return, default to 8"] = NEWS_TOP_K,
+    query: Annotated[str, "what the news should be about, e.g. 'quarterly results and guidance'; default: price-moving company news"] = "",
+) -> pd.DataFrame:
+    """retrieve the market news most relevant to designated company, duplicates collapsed"""
+    global _unavailable
+    from finrobot.data_source import FinnHubUtils
+    from vendor_guard import shared_guard
+
+    news = shared_guard().call("finnhub", FinnHubUtils.get_company_news, symbol, start_date, end_date, max_news_num=MAX_FETCHED)
+    if not isinstance(news, pd.DataFrame) or news.empty:
+        # None or "Failed to ..." reaches the agent as is, and the tool cache does not keep it
+        return news
+    records = news.to_dict("records")
+    if NEWS_RANKING and _unavailable is None and time.monotonic() >= _retry["until"]:
+        try:
+            index = shared_news_index()
+            ids = index.add(symbol, records)
+            query = query or DEFAULT_QUERY.format(name=symbol.split(".")[0].upper())
+            ranked = index.top(ids, query, max_news_num)
+            _retry["failures"] = 0
+            return pd.DataFrame(sorted(ranked, key=lambda r: r["date"]))
+        except (ImportError, RankingUnavailable) as e:
+            # Nothing to retry: chromadb or the embedding model is missing
+            _unavailable = f"{type(e).__name__}: {e}"
+            logger.warning("news ranking disabled: %s", _unavailable)
+        except Exception as e:
+            # e.g. a locked or busy index; served unranked until the backoff has passed
+            _retry["failures"] += 1
+            backoff = min(RETRY_SECONDS * 2 ** (_retry["failures"] - 1), MAX_RETRY_SECONDS)
+            _retry["until"] = time.monotonic() + backoff
+            logger.warning("news ranking failed (%s: %s); retrying in %ds", type(e).__name__, e, backoff)
+    return pd.DataFrame(sorted(latest_distinct(records, max_news_num), key=lambda r: r["date"]))
@@ -0,0 +1,264 @@
+"""Headless off-hours precompute for a universe of tickers.
+
+Warms the tool cache (profile, news, fundamentals, prices, indicators) for
+every ticker in a universe file on a pool of worker processes and, optionally,
+pre-generates forecasts and annual reports into the report store, where the
+app serves them instantly. Progress is checkpointed after every ticker, so
+rerunning the same command resumes where it stopped. Everything is prepared
+for the next trading session: run after the close, tool arguments (e.g. the
+news window) use the next weekday's date, so they match what the app asks
+for that morning.
+
+    python precompute.py nifty50.txt                          # warm data only
+    python precompute.py nifty50.txt --forecasts --reports    # also pre-generate runs
+    python precompute.py nifty50.txt --baseline               # update the baseline model first
+    python precompute.py nifty50.txt --forecasts --hold-hours 16   # keep data and runs until the open
+
+The universe file lists tickers separated by commas or new lines; `#` starts a comment.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from datetime import date, datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from tool_cache import CACHE_DIR
+
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, "precompute")
+STEPS = ("data", "forecast", "report")
+# Local hour from which a run prepares the next session instead of today's (NSE closes at 15:30)
+SESSION_ROLLOVER_HOUR = 16
+
+# Per-process state, built once by init_worker
+_worker = {}
+
+
+def read_universe(path):
+    with open(path) as f:
+        text = "\n".join(line.split("#", 1)[0] for line in f)
+    tickers = []
+    for token in re.split(r"[\s,;]+", text.upper()):
+        if token and token not in tickers:
+            tickers.append(token)
+    return tickers
+
+
+def session_day(now=None):
+    """The trading day a run at `now` prepares for: today until the close, then the next weekday."""
+    now = now or datetime.now()
+    day = now.date()
+    if now.hour >= SESSION_ROLLOVER_HOUR:
+        day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    # Written atomically so an interrupted run never leaves a truncated checkpoint
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+def init_worker(options):
+    load_dotenv()
+    import agents
+    from tool_cache import ToolCache
+    from report_store import ReportStore
+    from rate_limiter import ModelLimiters
+
+    tool_cache = ToolCache(min_ttl=options["min_ttl"])
+    # The scheduler is per process, so each worker gets an equal share of the Groq quota
+    limiters = ModelLimiters(share=options["workers"])
+    llm_config = agents.get_llm_config()
+    _worker.update(
+        options=options,
+        agents=agents,
+        tool_cache=tool_cache,
+        report_store=ReportStore(),
+        forecaster=agents.AgentPool(lambda: agents.build_forecaster(llm_config, tool_cache, limiters)),
+        report_expert=agents.AgentPool(lambda: agents.build_report_expert(llm_config, tool_cache, limiters)),
+    )
+
+
+def chat_records(chat_res):
+    return [{"role": msg.get("role", ""), "content": msg.get("content")} for msg in chat_res.chat_history]
+
+
+def warm_data(ticker, today):
+    import tracing
+
+    data = _worker["agents"].prefetch_forecast_data(ticker, today, _worker["tool_cache"])
+    failed = [name for name, text in data.items() if tracing.is_error_result(text)]
+    if failed:
+        raise RuntimeError(f"{', '.join(failed)} failed")
+
+
+def held_until():
+    # Stored runs stay fresh as long as the warmed data does
+    hold = _worker["options"]["min_ttl"]
+    return time.time() + hold if hold else None
+
+
+def generate_forecast(ticker, today):
+    import tracing
+    import baseline_model
+    from compaction import TokenBudget
+
+    agents = _worker["agents"]
+    budget = TokenBudget()
+    started = time.perf_counter()
+    with tracing.traced_run("forecast", ticker, export=False) as trace:
+        # Served from the just-warmed tool cache and handed over up front, instead of one tool call per turn
+        prefetched = agents.prefetch_forecast_data(ticker, today, _worker["tool_cache"], budget)
+        # Workers never train; the parent's --baseline owns updates to the artifact
+        prior = baseline_model.forecast_prior(ticker, today, learn_missing=False)
+        chat_res = agents.run_forecast(_worker["forecaster"], ticker, today=today, prefetched=prefetched, budget=budget, prior=prior)
+    total = round(time.perf_counter() - started, 1)
+    timing = {
+        "ticker": ticker,
+        "mode": "PRECOMPUTED",
+        "prefetch_s": 0.0,
+        "first_content_s": total,
+        "total_s": total,
+        "llm_turns": agents.count_llm_turns(chat_res.chat_history),
+        "tool_tokens": budget.used,
+        "tool_budget": budget.limit,
+        "tokens_saved": budget.saved,
+    }
+    result = {"ticker": ticker, "summary": chat_res.summary, "chat_history": chat_records(chat_res), "timing": timing, "prior": prior, "trace": trace.to_dict()}
+    _worker["report_store"].save("forecast", ticker, agents.LLM_MODEL, result, day=today, held_until=held_until())
+
+
+def generate_report(ticker):
+    import tracing
+    from compaction import TokenBudget
+
+    agents = _worker["agents"]
+    budget = TokenBudget()
+    started = time.perf_counter()
+    with tracing.traced_run("report", ticker, export=False) as trace:
+        chat_res = agents.run_report(_worker["report_expert"], ticker, _worker["options"]["fyear"], budget=budget)
+    total = time.perf_counter() - started
+    result = {
+        "ticker": ticker,
+        "summary": chat_res.summary,
+        "chat_history": chat_records(chat_res),
+        "first_content_s": total,
+        "total_s": total,
+        "tool_tokens": budget.used,
+        "tool_budget": budget.limit,
+        "tokens_saved": budget.saved,
+        "trace": trace.to_dict(),
+    }
+    _worker["report_store"].save("report", ticker, agents.LLM_MODEL, result, day=_worker["options"]["session"], held_until=held_until())
+
+
+def precompute_ticker(ticker, done):
+    """Run the requested steps not already in `done`; returns {step: "done" | "fresh" | error}."""
+    options = _worker["options"]
+    agents = _worker["agents"]
+    store = _worker["report_store"]
+    today = options["session"]
+    status = {}
+    for step in options["steps"]:
+        if step in done:
+            continue
+        try:
+            if step == "data":
+                warm_data(ticker, today)
+            elif store.fresh(step, ticker, agents.LLM_MODEL):
+                status[step] = "fresh"
+                continue
+            elif step == "forecast":
+                generate_forecast(ticker, today)
+            else:
+                generate_report(ticker)
+            status[step] = "done"
+        except Exception as e:
+            status[step] = f"failed: {e}"
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("universe", help="file of tickers, e.g. the Nifty 50 constituents")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("FINROBOT_PRECOMPUTE_WORKERS", "4")))
+    parser.add_argument("--forecasts", action="store_true", help="also pre-generate forecasts")
+    parser.add_argument("--reports", action="store_true", help="also pre-generate annual reports")
+    parser.add_argument("--baseline", action="store_true", help="update the baseline model with the universe's new sessions before the workers start")
+    parser.add_argument("--fyear", default="2024", help="fiscal year of the annual reports")
+    parser.add_argument("--hold-hours", type=float, default=0, help="keep warmed data and generated runs at least this long, e.g. until the next market open")
+    parser.add_argument("--session", type=date.fromisoformat, help="trading day to prepare, YYYY-MM-DD (default: today until the close, then the next weekday)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: per universe and day under .cache/precompute)")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+    args = parser.parse_args()
+
+    load_dotenv()
+    session = args.session or session_day()
+    tickers = read_universe(args.universe)
+    steps = ["data"] + (["forecast"] if args.forecasts else []) + (["report"] if args.reports else [])
+    name = os.path.splitext(os.path.basename(args.universe))[0]
+    checkpoint_path = args.checkpoint or os.path.join(CHECKPOINT_DIR, f"{name}-{session.isoformat()}.json")
+    checkpoint = {} if args.restart else load_checkpoint(checkpoint_path)
+
+    # Steps that already succeeded (or were fresh) are not run again on resume
+    done = {ticker: [step for step, status in checkpoint.get(ticker, {}).items() if status in ("done", "fresh")] for ticker in tickers}
+    pending = [ticker for ticker in tickers if set(steps) - set(done[ticker])]
+    print(f"{len(tickers)} tickers, {len(tickers) - len(pending)} already complete, steps: {', '.join(steps)}, session: {session}", flush=True)
+
+    if args.baseline:
+        import baseline_model
+
+        # Done once, up front, by this process only: the workers just score the saved model
+        learned = baseline_model.refresh(tickers)
+        if learned is None:
+            print("baseline model: another process is updating it; skipped", flush=True)
+        else:
+            print(f"baseline model: {learned} new sessions learned, {baseline_model.model_summary()}", flush=True)
+
+    options = {"steps": steps, "fyear": args.fyear, "workers": args.workers, "min_ttl": int(args.hold_hours * 3600), "session": session.isoformat()}
+    failures = 0
+    started = time.perf_counter()
+    # spawn: workers open their own SQLite connections and agent pools
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=context, initializer=init_worker, initargs=(options,)) as executor:
+        futures = {executor.submit(precompute_ticker, ticker, done[ticker]): ticker for ticker in pending}
+        for count, future in enumerate(as_completed(futures), 1):
+            ticker = futures[future]
+            try:
+                status = future.result()
+            except Exception as e:
+                status = {step: f"failed: {e}" for step in steps if step not in done[ticker]}
+            checkpoint[ticker] = {**checkpoint.get(ticker, {}), **status}
+            save_checkpoint(checkpoint_path, checkpoint)
+            failed = {step: s for step, s in status.items() if s.startswith("failed")}
+            failures += bool(failed)
+            line = " ".join(f"{step}={s.split(':')[0]}" for step, s in status.items())
+            print(f"[{count}/{len(pending)}] {ticker} {line} ({time.perf_counter() - started:.0f}s)", flush=True)
+            for step, s in failed.items():
+                print(f"    {step}: {s}", flush=True)
+
+    print(f"finished in {time.perf_counter() - started:.0f}s, {failures} tickers with failures; checkpoint: {checkpoint_path}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Local daily OHLCV history per ticker, extended by fetching only what is missing.
+
+Each ticker is one float64 .npy array (day number, Open, High, Low, Close,
+Volume, Dividends, Stock Splits per row) next to a small JSON file recording
+the date range it covers. Reads memory-map the array, so slices and columns
+are views into the page cache rather than copies. A request past the covered
+range fetches just the missing head or tail from yfinance, starting a few
+sessions early: if those overlapping closes moved, or the new rows carry a
+dividend or split, yfinance has re-adjusted the history and the ticker is
+downloaded again in full. A request before the covered start is downloaded in
+full too, so the whole series is always adjusted as of one date. While yfinance is failing or over its budget (see
+vendor_guard.py), whatever the store already holds is served.
+"""
+import os
+import re
+import json
+import time
+import threading
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated
+
+import numpy as np
+import pandas as pd
+
+from tool_cache import CACHE_DIR, TTL_BY_CLASS
+from vendor_guard import shared_guard, VendorUnavailable
+
+PRICE_DIR = os.environ.get("FINROBOT_PRICE_DIR", os.path.join(CACHE_DIR, "prices"))
+COLUMNS = ("Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits")
+# Calendar days re-fetched before the covered end to detect re-adjusted history
+OVERLAP_DAYS = 7
+# Relative change in an overlapping close that counts as a re-adjustment
+ADJUSTMENT_TOLERANCE = 1e-4
+# Today's bar is still moving; a store refreshed this recently is served as is
+REFRESH_SECONDS = TTL_BY_CLASS["prices"]
+FETCH_WORKERS = 8
+
+
+def parse_day(value):
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def to_rows(frame):
+    # yfinance frame -> float64 rows, day number first
+    days = frame.index.tz_localize(None).normalize().values.astype("datetime64[D]").astype(np.int64)
+    values = frame.reindex(columns=list(COLUMNS)).fillna(0.0).to_numpy(dtype=np.float64)
+    return np.column_stack([days.astype(np.float64), values])
+
+
+def file_stem(symbol):
+    return re.sub(r"[^A-Z0-9._-]", "_", symbol.strip().upper())
+
+
+class PriceStore:
+    """Per-ticker memory-mapped price arrays under PRICE_DIR."""
+
+    def __init__(self, path=None):
+        self.path = path or PRICE_DIR
+        self.stats = {"served": 0, "fetched": 0, "rebuilt": 0, "rows_fetched": 0, "stale": 0}
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _paths(self, symbol):
+        stem = os.path.join(self.path, file_stem(symbol))
+        return f"{stem}.npy", f"{stem}.json"
+
+    def _symbol_lock(self, symbol):
+        with self._lock:
+            return self._locks.setdefault(file_stem(symbol), threading.Lock())
+
+    def _read(self, symbol):
+        data_path, meta_path = self._paths(symbol)
+        # Meta first: the array is replaced before it, so it always covers at least what meta says
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            rows = np.load(data_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            return None, None
+        return meta, rows
+
+    def _write(self, symbol, meta, rows):
+        data_path, meta_path = self._paths(symbol)
+        # Replaced atomically; readers holding the old map keep a consistent copy
+        with open(f"{data_path}.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(rows))
+        os.replace(f"{data_path}.tmp", data_path)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+
+    def _fetch(self, symbol, start, end):
+        from finrobot.data_source import YFinanceUtils
+
+        frame = shared_guard().call("yfinance", YFinanceUtils.get_stock_data, symbol, start.isoformat(), end.isoformat())
+        self.stats["fetched"] += 1
+        if frame is None or frame.empty:
+            return None, np.empty((0, len(COLUMNS) + 1))
+        self.stats["rows_fetched"] += len(frame)
+        return str(frame.index.tz or "UTC"), to_rows(frame)
+
+    def _stale(self, meta, start, end):
+        if start < parse_day(meta["start"]):
+            return True
+        covered = parse_day(meta["end"])
+        if end <= covered:
+            return False
+        # Past the final bars: only today's bar is outstanding and it was fetched recently
+        fetched = datetime.fromtimestamp(meta["fetched"]).date()
+        return not (covered >= fetched and end <= fetched + timedelta(days=1) and time.time() - meta["fetched"] < REFRESH_SECONDS)
+
+    def ensure(self, symbol, start, end):
+        """Make [start, end) available locally; returns (meta, rows) or (None, None) if there is no data."""
+        start, end = parse_day(start), parse_day(end)
+        meta, rows = self._read(symbol)
+        if meta is not None and not self._stale(meta, start, end):
+            self.stats["served"] += 1
+            return meta, rows
+        with self._symbol_lock(symbol):
+            meta, rows = self._read(symbol)
+            if meta is not None and not self._stale(meta, start, end):
+                self.stats["served"] += 1
+                return meta, rows
+            try:
+                return self._extend(symbol, meta, rows, start, end)
+            except VendorUnavailable:
+                if meta is None:
+                    raise
+                # yfinance is down or slow: what the store already has beats no prices at all
+                self.stats["stale"] += 1
+                return meta, rows
+
+    def _extend(self, symbol, meta, rows, start, end):
+        today = date.today()
+        if meta is None:
+            return self._rebuild(symbol, start, end, today)
+        covered_start, covered_end = parse_day(meta["start"]), parse_day(meta["end"])
+        rows = np.asarray(rows)
+        if start < covered_start:
+            # Earlier history comes back adjusted as of today, and stored rows may have been adjusted before a
+            # later dividend or split; nothing overlaps to tell, so the whole range is fetched again
+            self.stats["rebuilt"] += 1
+            return self._rebuild(symbol, start, max(end, covered_end), today)
+        if end > covered_end:
+            tail_start = covered_end - timedelta(days=OVERLAP_DAYS)
+            _, tail = self._fetch(symbol, tail_start, end)
+            # Only final bars are compared; a stored bar of the fetch day was still moving
+            final = np.datetime64(covered_end, "D").astype(np.int64)
+            overlap = np.intersect1d(rows[rows[:, 0] < final, 0], tail[:, 0])
+            old = rows[np.isin(rows[:, 0], overlap), 4]
+            new = tail[np.isin(tail[:, 0], overlap), 4]
+            added = tail[tail[:, 0] >= final]
+            if not np.allclose(old, new, rtol=ADJUSTMENT_TOLERANCE) or added[:, 6:].any():
+                # A dividend or split re-adjusted every earlier price
+                self.stats["rebuilt"] += 1
+                return self._rebuild(symbol, min(start, covered_start), max(end, covered_end), today)
+            rows = np.concatenate([rows[rows[:, 0] < tail[0, 0]], tail]) if len(tail) else rows
+            covered_end = end
+        meta = {**meta, "start": covered_start.isoformat(), "end": min(covered_end, today).isoformat(), "fetched": time.time()}
+        self._write(symbol, meta, rows)
+        return self._read(symbol)
+
+    def _rebuild(self, symbol, start, end, today):
+        tz, rows = self._fetch(symbol, start, end)
+        if tz is None:
+            return None, None
+        # Bars up to yesterday are final; today's is re-fetched once REFRESH_SECONDS have passed
+        meta = {"start": start.isoformat(), "end": min(end, today).isoformat(), "fetched": time.time(), "tz": tz}
+        self._write(symbol, meta, rows)
+        return self._read(symbol)
+
+    @staticmethod
+    def _slice(rows, start, end):
+        if rows is None:
+            return np.empty(0, dtype="datetime64[D]"), np.empty((0, len(COLUMNS)))
+        days = rows[:, 0]
+        lo, hi = np.searchsorted(days, [np.datetime64(parse_day(d), "D").astype(np.int64) for d in (start, end)])
+        return days[lo:hi].astype(np.int64).astype("datetime64[D]"), rows[lo:hi, 1:]
+
+    def arrays(self, symbol, start, end):
+        """(days, values) for [start, end); values (in COLUMNS order) are a view of the memory map."""
+        _, rows = self.ensure(symbol, start, end)
+        return self._slice(rows, start, end)
+
+    def frame(self, symbol, start, end):
+        """The same DataFrame YFinanceUtils.get_stock_data returns, served from the store."""
+        meta, rows = self.ensure(symbol, start, end)
+        days, values = self._slice(rows, start, end)
+        index = pd.DatetimeIndex(days.astype("datetime64[ns]"), name="Date")
+        if meta is not None:
+            index = index.tz_localize(meta["tz"])
+        frame = pd.DataFrame(values, index=index, columns=list(COLUMNS), copy=False)
+        return frame.astype({"Volume": np.int64})
+
+    def panel(self, symbols, start, end, fields=("Close", "High", "Low")):
+        """{field: DataFrame date x ticker} for many tickers; missing ranges are fetched concurrently."""
+        symbols = list(symbols)
+        with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(symbols) or 1)) as executor:
+            loaded = dict(zip(symbols, executor.map(lambda s: self.arrays(s, start, end), symbols)))
+        positions = [COLUMNS.index(field) for field in fields]
+        panel = {}
+        for field, position in zip(fields, positions):
+            # Each column is a strided view of its ticker's map until pandas aligns the dates
+            series = {s: pd.Series(values[:, position], index=pd.DatetimeIndex(days.astype("datetime64[ns]"))) for s, (days, values) in loaded.items()}
+            panel[field] = pd.DataFrame(series)
+        return panel
+
+    def summary(self):
+        files = [name for name in os.listdir(self.path) if name.endswith(".npy")]
+        size = sum(os.path.getsize(os.path.join(self.path, name)) for name in files)
+        return {"tickers": len(files), "bytes": size, **self.stats}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_prices():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PriceStore()
+        return _shared
+
+
+def get_stock_data(
+    symbol: Annotated[str, "ticker symbol"],
+    start_date: Annotated[str, "start date for retrieving stock price data, YYYY-mm-dd"],
+    end_date: Annotated[str, "end date for retrieving stock price data, YYYY-mm-dd"],
+) -> pd.DataFrame:
+    """retrieve stock price data for designated ticker symbol"""
+    return shared_prices().frame(symbol, start_date, end_date)
@@ -0,0 +1,228 @@
+import os
+import re
+import json
+import time
+import heapq
+import itertools
+import threading
+
+# Groq free tier for llama-3.1-8b-instant; override per account
+GROQ_LIMITS = {
+    "requests_per_minute": int(os.environ.get("GROQ_RPM", "30")),
+    "tokens_per_minute": int(os.environ.get("GROQ_TPM", "6000")),
+    "requests_per_day": int(os.environ.get("GROQ_RPD", "14400")),
+}
+# Groq meters each model separately; free-tier quotas of the routed tiers, override with GROQ_MODEL_LIMITS (JSON)
+MODEL_LIMITS = {
+    "llama-3.1-8b-instant": GROQ_LIMITS,
+    "llama-3.3-70b-versatile": {"requests_per_minute": 30, "tokens_per_minute": 12000, "requests_per_day": 1000},
+    **json.loads(os.environ.get("GROQ_MODEL_LIMITS") or "{}"),
+}
+
+# Lower number is served first
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+_local = threading.local()
+
+
+def current_priority():
+    return getattr(_local, "priority", "interactive")
+
+
+def set_priority(priority):
+    # Priority applies to every completion made from this thread afterwards
+    _local.priority = priority
+
+
+def parse_duration(value):
+    # Groq reset headers look like "7.66s", "2m59.56s" or "120ms"
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    return sum(float(n) * units[u] for n, u in parts) if parts else None
+
+
+def estimate_tokens(params):
+    # Rough prompt size (~4 chars/token) plus room for the reply
+    prompt = json.dumps(params.get("messages", []), default=str) + json.dumps(params.get("tools", []), default=str)
+    return len(prompt) // 4 + params.get("max_tokens", 512)
+
+
+class TokenBucket:
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.level = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Process-wide scheduler for Groq completions.
+
+    Requests queue by priority, then arrival, and are released only when the
+    request, token and daily buckets all have room. Rate-limit headers from
+    Groq resync the buckets, and a 429 pauses everyone until its retry-after.
+    """
+
+    def __init__(self, limits=None):
+        limits = limits or GROQ_LIMITS
+        self.limits = dict(limits)
+        self.buckets = {
+            "requests": TokenBucket(limits["requests_per_minute"], 60),
+            "tokens": TokenBucket(limits["tokens_per_minute"], 60),
+            "daily": TokenBucket(limits["requests_per_day"], 24 * 3600),
+        }
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self.waits = {name: {"requests": 0, "total_wait": 0.0, "max_wait": 0.0} for name in PRIORITIES}
+        self._queue = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def _wait_time(self, tokens, now):
+        for bucket in self.buckets.values():
+            bucket.refill(now)
+        return max(
+            self.paused_until - now,
+            self.buckets["requests"].wait_time(1),
+            self.buckets["daily"].wait_time(1),
+            self.buckets["tokens"].wait_time(tokens),
+        )
+
+    def acquire(self, tokens, priority=None):
+        priority = priority or current_priority()
+        ticket = (PRIORITIES.get(priority, 0), next(self._counter))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._queue, ticket)
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(tokens, now)
+                if self._queue[0] == ticket and wait <= 0:
+                    break
+                self._cond.wait(timeout=min(max(wait, 0.05), 1.0))
+            heapq.heappop(self._queue)
+            self.buckets["requests"].take(1)
+            self.buckets["daily"].take(1)
+            self.buckets["tokens"].take(tokens)
+            waited = time.monotonic() - started
+            stats = self.waits.setdefault(priority, {"requests": 0, "total_wait": 0.0, "max_wait": 0.0})
+            stats["requests"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+            self._cond.notify_all()
+        return waited
+
+    def settle(self, estimated, actual):
+        # Give back (or charge) the difference once real usage is known
+        if actual is None:
+            return
+        with self._cond:
+            bucket = self.buckets["tokens"]
+            bucket.level = min(bucket.capacity, bucket.level + estimated - actual)
+            self._cond.notify_all()
+
+    def update_from_headers(self, headers):
+        now = time.monotonic()
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        with self._cond:
+            if remaining_tokens is not None:
+                bucket = self.buckets["tokens"]
+                bucket.refill(now)
+                bucket.level = min(bucket.level, float(remaining_tokens))
+                if float(remaining_tokens) <= 0:
+                    reset = parse_duration(headers.get("x-ratelimit-reset-tokens"))
+                    if reset:
+                        self.paused_until = max(self.paused_until, now + reset)
+            if remaining_requests is not None:
+                # Groq reports the daily request allowance here
+                bucket = self.buckets["daily"]
+                bucket.refill(now)
+                bucket.level = min(bucket.level, float(remaining_requests))
+            self._cond.notify_all()
+
+    def on_rate_limited(self, headers, attempt):
+        retry_after = parse_duration(headers.get("retry-after")) if headers else None
+        backoff = retry_after if retry_after else min(60.0, 2.0 ** attempt)
+        with self._cond:
+            self.rate_limited += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + backoff)
+            self._cond.notify_all()
+        return backoff
+
+    def summary(self):
+        with self._cond:
+            now = time.monotonic()
+            for bucket in self.buckets.values():
+                bucket.refill(now)
+            return {
+                "queued": len(self._queue),
+                "rate_limited": self.rate_limited,
+                "paused_for": max(0.0, self.paused_until - now),
+                "tokens_available": int(self.buckets["tokens"].level),
+                "requests_available": int(self.buckets["requests"].level),
+                "daily_available": int(self.buckets["daily"].level),
+                "waits": {
+                    name: {**s, "avg_wait": s["total_wait"] / s["requests"] if s["requests"] else 0.0}
+                    for name, s in self.waits.items()
+                },
+            }
+
+
+class ModelLimiters:
+    """One RateLimiter per model, so a fallback tier waits on its own quota, not the primary's.
+
+    Models missing from `limits` get `default` (GROQ_LIMITS). Every quota is divided
+    by `share`, e.g. between worker processes that each run their own scheduler.
+    """
+
+    def __init__(self, limits=None, default=None, share=1):
+        self.limits = MODEL_LIMITS if limits is None else limits
+        self.default = default or GROQ_LIMITS
+        self.share = share
+        self.limiters = {}
+        self._lock = threading.Lock()
+        for model in self.limits:
+            self.for_model(model)
+
+    def for_model(self, model):
+        with self._lock:
+            if model not in self.limiters:
+                limits = self.limits.get(model, self.default)
+                self.limiters[model] = RateLimiter({name: max(1, limit // self.share) for name, limit in limits.items()})
+            return self.limiters[model]
+
+    def summary(self):
+        with self._lock:
+            limiters = dict(self.limiters)
+        return {model: limiter.summary() for model, limiter in limiters.items()}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_limiter():
+    # One scheduler per model per process, shared by every Streamlit session and worker thread
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = ModelLimiters()
+        return _shared
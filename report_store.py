@@ -0,0 +1,146 @@
+import os
+import time
+import json
+import sqlite3
+import threading
+from datetime import date
+
+from tool_cache import CACHE_DIR
+
+# How long a stored run is served instead of running the agents again (seconds)
+FRESHNESS_BY_FLOW = {
+    "forecast": int(os.environ.get("FINROBOT_FORECAST_FRESHNESS", str(6 * 3600))),
+    "report": int(os.environ.get("FINROBOT_REPORT_FRESHNESS", str(7 * 24 * 3600))),
+}
+DEFAULT_FRESHNESS = 3600
+
+# Columns returned by listings; the full result is only loaded by get()
+LISTING = ("id", "flow", "ticker", "date", "model", "created", "summary")
+
+
+def report_content(result):
+    # Text indexed for search: the summary plus every message of the conversation
+    messages = [str(msg.get("content") or "") for msg in result.get("chat_history") or []]
+    return "\n".join([str(result.get("summary") or ""), *messages])
+
+
+def match_query(text):
+    # Each word is quoted so tickers like TCS.NS are not read as FTS5 syntax
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class ReportStore:
+    """SQLite store of completed runs, one per (flow, ticker, date, model), with an FTS5 index."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "reports.sqlite")
+        self.stats = {"served": 0, "saved": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "id INTEGER PRIMARY KEY, flow TEXT, ticker TEXT, date TEXT, model TEXT, "
+            "created REAL, summary TEXT, content TEXT, result TEXT, held_until REAL, "
+            "UNIQUE (flow, ticker, date, model));"
+            "CREATE INDEX IF NOT EXISTS reports_created ON reports (created);"
+            "CREATE INDEX IF NOT EXISTS reports_lookup ON reports (flow, ticker, model, created);"
+            # External-content index kept in step with the table by triggers
+            "CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5("
+            "ticker, summary, content, content='reports', content_rowid='id');"
+            "CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN "
+            "INSERT INTO reports_fts (rowid, ticker, summary, content) VALUES (new.id, new.ticker, new.summary, new.content); END;"
+            "CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN "
+            "INSERT INTO reports_fts (reports_fts, rowid, ticker, summary, content) VALUES ('delete', old.id, old.ticker, old.summary, old.content); END;"
+            "CREATE TRIGGER IF NOT EXISTS reports_au AFTER UPDATE ON reports BEGIN "
+            "INSERT INTO reports_fts (reports_fts, rowid, ticker, summary, content) VALUES ('delete', old.id, old.ticker, old.summary, old.content); "
+            "INSERT INTO reports_fts (rowid, ticker, summary, content) VALUES (new.id, new.ticker, new.summary, new.content); END;"
+        )
+        # Stores created before held_until existed
+        if "held_until" not in {row[1] for row in self._conn.execute("PRAGMA table_info(reports)")}:
+            self._conn.execute("ALTER TABLE reports ADD COLUMN held_until REAL")
+        self._conn.commit()
+
+    def save(self, flow, ticker, model, result, day=None, held_until=None):
+        """Store a finished run; a later run of the same key on the same day replaces it.
+
+        A run saved with `held_until` (a timestamp) stays fresh until then even past its flow's window.
+        """
+        day = day or date.today().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO reports (flow, ticker, date, model, created, summary, content, result, held_until) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (flow, ticker, date, model) DO UPDATE SET "
+                "created = excluded.created, summary = excluded.summary, content = excluded.content, "
+                "result = excluded.result, held_until = excluded.held_until",
+                (flow, ticker.upper(), day, model, time.time(), str(result.get("summary") or ""), report_content(result), json.dumps(result, default=str), held_until),
+            )
+            self._conn.commit()
+            self.stats["saved"] += 1
+
+    def fresh(self, flow, ticker, model, max_age=None):
+        """Newest stored run of this key within the freshness window (or held past it), or None."""
+        max_age = FRESHNESS_BY_FLOW.get(flow, DEFAULT_FRESHNESS) if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM reports WHERE flow = ? AND ticker = ? AND model = ? AND (created >= ? OR held_until >= ?) "
+                "ORDER BY created DESC LIMIT 1",
+                (flow, ticker.upper(), model, now - max_age, now),
+            ).fetchone()
+        if row is None:
+            return None
+        self.stats["served"] += 1
+        return self.get(row[0])
+
+    def get(self, report_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(LISTING)}, result FROM reports WHERE id = ?", (report_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        report = dict(zip(LISTING, row))
+        report["result"] = json.loads(row[-1])
+        return report
+
+    def recent(self, limit=50, flow=None, ticker=None):
+        clauses, args = [], []
+        if flow:
+            clauses.append("flow = ?")
+            args.append(flow)
+        if ticker:
+            clauses.append("ticker = ?")
+            args.append(ticker.upper())
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(LISTING)} FROM reports{where} ORDER BY created DESC LIMIT ?", (*args, limit)
+            ).fetchall()
+        return [dict(zip(LISTING, row)) for row in rows]
+
+    def search(self, text, limit=50, flow=None):
+        """Best full-text matches for `text`, with a highlighted snippet of the matching content."""
+        query = match_query(text)
+        if not query:
+            return self.recent(limit, flow)
+        columns = ", ".join(f"r.{name}" for name in LISTING)
+        sql = (
+            f"SELECT {columns}, snippet(reports_fts, -1, '**', '**', ' … ', 16) FROM reports_fts "
+            "JOIN reports r ON r.id = reports_fts.rowid WHERE reports_fts MATCH ?"
+        )
+        args = [query]
+        if flow:
+            sql += " AND r.flow = ?"
+            args.append(flow)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY rank LIMIT ?", (*args, limit)).fetchall()
+        return [{**dict(zip(LISTING, row)), "snippet": row[-1]} for row in rows]
+
+    def summary(self):
+        with self._lock:
+            count, tickers = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT ticker) FROM reports").fetchone()
+        return {"reports": count, "tickers": tickers, **self.stats}
@@ -0,0 +1,332 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from textwrap import dedent
+from typing import Annotated
+
+logger = logging.getLogger(__name__)
+
+# SEC/FMP 10-K filings do not exist for NSE/BSE listings
+SEC_UNAVAILABLE_SUFFIXES = (".NS", ".BO")
+BUNDLE_TTL = int(os.environ.get("FINROBOT_STATEMENT_TTL", str(30 * 60)))
+NEGATIVE_TTL = 6 * 3600
+MAX_BUNDLES = 32
+
+STATEMENT_SOURCES = ("income_stmt", "balance_sheet", "cash_flow")
+SEC_SOURCES = ("sec_report", "section_1", "section_7")
+SECTION_SOURCES = ("section_1", "section_7")
+
+
+def normalize_ticker(ticker):
+    return str(ticker).strip().upper()
+
+
+def sec_unavailable_reason(ticker):
+    if ticker.endswith(SEC_UNAVAILABLE_SUFFIXES):
+        return f"SEC 10-K filings are not available for {ticker} (NSE/BSE listing); use the financial statements instead."
+    return None
+
+
+def is_failure(value):
+    # FMP answers "Failed to retrieve data: ..." or a link to None; SECUtils returns None without an API key
+    if value is None:
+        return True
+    if isinstance(value, str) and (value.startswith("Failed to") or value.startswith("Link: None")):
+        return True
+    return False
+
+
+class StatementBundle:
+    """Statements and filing sections for one (ticker, fiscal year).
+
+    Every source is fetched at most once, all of them concurrently as soon as
+    the first report tool asks for anything.
+    """
+
+    def __init__(self, store, ticker, fyear):
+        self.store = store
+        self.ticker = ticker
+        self.fyear = str(fyear)
+        self.created = time.monotonic()
+        self._futures = {}
+        # Reentrant: a section chained on an already finished report is started while it is held
+        self._lock = threading.RLock()
+
+    @property
+    def expired(self):
+        return time.monotonic() - self.created > BUNDLE_TTL
+
+    def load(self):
+        for source in STATEMENT_SOURCES + SEC_SOURCES:
+            self._future(source)
+        return self
+
+    def _future(self, source):
+        with self._lock:
+            future = self._futures.get(source)
+            if future is None and source in SECTION_SOURCES:
+                # Started once the report link is known; a pool task waiting on it could fill the pool with waiters
+                future = self._futures[source] = Future()
+                self._future("sec_report").add_done_callback(lambda report: self._fetch_section(source, report, future))
+            elif future is None:
+                future = self._futures[source] = self.store.executor.submit(self._fetch, source)
+            return future
+
+    def _fetch_section(self, source, report, future):
+        try:
+            filing = report.result()
+        except Exception as e:
+            # Neither the failed report nor this answer is pinned to the bundle; the next call retries both
+            with self._lock:
+                for name, pinned in (("sec_report", report), (source, future)):
+                    if self._futures.get(name) is pinned:
+                        del self._futures[name]
+            future.set_result(f"sec_report failed for {self.ticker} {self.fyear}: {e}")
+            return
+        fetched = self.store.executor.submit(self._fetch, source, filing)
+        fetched.add_done_callback(lambda done: future.set_exception(done.exception()) if done.exception() else future.set_result(done.result()))
+
+    def get(self, source):
+        try:
+            return self._future(source).result()
+        except Exception:
+            # Do not pin a transient error to the bundle; the next call retries
+            with self._lock:
+                self._futures.pop(source, None)
+            raise
+
+    def _fetch(self, source, report=None):
+        from finrobot.data_source import YFinanceUtils, FMPUtils, SECUtils
+        from vendor_guard import shared_guard
+
+        unavailable = self.store.unavailable(self.ticker, source)
+        if unavailable:
+            return unavailable
+        if source in SEC_SOURCES:
+            reason = sec_unavailable_reason(self.ticker)
+            if reason:
+                self.store.mark_unavailable(self.ticker, source, reason)
+                return reason
+
+        self.store.count_fetch(source)
+        guard = shared_guard()
+        if source == "income_stmt":
+            return guard.call("yfinance", YFinanceUtils.get_income_stmt, self.ticker)
+        if source == "balance_sheet":
+            return guard.call("yfinance", YFinanceUtils.get_balance_sheet, self.ticker)
+        if source == "cash_flow":
+            return guard.call("yfinance", YFinanceUtils.get_cash_flow, self.ticker)
+        if source == "sec_report":
+            value = guard.call("fmp", FMPUtils.get_sec_report, self.ticker, self.fyear)
+        else:
+            if not report.startswith("Link: "):
+                return report
+            link = report.split("\n")[0][len("Link: "):].strip()
+            value = guard.call("sec", SECUtils.get_10k_section, self.ticker, self.fyear, source.split("_")[1], report_address=link)
+        if is_failure(value):
+            reason = f"{source} is not available for {self.ticker} {self.fyear}: {value}"
+            self.store.mark_unavailable(self.ticker, source, reason)
+            return reason
+        return value
+
+
+class StatementStore:
+    """Process-wide bundles, kept for BUNDLE_TTL, plus the negative cache of unavailable sources."""
+
+    def __init__(self, max_bundles=MAX_BUNDLES):
+        self.max_bundles = max_bundles
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="statements")
+        self.fetches = {}
+        self.negative_hits = 0
+        self._bundles = OrderedDict()
+        self._unavailable = {}
+        self._lock = threading.Lock()
+
+    def bundle(self, ticker, fyear, load=True):
+        key = (normalize_ticker(ticker), str(fyear))
+        with self._lock:
+            bundle = self._bundles.get(key)
+            if bundle is None or bundle.expired:
+                bundle = StatementBundle(self, *key)
+                self._bundles[key] = bundle
+                created = True
+            else:
+                created = False
+            self._bundles.move_to_end(key)
+            while len(self._bundles) > self.max_bundles:
+                self._bundles.popitem(last=False)
+        return bundle.load() if created and load else bundle
+
+    def count_fetch(self, source):
+        with self._lock:
+            self.fetches[source] = self.fetches.get(source, 0) + 1
+
+    def unavailable(self, ticker, source):
+        with self._lock:
+            entry = self._unavailable.get((ticker, source))
+            if entry is None:
+                return None
+            reason, expires = entry
+            if time.monotonic() > expires:
+                del self._unavailable[(ticker, source)]
+                return None
+            self.negative_hits += 1
+            return reason
+
+    def mark_unavailable(self, ticker, source, reason):
+        with self._lock:
+            self._unavailable[(ticker, source)] = (reason, time.monotonic() + NEGATIVE_TTL)
+        logger.info("negative-cached %s for %s", source, ticker)
+
+    def clear(self):
+        with self._lock:
+            self._bundles.clear()
+            self._unavailable.clear()
+            self.fetches.clear()
+            self.negative_hits = 0
+
+    def summary(self):
+        with self._lock:
+            return {
+                "bundles": len(self._bundles),
+                "fetches": dict(self.fetches),
+                "unavailable": len(self._unavailable),
+                "negative_hits": self.negative_hits,
+            }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_statements():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = StatementStore()
+        return _shared
+
+
+# --- Report tools ---
+# finrobot's ReportAnalysisUtils fetches every statement and filing section itself; these
+# build the same prompts (instructions as in finrobot.functional.analyzer) from the bundle.
+INCOME_STMT_INSTRUCTION = dedent(
+    """
+    Conduct a comprehensive analysis of the company's income statement for the current fiscal year.
+    Start with an overall revenue record, including Year-over-Year or Quarter-over-Quarter comparisons,
+    and break down revenue sources to identify primary contributors and trends. Examine the Cost of
+    Goods Sold for potential cost control issues. Review profit margins such as gross, operating,
+    and net profit margins to evaluate cost efficiency, operational effectiveness, and overall profitability.
+    Analyze Earnings Per Share to understand investor perspectives. Compare these metrics with historical
+    data and industry or competitor benchmarks to identify growth patterns, profitability trends, and
+    operational challenges. The output should be a strategic overview of the company’s financial health
+    in a single paragraph, less than 130 words, summarizing the previous analysis into 4-5 key points under
+    respective subheadings with specific discussion and strong data support.
+    """
+)
+
+BALANCE_SHEET_INSTRUCTION = dedent(
+    """
+    Delve into a detailed scrutiny of the company's balance sheet for the most recent fiscal year, pinpointing
+    the structure of assets, liabilities, and shareholders' equity to decode the firm's financial stability and
+    operational efficiency. Focus on evaluating the liquidity through current assets versus current liabilities,
+    the solvency via long-term debt ratios, and the equity position to gauge long-term investment potential.
+    Contrast these metrics with previous years' data to highlight financial trends, improvements, or deteriorations.
+    Finalize with a strategic assessment of the company's financial leverage, asset management, and capital structure,
+    providing insights into its fiscal health and future prospects in a single paragraph. Less than 130 words.
+    """
+)
+
+CASH_FLOW_INSTRUCTION = dedent(
+    """
+    Dive into a comprehensive evaluation of the company's cash flow for the latest fiscal year, focusing on cash inflows
+    and outflows across operating, investing, and financing activities. Examine the operational cash flow to assess the
+    core business profitability, scrutinize investing activities for insights into capital expenditures and investments,
+    and review financing activities to understand debt, equity movements, and dividend policies. Compare these cash movements
+    to prior periods to discern trends, sustainability, and liquidity risks. Conclude with an informed analysis of the company's
+    cash management effectiveness, liquidity position, and potential for future growth or financial challenges in a single paragraph.
+    Less than 130 words.
+    """
+)
+
+BUSINESS_HIGHLIGHTS_INSTRUCTION = dedent(
+    """
+    According to the given information, describe the performance highlights per business of the company.
+    Each business description should contain one sentence of a summarization and one sentence of explanation.
+    Less than 130 words.
+    """
+)
+
+
+def _table(title, value):
+    # A source that could not be fetched is a reason string, not a DataFrame
+    return f"{title}:\n" + (value.to_string().strip() if hasattr(value, "to_string") else str(value))
+
+
+def _save_prompt(instruction, section_text, table, save_path):
+    from finrobot.functional.analyzer import combine_prompt, save_to_file
+
+    save_to_file(combine_prompt(instruction, section_text, table), save_path)
+    return f"instruction & resources saved to {save_path}"
+
+
+def analyze_income_stmt(
+    ticker_symbol: Annotated[str, "ticker symbol"],
+    fyear: Annotated[str, "fiscal year of the 10-K report"],
+    save_path: Annotated[str, "txt file path, to which the returned instruction & resources are written."],
+) -> str:
+    """Retrieve the income statement with the related 10-K section and an instruction on how to analyze it."""
+    bundle = shared_statements().bundle(ticker_symbol, fyear)
+    table = _table("Income statement", bundle.get("income_stmt"))
+    return _save_prompt(INCOME_STMT_INSTRUCTION, bundle.get("section_7"), table, save_path)
+
+
+def analyze_balance_sheet(
+    ticker_symbol: Annotated[str, "ticker symbol"],
+    fyear: Annotated[str, "fiscal year of the 10-K report"],
+    save_path: Annotated[str, "txt file path, to which the returned instruction & resources are written."],
+) -> str:
+    """Retrieve the balance sheet with the related 10-K section and an instruction on how to analyze it."""
+    bundle = shared_statements().bundle(ticker_symbol, fyear)
+    table = _table("Balance sheet", bundle.get("balance_sheet"))
+    return _save_prompt(BALANCE_SHEET_INSTRUCTION, bundle.get("section_7"), table, save_path)
+
+
+def analyze_cash_flow(
+    ticker_symbol: Annotated[str, "ticker symbol"],
+    fyear: Annotated[str, "fiscal year of the 10-K report"],
+    save_path: Annotated[str, "txt file path, to which the returned instruction & resources are written."],
+) -> str:
+    """Retrieve the cash flow statement with the related 10-K section and an instruction on how to analyze it."""
+    bundle = shared_statements().bundle(ticker_symbol, fyear)
+    table = _table("Cash flow statement", bundle.get("cash_flow"))
+    return _save_prompt(CASH_FLOW_INSTRUCTION, bundle.get("section_7"), table, save_path)
+
+
+def analyze_business_highlights(
+    ticker_symbol: Annotated[str, "ticker symbol"],
+    fyear: Annotated[str, "fiscal year of the 10-K report"],
+    save_path: Annotated[str, "txt file path, to which the returned instruction & resources are written."],
+) -> str:
+    """Retrieve the business summary and MD&A sections with an instruction on how to describe the business highlights."""
+    bundle = shared_statements().bundle(ticker_symbol, fyear)
+    section_text = (
+        "Business summary:\n"
+        + bundle.get("section_1")
+        + "\n\n"
+        + "Management's Discussion and Analysis of Financial Condition and Results of Operations:\n"
+        + bundle.get("section_7")
+    )
+    return _save_prompt(BUSINESS_HIGHLIGHTS_INSTRUCTION, section_text, "", save_path)
+
+
+def get_sec_report(
+    ticker_symbol: Annotated[str, "ticker symbol"],
+    fyear: Annotated[str, "year of the 10-K report, should be 'yyyy' or 'latest'. Default to 'latest'"] = "latest",
+) -> str:
+    """Get the url and filing date of the 10-K report for a given stock and year"""
+    # Only the link is needed here; the statements load when an analyze_* tool asks for them
+    return shared_statements().bundle(ticker_symbol, fyear, load=False).get("sec_report")
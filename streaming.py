@@ -0,0 +1,76 @@
+import re
+import time
+import threading
+from contextlib import contextmanager
+
+# OpenAIClient wraps streamed completion tokens in these terminal colour codes
+COMPLETION_START = "\033[32m"
+COMPLETION_END = "\033[0m"
+ANSI_ESCAPE = re.compile(r"\033\[[0-9;]*m")
+
+_local = threading.local()
+
+
+class RunStream:
+    """Event feed for one chat running on a worker thread.
+
+    Messages arrive through the agents' process_message_before_send hook and
+    completion tokens through autogen's IOStream, which this class implements.
+    Events are appended to `log`, which pages poll and can replay in full
+    when they reattach to a running job.
+    """
+
+    def __init__(self):
+        self.log = []
+        self.started = time.perf_counter()
+        self.first_content_s = None
+        self.messages = 0
+        self._in_completion = False
+
+    def emit(self, kind, **data):
+        elapsed = time.perf_counter() - self.started
+        # The proxy's opening prompt is not content; anything after it is
+        if self.first_content_s is None and (kind == "token" or (kind == "message" and self.messages > 0)):
+            self.first_content_s = elapsed
+        if kind == "message":
+            self.messages += 1
+        self.log.append({"kind": kind, "elapsed": elapsed, **data})
+
+    # autogen IOStream protocol
+    def print(self, *objects, sep=" ", end="\n", flush=False):
+        text = sep.join(str(o) for o in objects) + end
+        if COMPLETION_START in text:
+            self._in_completion = True
+        ended = COMPLETION_END in text
+        if self._in_completion:
+            text = ANSI_ESCAPE.sub("", text)
+            if text and not ended:
+                self.emit("token", text=text)
+        if ended and self._in_completion:
+            self._in_completion = False
+            self.emit("completion_end")
+
+    def input(self, prompt="", *, password=False):
+        return ""
+
+
+def forward_message(sender, message, recipient, silent):
+    # Registered on every agent; only reports while a streamed run is active on this thread
+    stream = getattr(_local, "stream", None)
+    if stream is not None:
+        stream.emit("message", sender=sender.name, message=message if isinstance(message, dict) else {"content": message})
+    return message
+
+
+@contextmanager
+def attached(stream):
+    """Report messages and completion tokens produced on this thread into `stream`."""
+    from autogen.io import IOStream
+
+    _local.stream = stream
+    try:
+        with IOStream.set_default(stream):
+            yield stream
+    finally:
+        _local.stream = None
+
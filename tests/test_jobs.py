@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jobs import FINISHED, JobRunner, JobStore, run_key  # noqa: E402
+
+
+def wait_finished(runner, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = runner.get(job_id)
+        if job["status"] in FINISHED:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class BlockedRun:
+    """A job body that runs until released, counting how often it was started."""
+
+    def __init__(self, result):
+        self.result = result
+        self.runs = 0
+        self.released = threading.Event()
+
+    def __call__(self, stream):
+        self.runs += 1
+        self.released.wait(5)
+        return self.result
+
+
+def test_requests_with_the_key_of_a_running_job_join_it(tmp_path):
+    runner = JobRunner(JobStore(str(tmp_path / "jobs.sqlite")), workers=2)
+    run = BlockedRun({"summary": "up 1%"})
+    key = run_key("forecast", "TCS.NS", "llama", prefetch=True, llm_cache="record")
+    first = runner.submit("forecast", "TCS.NS", {}, run, key=key)
+    second = runner.submit("forecast", "TCS.NS", {}, run, key=run_key("forecast", " tcs.ns", "llama", llm_cache="record", prefetch=True))
+    assert second == first
+    run.released.set()
+    assert wait_finished(runner, first)["result"] == {"summary": "up 1%"}
+    assert run.runs == 1
+    assert runner.summary()["coalesced"] == 1
+
+
+def test_finished_job_releases_its_key(tmp_path):
+    runner = JobRunner(JobStore(str(tmp_path / "jobs.sqlite")), workers=2)
+    run = BlockedRun("done")
+    run.released.set()
+    key = run_key("forecast", "TCS.NS", "llama")
+    first = runner.submit("forecast", "TCS.NS", {}, run, key=key)
+    wait_finished(runner, first)
+    second = runner.submit("forecast", "TCS.NS", {}, run, key=key)
+    assert second != first
+    wait_finished(runner, second)
+    assert run.runs == 2
+
+
+def test_requests_with_different_settings_do_not_join(tmp_path):
+    runner = JobRunner(JobStore(str(tmp_path / "jobs.sqlite")), workers=2)
+    run = BlockedRun("done")
+    record = runner.submit("forecast", "TCS.NS", {}, run, key=run_key("forecast", "TCS.NS", "llama", prefetch=False, llm_cache="record"))
+    replay = runner.submit("forecast", "TCS.NS", {}, run, key=run_key("forecast", "TCS.NS", "llama", prefetch=False, llm_cache="replay"))
+    prefetch = runner.submit("forecast", "TCS.NS", {}, run, key=run_key("forecast", "TCS.NS", "llama", prefetch=True, llm_cache="record"))
+    assert len({record, replay, prefetch}) == 3
+    run.released.set()
+    for job_id in (record, replay, prefetch):
+        wait_finished(runner, job_id)
+
+
+def test_failed_run_is_stored_and_releases_its_key(tmp_path):
+    runner = JobRunner(JobStore(str(tmp_path / "jobs.sqlite")), workers=1)
+
+    def broken(stream):
+        raise RuntimeError("vendor down")
+
+    key = run_key("report", "TCS.NS", "llama")
+    job = wait_finished(runner, runner.submit("report", "TCS.NS", {}, broken, key=key))
+    assert job["status"] == "failed" and job["error"] == "vendor down"
+    assert key not in runner.inflight
+
+
+def test_store_marks_jobs_left_queued_or_running_as_failed_on_start(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = JobStore(path)
+    queued = store.create("forecast", "TCS.NS", {"ticker": "TCS.NS"})
+    running = store.create("report", "INFY.NS", {})
+    store.update(running, status="running", started=time.time())
+    done = store.create("forecast", "WIPRO.NS", {})
+    store.update(done, status="done", result={"summary": "down 2%"}, finished=time.time())
+
+    # A new process opens the same table
+    restarted = JobStore(path)
+    for job_id in (queued, running):
+        job = restarted.get(job_id)
+        assert job["status"] == "failed"
+        assert job["error"] == "interrupted by a server restart"
+        assert job["finished"] is not None
+    assert restarted.get(done)["status"] == "done"
+    assert restarted.get(done)["result"] == {"summary": "down 2%"}
+    assert restarted.counts() == {"queued": 0, "running": 0, "done": 1, "failed": 2}
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+from openai.types.chat import ChatCompletion
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_cache import TieredLLMCache  # noqa: E402
+from agents import RateLimitedGroqClient, forecast_prompt_with_data  # noqa: E402
+from model_router import ModelRouter, role_hint, turn_role  # noqa: E402
+from rate_limiter import ModelLimiters  # noqa: E402
+
+TOOLS = [{"type": "function", "function": {"name": name}} for name in ("get_company_profile", "get_company_news")]
+
+
+def tool_call(name):
+    return {"id": f"call_{name}", "type": "function", "function": {"name": name, "arguments": "{}"}}
+
+
+def test_turn_with_uncalled_tools_is_tool_routing():
+    params = {"messages": [{"role": "user", "content": "Use all tools"}], "tools": TOOLS}
+    assert turn_role(params) == "tool"
+
+
+def test_turn_after_every_tool_is_analysis():
+    messages = [
+        {"role": "user", "content": "Use all tools"},
+        {"role": "assistant", "content": None, "tool_calls": [tool_call("get_company_profile"), tool_call("get_company_news")]},
+        {"role": "tool", "content": "..."},
+    ]
+    assert turn_role({"messages": messages, "tools": TOOLS}) == "analysis"
+
+
+def test_prefetched_turn_is_analysis_although_tools_are_offered():
+    # The request the pooled analyst sends on the prefetch path: data in the prompt, tools still offered, none called
+    prompt = forecast_prompt_with_data("TCS.NS", "2024-06-28", {"get_company_profile": "profile"})
+    params = {"messages": [{"role": "system", "content": "You are an analyst."}, {"role": "user", "content": prompt}], "tools": TOOLS}
+    assert turn_role(params) == "tool"
+    with role_hint("analysis"):
+        assert turn_role(params) == "analysis"
+    assert turn_role(params) == "tool"
+
+
+def test_summary_turn_wins_over_the_hint():
+    params = {"messages": [{"role": "user", "content": "data"}, {"role": "system", "content": "Summarize"}], "tools": TOOLS}
+    with role_hint("analysis"):
+        assert turn_role(params) == "summary"
+
+
+def test_request_without_tools_is_analysis():
+    assert turn_role({"messages": [{"role": "user", "content": "data"}]}) == "analysis"
+
+
+LIMITS = {"requests_per_minute": 30, "tokens_per_minute": 6000, "requests_per_day": 1000}
+
+
+class StubGroq:
+    """Stands in for the openai client: 429 for the models in `limited`, a short reply otherwise."""
+
+    def __init__(self, limited=()):
+        self.limited = set(limited)
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(with_raw_response=SimpleNamespace(create=self.create)))
+
+    def create(self, model, **params):
+        self.calls.append(model)
+        if model in self.limited:
+            response = httpx.Response(429, headers={"retry-after": "30"}, request=httpx.Request("POST", "http://groq.test"))
+            raise openai.RateLimitError("rate limited", response=response, body=None)
+        completion = ChatCompletion(
+            id="1",
+            object="chat.completion",
+            created=0,
+            model=model,
+            choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+            usage={"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        )
+        return SimpleNamespace(headers={"x-ratelimit-remaining-tokens": "100", "x-ratelimit-remaining-requests": "50"}, parse=lambda: completion)
+
+
+def groq_client(stub, limiters, router):
+    client = RateLimitedGroqClient({"api_key": "test", "base_url": "http://groq.test"}, limiters=limiters, router=router)
+    client._oai_client = stub
+    return client
+
+
+def test_fallback_tier_does_not_wait_on_the_exhausted_primary_quota():
+    limiters = ModelLimiters({"primary": LIMITS, "fallback": LIMITS})
+    router = ModelRouter(tiers={"analysis": ["primary", "fallback"]})
+    # The primary just answered 429: its scheduler is paused and the router skips it
+    limiters.for_model("primary").on_rate_limited({"retry-after": "30"}, 0)
+    router.cool_down("primary", 30)
+    stub = StubGroq()
+    started = time.perf_counter()
+    response = groq_client(stub, limiters, router).create({"model": "primary", "messages": [{"role": "user", "content": "data"}]})
+    assert time.perf_counter() - started < 1
+    assert response.model == "fallback" and stub.calls == ["fallback"]
+
+
+def test_fallback_tier_is_charged_and_resynced_on_its_own_quota():
+    limiters = ModelLimiters({"primary": LIMITS, "fallback": LIMITS})
+    router = ModelRouter(tiers={"analysis": ["primary", "fallback"]})
+    stub = StubGroq(limited={"primary"})
+    response = groq_client(stub, limiters, router).create({"model": "primary", "messages": [{"role": "user", "content": "data"}]})
+    assert response.model == "fallback" and stub.calls == ["primary", "fallback"]
+    primary, fallback = limiters.for_model("primary").summary(), limiters.for_model("fallback").summary()
+    assert fallback["tokens_available"] <= 100 and fallback["daily_available"] <= 50
+    assert primary["tokens_available"] > 100 and primary["daily_available"] > 50
+
+
+def test_only_replies_from_the_configured_model_are_cached(tmp_path):
+    cache = TieredLLMCache(path=str(tmp_path))
+    router = ModelRouter(tiers={"analysis": ["primary", "fallback"]})
+    params = {"model": "primary", "messages": [{"role": "user", "content": "data"}]}
+    primary = groq_client(StubGroq(), ModelLimiters({"primary": LIMITS, "fallback": LIMITS}), router).create(params)
+    fallback = groq_client(StubGroq(limited={"primary"}), ModelLimiters({"primary": LIMITS, "fallback": LIMITS}), router).create(params)
+    cache.set("primary reply", primary)
+    cache.set("fallback reply", fallback)
+    assert cache.get("primary reply").model == "primary"
+    assert cache.get("fallback reply") is None
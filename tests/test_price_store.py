@@ -0,0 +1,131 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vendor_guard  # noqa: E402
+from price_store import PriceStore  # noqa: E402
+
+
+class StandInYahoo:
+    """yfinance's get_stock_data over a fixed series; `adjust` re-adjusts every bar before `adjusted_before`."""
+
+    def __init__(self):
+        self.index = pd.bdate_range("2023-01-02", "2024-06-28", tz="Asia/Kolkata", name="Date")
+        self.close = 100 + np.arange(len(self.index), dtype=np.float64)
+        self.dividends = np.zeros(len(self.index))
+        self.requests = []
+        self.error = None
+
+    def adjust(self, factor, adjusted_before):
+        self.close[self.index.tz_localize(None) < pd.Timestamp(adjusted_before)] *= factor
+
+    def get_stock_data(self, symbol, start_date, end_date, save_path=None):
+        self.requests.append((start_date, end_date))
+        if self.error:
+            raise ConnectionError(self.error)
+        return self.history(start_date, end_date)
+
+    def history(self, start_date, end_date):
+        frame = pd.DataFrame(
+            {
+                "Open": self.close,
+                "High": self.close * 1.01,
+                "Low": self.close * 0.99,
+                "Close": self.close,
+                "Volume": 1000,
+                "Dividends": self.dividends,
+                "Stock Splits": 0.0,
+            },
+            index=self.index,
+        )
+        days = self.index.tz_localize(None)
+        return frame[(days >= pd.Timestamp(start_date)) & (days < pd.Timestamp(end_date))]
+
+
+@pytest.fixture
+def yahoo(monkeypatch):
+    from finrobot.data_source import YFinanceUtils
+
+    stand_in = StandInYahoo()
+    monkeypatch.setattr(YFinanceUtils, "get_stock_data", staticmethod(stand_in.get_stock_data))
+    # Fresh breakers, so one test's vendor errors do not fail the next fast
+    monkeypatch.setattr(vendor_guard, "_shared", vendor_guard.VendorGuard())
+    return stand_in
+
+
+def closes(store, start, end):
+    return store.frame("TCS.NS", start, end)["Close"]
+
+
+def test_range_already_covered_is_served_without_a_fetch(yahoo, tmp_path):
+    store = PriceStore(str(tmp_path))
+    first = closes(store, "2024-01-01", "2024-03-01")
+    assert closes(store, "2024-01-15", "2024-02-15").equals(first["2024-01-15":"2024-02-14"])
+    assert len(yahoo.requests) == 1
+    assert store.stats["served"] == 1
+
+
+def test_tail_is_extended_from_the_overlap_only(yahoo, tmp_path):
+    store = PriceStore(str(tmp_path))
+    closes(store, "2024-01-01", "2024-03-01")
+    extended = closes(store, "2024-01-01", "2024-04-01")
+    # Re-fetched from a few sessions before the covered end, not from the start
+    assert yahoo.requests[1] == ("2024-02-23", "2024-04-01")
+    assert store.stats["rebuilt"] == 0
+    assert np.allclose(extended.to_numpy(), yahoo.history("2024-01-01", "2024-04-01")["Close"].to_numpy())
+
+
+def test_moved_overlap_rebuilds_the_whole_range(yahoo, tmp_path):
+    store = PriceStore(str(tmp_path))
+    closes(store, "2024-01-01", "2024-03-01")
+    # A dividend after the stored range re-adjusted every earlier close
+    yahoo.adjust(0.98, "2024-03-10")
+    extended = closes(store, "2024-01-01", "2024-04-01")
+    assert store.stats["rebuilt"] == 1
+    assert yahoo.requests[-1] == ("2024-01-01", "2024-04-01")
+    assert np.allclose(extended.to_numpy(), yahoo.history("2024-01-01", "2024-04-01")["Close"].to_numpy())
+
+
+def test_dividend_in_the_new_bars_rebuilds_the_whole_range(yahoo, tmp_path):
+    store = PriceStore(str(tmp_path))
+    closes(store, "2024-01-01", "2024-03-01")
+    yahoo.dividends[yahoo.index.tz_localize(None) == pd.Timestamp("2024-03-15")] = 12.0
+    closes(store, "2024-01-01", "2024-04-01")
+    assert store.stats["rebuilt"] == 1
+    assert yahoo.requests[-1] == ("2024-01-01", "2024-04-01")
+
+
+def test_request_before_the_stored_start_rebuilds_from_there(yahoo, tmp_path):
+    store = PriceStore(str(tmp_path))
+    closes(store, "2024-01-01", "2024-03-01")
+    # Stored rows were adjusted before a later dividend; the earlier history comes back adjusted as of now
+    yahoo.adjust(0.98, "2024-06-01")
+    extended = closes(store, "2023-06-01", "2024-02-01")
+    assert store.stats["rebuilt"] == 1
+    # One fetch for the union of both ranges, so the whole series is adjusted as of one date
+    assert yahoo.requests[-1] == ("2023-06-01", "2024-03-01")
+    assert np.allclose(extended.to_numpy(), yahoo.history("2023-06-01", "2024-02-01")["Close"].to_numpy())
+    # The rest of the earlier stored range is served, re-adjusted, without another fetch
+    stored = closes(store, "2024-02-01", "2024-03-01")
+    assert np.allclose(stored.to_numpy(), yahoo.history("2024-02-01", "2024-03-01")["Close"].to_numpy())
+    assert len(yahoo.requests) == 2
+
+
+def test_vendor_error_during_a_refresh_serves_the_stored_history(yahoo, tmp_path):
+    store = PriceStore(str(tmp_path))
+    stored = closes(store, "2024-01-01", "2024-03-01")
+    yahoo.error = "Connection reset by peer"
+    served = closes(store, "2024-01-01", "2024-04-01")
+    assert served.equals(stored)
+    assert store.stats["stale"] == 1
+
+
+def test_vendor_error_without_stored_history_is_raised(yahoo, tmp_path):
+    yahoo.error = "Connection reset by peer"
+    with pytest.raises(vendor_guard.VendorUnavailable, match="Connection reset by peer"):
+        closes(PriceStore(str(tmp_path)), "2024-01-01", "2024-03-01")
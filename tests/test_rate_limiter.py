@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rate_limiter import RateLimiter  # noqa: E402
+
+
+def limiter(requests_per_minute=600, tokens_per_minute=6000):
+    return RateLimiter({"requests_per_minute": requests_per_minute, "tokens_per_minute": tokens_per_minute, "requests_per_day": 10**6})
+
+
+def test_interactive_request_is_served_before_an_earlier_batch_request():
+    scheduler = limiter(requests_per_minute=600)
+    # No request left: the next one frees up in 0.1s
+    scheduler.buckets["requests"].level = 0
+    served = []
+
+    def request(priority):
+        scheduler.acquire(10, priority=priority)
+        served.append(priority)
+
+    batch = threading.Thread(target=request, args=("batch",))
+    batch.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=request, args=("interactive",))
+    interactive.start()
+    batch.join(5)
+    interactive.join(5)
+    assert served == ["interactive", "batch"]
+    waits = scheduler.summary()["waits"]
+    assert waits["batch"]["max_wait"] > waits["interactive"]["max_wait"]
+
+
+def test_requests_of_one_priority_are_served_in_arrival_order():
+    scheduler = limiter(requests_per_minute=1200)
+    scheduler.buckets["requests"].level = 0
+    served = []
+
+    def request(n):
+        scheduler.acquire(10, priority="batch")
+        served.append(n)
+
+    threads = []
+    for n in range(3):
+        threads.append(threading.Thread(target=request, args=(n,)))
+        threads[-1].start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(5)
+    assert served == [0, 1, 2]
+
+
+def test_settle_gives_back_an_overestimate():
+    scheduler = limiter(tokens_per_minute=6000)
+    scheduler.acquire(1000)
+    assert 5000 <= scheduler.summary()["tokens_available"] < 5010
+    # The completion used 400 tokens, not the 1000 reserved
+    scheduler.settle(1000, 400)
+    assert 5600 <= scheduler.summary()["tokens_available"] < 5610
+
+
+def test_settle_charges_an_underestimate():
+    scheduler = limiter(tokens_per_minute=6000)
+    scheduler.acquire(400)
+    scheduler.settle(400, 1000)
+    assert 5000 <= scheduler.summary()["tokens_available"] < 5010
+
+
+def test_settle_without_usage_keeps_the_estimate():
+    scheduler = limiter(tokens_per_minute=6000)
+    scheduler.acquire(1000)
+    scheduler.settle(1000, None)
+    assert 5000 <= scheduler.summary()["tokens_available"] < 5010
@@ -0,0 +1,66 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_store import ReportStore  # noqa: E402
+
+RESULT = {"summary": "TCS.NS: up 1.5% next week", "chat_history": [{"role": "user", "content": "Use all tools"}]}
+
+
+def store_with_run(tmp_path, age, held_until=None):
+    store = ReportStore(str(tmp_path / "reports.sqlite"))
+    store.save("forecast", "tcs.ns", "llama", RESULT, day="2024-06-28", held_until=held_until)
+    # Backdate the run as if it had been saved `age` seconds ago
+    with store._lock:
+        store._conn.execute("UPDATE reports SET created = created - ?", (age,))
+        store._conn.commit()
+    return store
+
+
+def test_recent_run_is_fresh(tmp_path):
+    store = store_with_run(tmp_path, age=60)
+    stored = store.fresh("forecast", "TCS.NS", "llama", max_age=3600)
+    assert stored["result"] == RESULT
+    assert stored["ticker"] == "TCS.NS"
+    assert store.stats["served"] == 1
+
+
+def test_run_past_its_window_is_not_fresh(tmp_path):
+    store = store_with_run(tmp_path, age=7200)
+    assert store.fresh("forecast", "TCS.NS", "llama", max_age=3600) is None
+
+
+def test_held_run_is_fresh_past_its_window(tmp_path):
+    # Precomputed overnight with --hold-hours: served all session although it is older than the window
+    store = store_with_run(tmp_path, age=7200, held_until=time.time() + 3600)
+    assert store.fresh("forecast", "TCS.NS", "llama", max_age=3600)["result"] == RESULT
+
+
+def test_expired_hold_is_not_fresh(tmp_path):
+    store = store_with_run(tmp_path, age=7200, held_until=time.time() - 60)
+    assert store.fresh("forecast", "TCS.NS", "llama", max_age=3600) is None
+
+
+def test_held_run_is_only_served_for_its_key(tmp_path):
+    store = store_with_run(tmp_path, age=7200, held_until=time.time() + 3600)
+    assert store.fresh("report", "TCS.NS", "llama", max_age=3600) is None
+    assert store.fresh("forecast", "TCS.NS", "other-model", max_age=3600) is None
+    assert store.fresh("forecast", "INFY.NS", "llama", max_age=3600) is None
+
+
+def test_store_without_held_until_is_migrated(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "reports.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE reports (id INTEGER PRIMARY KEY, flow TEXT, ticker TEXT, date TEXT, model TEXT, "
+        "created REAL, summary TEXT, content TEXT, result TEXT, UNIQUE (flow, ticker, date, model))"
+    )
+    conn.commit()
+    conn.close()
+    store = ReportStore(path)
+    store.save("forecast", "TCS.NS", "llama", RESULT, held_until=time.time() + 3600)
+    assert store.fresh("forecast", "TCS.NS", "llama", max_age=0)["result"] == RESULT
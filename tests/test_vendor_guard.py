@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vendor_guard import CircuitBreaker, VendorGuard, VendorUnavailable  # noqa: E402
+
+
+class StandIn:
+    """Local stand-in for a vendor call: answers, raises, or hangs until released."""
+
+    def __init__(self, answer="ok", error=None, hang=False):
+        self.answer = answer
+        self.error = error
+        self.calls = 0
+        self.released = threading.Event()
+        if not hang:
+            self.released.set()
+
+    def __call__(self, *args):
+        self.calls += 1
+        self.released.wait(5)
+        if self.error:
+            raise ConnectionError(self.error)
+        return self.answer
+
+
+def guard(hedge_after=0.1, budget=0.5, threshold=2, open_seconds=0.2):
+    guard = VendorGuard(budgets={"primary": budget, "alternate": budget}, hedge_after=hedge_after)
+    guard.breakers = {source: CircuitBreaker(source, threshold, open_seconds) for source in guard.budgets}
+    return guard
+
+
+def test_breaker_opens_after_consecutive_failures_and_fails_fast():
+    vendor = guard()
+    failing = StandIn(error="503 Service Unavailable")
+    for _ in range(2):
+        with pytest.raises(VendorUnavailable, match="503"):
+            vendor.call("primary", failing)
+    assert vendor.breakers["primary"].state == "open"
+    with pytest.raises(VendorUnavailable, match="skipped for the next"):
+        vendor.call("primary", failing)
+    assert failing.calls == 2
+    assert vendor.breakers["primary"].stats["rejected"] == 1
+
+
+def test_half_open_breaker_lets_one_probe_through():
+    vendor = guard()
+    failing = StandIn(error="503 Service Unavailable")
+    for _ in range(2):
+        with pytest.raises(VendorUnavailable):
+            vendor.call("primary", failing)
+    time.sleep(0.25)
+    probe = StandIn(hang=True)
+    prober = threading.Thread(target=vendor.call, args=("primary", probe))
+    prober.start()
+    while not probe.calls:
+        time.sleep(0.01)
+    # Everything but the probe keeps failing fast while it runs
+    assert vendor.breakers["primary"].state == "half-open"
+    with pytest.raises(VendorUnavailable, match="probe"):
+        vendor.call("primary", StandIn())
+    probe.released.set()
+    prober.join()
+    assert vendor.breakers["primary"].state == "closed"
+    assert vendor.call("primary", StandIn("back")) == "back"
+
+
+def test_failed_probe_keeps_the_breaker_open():
+    vendor = guard()
+    failing = StandIn(error="503 Service Unavailable")
+    for _ in range(3):
+        time.sleep(0.25)
+        with pytest.raises(VendorUnavailable):
+            vendor.call("primary", failing)
+    assert vendor.breakers["primary"].state == "open"
+    assert vendor.breakers["primary"].stats["opened"] == 1
+
+
+def test_slow_call_is_given_up_at_its_budget():
+    vendor = guard(budget=0.2)
+    hung = StandIn(hang=True)
+    started = time.perf_counter()
+    with pytest.raises(VendorUnavailable, match="did not answer within"):
+        vendor.call("primary", hung)
+    assert time.perf_counter() - started < 0.5
+    assert vendor.breakers["primary"].stats["timeouts"] == 1
+    hung.released.set()
+
+
+def test_hedge_starts_the_alternate_after_hedge_after_and_the_first_answer_wins():
+    vendor = guard(hedge_after=0.1)
+    slow = StandIn("primary answer", hang=True)
+    started = time.perf_counter()
+    result = vendor.hedged(("primary", slow, ()), ("alternate", StandIn("alternate answer"), ()))
+    elapsed = time.perf_counter() - started
+    assert result == "alternate answer"
+    assert 0.1 <= elapsed < 0.4
+    assert vendor.stats == {"hedged": 1, "fallbacks": 0, "alternate_wins": 1}
+    slow.released.set()
+
+
+def test_hedge_loser_is_discarded_but_still_counts_against_its_breaker():
+    vendor = guard(hedge_after=0.05, budget=0.2)
+    slow = StandIn("late answer", hang=True)
+    assert vendor.hedged(("primary", slow, ()), ("alternate", StandIn("alternate answer"), ())) == "alternate answer"
+    # Nobody waits on the abandoned primary, but running past its budget is still a timeout
+    time.sleep(0.3)
+    assert vendor.breakers["primary"].stats["timeouts"] == 1
+    slow.released.set()
+    time.sleep(0.05)
+    assert vendor.breakers["primary"].stats["timeouts"] == 1
+
+
+def test_fast_primary_does_not_start_the_alternate():
+    vendor = guard(hedge_after=0.2)
+    alternate = StandIn("alternate answer")
+    assert vendor.hedged(("primary", StandIn("primary answer"), ()), ("alternate", alternate, ())) == "primary answer"
+    assert alternate.calls == 0
+    assert vendor.stats["hedged"] == 0
+
+
+def test_failing_primary_falls_back_without_waiting_for_the_hedge():
+    vendor = guard(hedge_after=5)
+    started = time.perf_counter()
+    result = vendor.hedged(("primary", StandIn(error="503"), ()), ("alternate", StandIn("alternate answer"), ()))
+    assert result == "alternate answer"
+    assert time.perf_counter() - started < 1
+    assert vendor.stats["fallbacks"] == 1
+
+
+def test_unusable_answers_from_both_sources_raise():
+    vendor = guard()
+    with pytest.raises(VendorUnavailable, match="No source answered"):
+        vendor.hedged(("primary", StandIn(None), ()), ("alternate", StandIn("Failed to retrieve data: 404"), ()))
@@ -0,0 +1,175 @@
+import os
+import time
+import json
+import pickle
+import sqlite3
+import hashlib
+import inspect
+import threading
+from functools import wraps
+
+CACHE_DIR = os.environ.get("FINROBOT_CACHE_DIR", ".cache")
+
+# How long each class of vendor data stays fresh (seconds)
+TTL_BY_CLASS = {
+    "profile": 3 * 24 * 3600,
+    "fundamentals": 12 * 3600,
+    "filings": 7 * 24 * 3600,
+    "prices": 15 * 60,
+    "news": 10 * 60,
+}
+DEFAULT_TTL = 10 * 60
+
+# Registered tool name -> data class
+TOOL_DATA_CLASS = {
+    "get_company_profile": "profile",
+    "get_company_news": "news",
+    "get_financial_basics": "fundamentals",
+    "get_stock_data": "prices",
+    "get_technical_indicators": "prices",
+    "get_sec_report": "filings",
+}
+
+
+def is_cacheable(result):
+    # finrobot utils return None on missing keys and "Failed to ..." strings on vendor errors
+    if result is None:
+        return False
+    if isinstance(result, str) and result.startswith("Failed to"):
+        return False
+    return True
+
+
+def normalize_arguments(func, args, kwargs):
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+    except TypeError:
+        arguments = {"args": list(args), **kwargs}
+    for name, value in arguments.items():
+        if isinstance(value, str):
+            value = value.strip()
+            if name in ("symbol", "ticker_symbol"):
+                value = value.upper()
+            arguments[name] = value
+    return arguments
+
+
+class ToolCache:
+    """SQLite-backed TTL cache for vendor tool results, evicted LRU by total size."""
+
+    def __init__(self, path=None, max_bytes=None, min_ttl=0):
+        self.path = path or os.path.join(CACHE_DIR, "tool_cache.sqlite")
+        self.max_bytes = max_bytes or int(os.environ.get("FINROBOT_TOOL_CACHE_MB", "256")) * 1024 * 1024
+        # Off-hours warming keeps entries until the next session even for fast-moving classes
+        self.min_ttl = min_ttl
+        self.stats = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, tool TEXT, value BLOB, size INTEGER, "
+            "created REAL, expires REAL, accessed REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+
+    def make_key(self, tool, arguments):
+        payload = json.dumps(arguments, sort_keys=True, default=str)
+        return hashlib.sha256(f"{tool}:{payload}".encode()).hexdigest()
+
+    def _count(self, tool, field):
+        counts = self.stats.setdefault(tool, {"hits": 0, "misses": 0})
+        counts[field] += 1
+
+    def get(self, tool, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] < now:
+                self._count(tool, "misses")
+                return False, None
+            self._conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(tool, "hits")
+        return True, pickle.loads(row[0])
+
+    def set(self, tool, key, value, ttl):
+        blob = pickle.dumps(value)
+        now = time.time()
+        ttl = max(ttl, self.min_ttl)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, tool, blob, len(blob), now, now + ttl, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM entries WHERE expires < ?", (time.time(),))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until we are back under the limit
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM entries ORDER BY accessed ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def summary(self):
+        hits = sum(s["hits"] for s in self.stats.values())
+        misses = sum(s["misses"] for s in self.stats.values())
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "per_tool": self.stats,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+        self.stats = {}
+
+    def wrap(self, func, tool, ttl):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = self.make_key(tool, normalize_arguments(func, args, kwargs))
+            hit, value = self.get(tool, key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            if is_cacheable(value):
+                self.set(tool, key, value, ttl)
+            return value
+
+        return wrapper
+
+
+def cached_tools(tools, cache):
+    """Return a copy of a register_toolkits config with vendor tools served through the cache."""
+    wrapped = []
+    for tool in tools:
+        data_class = TOOL_DATA_CLASS.get(tool["name"])
+        if data_class is None:
+            wrapped.append(tool)
+            continue
+        ttl = TTL_BY_CLASS.get(data_class, DEFAULT_TTL)
+        wrapped.append({**tool, "function": cache.wrap(tool["function"], tool["name"], ttl)})
+    return wrapped
@@ -0,0 +1,90 @@
+import os
+import time
+import inspect
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import tracing
+from compaction import current_budget, charged_to
+
+# Seconds a single tool call may take before the turn moves on without it
+TOOL_TIMEOUT = float(os.environ.get("FINROBOT_TOOL_TIMEOUT", "60"))
+# Shared by every agent in the process; timed-out calls keep their thread until they return
+TOOL_WORKERS = int(os.environ.get("FINROBOT_TOOL_WORKERS", "16"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def shared_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+        return _executor
+
+
+def carried(func):
+    """Bind `func` to the caller's token budget, trace and autogen IOStream, to run on another thread."""
+    budget = current_budget()
+    trace = tracing.current()
+    # IOStream.get_default() reads a ContextVar; each call gets its own copy of the context
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        with charged_to(budget), tracing.using(trace):
+            return context.run(func, *args, **kwargs)
+
+    return run
+
+
+def parallel_tool_calls_reply(recipient, messages=None, sender=None, config=None):
+    """Reply function running all tool calls of one assistant message concurrently.
+
+    Responses keep the order of the calls, so the result is the same as autogen's
+    sequential generate_tool_calls_reply; a call still running `config["timeout"]`
+    seconds after the turn started is answered with an error instead of holding it up.
+    """
+    if messages is None:
+        messages = recipient._oai_messages[sender]
+    calls = messages[-1].get("tool_calls") or []
+    functions = [recipient._function_map.get(call.get("function", {}).get("name")) for call in calls]
+    if not calls or any(inspect.iscoroutinefunction(func) for func in functions):
+        # Nothing to do here, or async tools: leave the message to autogen's own replies
+        return False, None
+    timeout = (config or {}).get("timeout") or TOOL_TIMEOUT
+
+    executor = shared_executor()
+    deadline = time.monotonic() + timeout
+    futures = [executor.submit(carried(recipient.execute_function), call.get("function", {})) for call in calls]
+    tool_returns = []
+    for call, future in zip(calls, futures):
+        name = call.get("function", {}).get("name", "")
+        try:
+            # All calls started together, so the turn takes as long as its slowest call
+            _, func_return = future.result(timeout=max(deadline - time.monotonic(), 0))
+            content = func_return.get("content") or ""
+        except TimeoutError:
+            content = f"Error: {name} timed out after {timeout:g}s"
+        response = {"role": "tool", "content": content}
+        if call.get("id") is not None:
+            response["tool_call_id"] = call["id"]
+        tool_returns.append(response)
+    return True, {
+        "role": "tool",
+        "tool_responses": tool_returns,
+        "content": "\n\n".join(recipient._str_for_tool_response(response) for response in tool_returns),
+    }
+
+
+def register_parallel_tool_calls(agent, timeout=None):
+    """Make `agent` execute the tool calls it receives concurrently."""
+    from autogen import Agent, ConversableAgent
+
+    # Inserted just ahead of autogen's sequential tool reply, so termination checks still run first
+    position = next(
+        (i for i, entry in enumerate(agent._reply_func_list) if entry["reply_func"] is ConversableAgent.generate_tool_calls_reply),
+        0,
+    )
+    agent.register_reply([Agent, None], parallel_tool_calls_reply, position=position, config={"timeout": timeout})
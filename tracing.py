@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import uuid
+import logging
+import tempfile
+import threading
+from functools import wraps
+from collections import deque
+from contextlib import contextmanager
+
+from tool_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+METRICS_DIR = os.environ.get("FINROBOT_METRICS_DIR", os.path.join(CACHE_DIR, "metrics"))
+# Latency samples kept per series for the quantiles
+SAMPLES = 1000
+
+_local = threading.local()
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = q * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def prometheus_labels(**labels):
+    # Label values are quoted strings: backslash, quote and newline must be escaped
+    escaped = {k: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for k, v in labels.items()}
+    return ",".join(f'{k}="{v}"' for k, v in escaped.items())
+
+
+def result_size(result):
+    # DataFrames are measured as the text the agent would see
+    return len(result.to_string() if hasattr(result, "to_string") else str(result))
+
+
+def is_error_result(result):
+    # finrobot tools report vendor failures as text rather than raising
+    return isinstance(result, str) and result.startswith(("Failed to", "Error"))
+
+
+class Trace:
+    """Timed tool and LLM calls of one run, in start order."""
+
+    def __init__(self, flow="", label=""):
+        self.id = uuid.uuid4().hex[:12]
+        self.flow = flow
+        self.label = label
+        self.started = time.perf_counter()
+        self.finished = None
+        self.wall_started = time.time()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start"])
+        return {
+            "id": self.id,
+            "flow": self.flow,
+            "label": self.label,
+            "started": self.wall_started,
+            "total_s": round((self.finished or time.perf_counter()) - self.started, 3),
+            "spans": spans,
+        }
+
+
+class Metrics:
+    """Process-wide aggregates per (kind, name) series, plus registered cache stats."""
+
+    def __init__(self):
+        self.series = {}
+        self.runs = {}
+        self.coalesced = {}
+        self.routes = {}
+        self.caches = {}
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+
+    def record(self, span, flow=""):
+        key = (span["kind"], span["name"])
+        with self._lock:
+            if "role" in span:
+                self._record_route(span, flow)
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {
+                    "latencies": deque(maxlen=SAMPLES),
+                    "count": 0,
+                    "errors": 0,
+                    "seconds": 0.0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                }
+            series["latencies"].append(span["duration"])
+            series["count"] += 1
+            series["errors"] += bool(span.get("error"))
+            series["seconds"] += span["duration"]
+            series["bytes_in"] += span.get("bytes_in", 0)
+            series["bytes_out"] += span.get("bytes_out", 0)
+            series["prompt_tokens"] += span.get("prompt_tokens") or 0
+            series["completion_tokens"] += span.get("completion_tokens") or 0
+
+    def _record_route(self, span, flow):
+        # Completions per (flow, turn role, model), to tune the model tiers of each flow
+        key = (flow, span["role"], span["name"])
+        route = self.routes.get(key)
+        if route is None:
+            route = self.routes[key] = {"tier": span["tier"], "latencies": deque(maxlen=SAMPLES), "count": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        route["count"] += 1
+        if span.get("error"):
+            route["errors"] += 1
+        else:
+            route["latencies"].append(span["duration"])
+        route["prompt_tokens"] += span.get("prompt_tokens") or 0
+        route["completion_tokens"] += span.get("completion_tokens") or 0
+
+    def record_run(self, flow):
+        with self._lock:
+            self.runs[flow] = self.runs.get(flow, 0) + 1
+
+    def record_coalesced(self, flow):
+        # A request that joined an identical in-flight run instead of starting its own
+        with self._lock:
+            self.coalesced[flow] = self.coalesced.get(flow, 0) + 1
+
+    def watch_cache(self, name, cache):
+        # `cache.summary()` is read at export time
+        self.caches[name] = cache
+
+    def cache_stats(self):
+        stats = {}
+        for name, cache in self.caches.items():
+            summary = cache.summary()
+            hits = summary.get("hits", summary.get("memory_hits", 0) + summary.get("disk_hits", 0))
+            misses = summary.get("misses", 0)
+            stats[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+        return stats
+
+    def snapshot(self):
+        with self._lock:
+            rows = []
+            for (kind, name), s in sorted(self.series.items()):
+                latencies = list(s["latencies"])
+                rows.append({
+                    "kind": kind,
+                    "name": name,
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "p50_s": round(percentile(latencies, 0.5), 4),
+                    "p95_s": round(percentile(latencies, 0.95), 4),
+                    "seconds": round(s["seconds"], 4),
+                    "bytes_in": s["bytes_in"],
+                    "bytes_out": s["bytes_out"],
+                    "prompt_tokens": s["prompt_tokens"],
+                    "completion_tokens": s["completion_tokens"],
+                })
+            routes = [
+                {
+                    "flow": flow,
+                    "role": role,
+                    "model": model,
+                    "tier": r["tier"],
+                    "count": r["count"],
+                    "errors": r["errors"],
+                    "p50_s": round(percentile(list(r["latencies"]), 0.5), 4),
+                    "p95_s": round(percentile(list(r["latencies"]), 0.95), 4),
+                    "prompt_tokens": r["prompt_tokens"],
+                    "completion_tokens": r["completion_tokens"],
+                }
+                for (flow, role, model), r in sorted(self.routes.items())
+            ]
+            runs = dict(self.runs)
+            coalesced = dict(self.coalesced)
+        return {"series": rows, "routes": routes, "runs": runs, "coalesced": coalesced, "caches": self.cache_stats()}
+
+    def prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP finrobot_call_latency_seconds Latency of tool calls and LLM completions.",
+            "# TYPE finrobot_call_latency_seconds summary",
+        ]
+        for s in snapshot["series"]:
+            labels = prometheus_labels(kind=s["kind"], name=s["name"])
+            lines.append(f'finrobot_call_latency_seconds{{{labels},quantile="0.5"}} {s["p50_s"]}')
+            lines.append(f'finrobot_call_latency_seconds{{{labels},quantile="0.95"}} {s["p95_s"]}')
+            lines.append(f"finrobot_call_latency_seconds_sum{{{labels}}} {s['seconds']}")
+            lines.append(f"finrobot_call_latency_seconds_count{{{labels}}} {s['count']}")
+        lines += ["# HELP finrobot_call_errors_total Tool calls and completions that failed.", "# TYPE finrobot_call_errors_total counter"]
+        for s in snapshot["series"]:
+            lines.append(f'finrobot_call_errors_total{{{prometheus_labels(kind=s["kind"], name=s["name"])}}} {s["errors"]}')
+        lines += ["# HELP finrobot_call_bytes_total Bytes sent to and returned by calls.", "# TYPE finrobot_call_bytes_total counter"]
+        for s in snapshot["series"]:
+            labels = prometheus_labels(kind=s["kind"], name=s["name"])
+            lines.append(f'finrobot_call_bytes_total{{{labels},direction="in"}} {s["bytes_in"]}')
+            lines.append(f'finrobot_call_bytes_total{{{labels},direction="out"}} {s["bytes_out"]}')
+        lines += ["# HELP finrobot_llm_tokens_total Tokens used by LLM completions.", "# TYPE finrobot_llm_tokens_total counter"]
+        for s in snapshot["series"]:
+            if s["kind"] == "llm":
+                labels = prometheus_labels(model=s["name"])
+                lines.append(f'finrobot_llm_tokens_total{{{labels},type="prompt"}} {s["prompt_tokens"]}')
+                lines.append(f'finrobot_llm_tokens_total{{{labels},type="completion"}} {s["completion_tokens"]}')
+        lines += ["# HELP finrobot_llm_route_latency_seconds Completion latency per flow, turn role and model tier.", "# TYPE finrobot_llm_route_latency_seconds summary"]
+        route_labels = [(prometheus_labels(flow=r["flow"], role=r["role"], model=r["model"], tier=r["tier"]), r) for r in snapshot["routes"]]
+        for labels, r in route_labels:
+            lines.append(f'finrobot_llm_route_latency_seconds{{{labels},quantile="0.5"}} {r["p50_s"]}')
+            lines.append(f'finrobot_llm_route_latency_seconds{{{labels},quantile="0.95"}} {r["p95_s"]}')
+        lines += ["# HELP finrobot_llm_route_calls_total Completions per flow, turn role and model tier, by outcome.", "# TYPE finrobot_llm_route_calls_total counter"]
+        for labels, r in route_labels:
+            lines.append(f'finrobot_llm_route_calls_total{{{labels},outcome="ok"}} {r["count"] - r["errors"]}')
+            lines.append(f'finrobot_llm_route_calls_total{{{labels},outcome="error"}} {r["errors"]}')
+        lines += ["# HELP finrobot_llm_route_tokens_total Tokens per flow, turn role and model tier.", "# TYPE finrobot_llm_route_tokens_total counter"]
+        for labels, r in route_labels:
+            lines.append(f'finrobot_llm_route_tokens_total{{{labels}}} {r["prompt_tokens"] + r["completion_tokens"]}')
+        lines += ["# HELP finrobot_runs_total Completed runs per flow.", "# TYPE finrobot_runs_total counter"]
+        for flow, count in snapshot["runs"].items():
+            lines.append(f'finrobot_runs_total{{{prometheus_labels(flow=flow)}}} {count}')
+        lines += ["# HELP finrobot_runs_coalesced_total Requests that joined an identical in-flight run.", "# TYPE finrobot_runs_coalesced_total counter"]
+        for flow, count in snapshot["coalesced"].items():
+            lines.append(f'finrobot_runs_coalesced_total{{{prometheus_labels(flow=flow)}}} {count}')
+        lines += ["# HELP finrobot_cache_hit_ratio Cache hit ratio since process start.", "# TYPE finrobot_cache_hit_ratio gauge"]
+        for name, stats in snapshot["caches"].items():
+            lines.append(f'finrobot_cache_hit_ratio{{{prometheus_labels(cache=name)}}} {stats["hit_rate"]:.4f}')
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self):
+        snapshot = self.snapshot()
+        now = time.time()
+        records = [{"ts": now, "type": "series", **s} for s in snapshot["series"]]
+        records += [{"ts": now, "type": "route", **r} for r in snapshot["routes"]]
+        records += [{"ts": now, "type": "runs", "flow": flow, "count": count} for flow, count in snapshot["runs"].items()]
+        records += [{"ts": now, "type": "coalesced", "flow": flow, "count": count} for flow, count in snapshot["coalesced"].items()]
+        records += [{"ts": now, "type": "cache", "cache": name, **stats} for name, stats in snapshot["caches"].items()]
+        return "".join(json.dumps(record) + "\n" for record in records)
+
+    def export(self, trace=None, directory=None):
+        """Rewrite finrobot.prom / metrics.jsonl and append the trace's calls to calls.jsonl."""
+        directory = directory or METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        # Runs finish concurrently; one export at a time keeps calls.jsonl lines whole and the files in step
+        with self._export_lock:
+            for name, text in (("finrobot.prom", self.prometheus()), ("metrics.jsonl", self.json_lines())):
+                # Written atomically so a scraper never reads half a file
+                fd, tmp = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        f.write(text)
+                    os.replace(tmp, os.path.join(directory, name))
+                except BaseException:
+                    os.unlink(tmp)
+                    raise
+            if trace is not None:
+                data = trace.to_dict()
+                with open(os.path.join(directory, "calls.jsonl"), "a") as f:
+                    for span in data["spans"]:
+                        f.write(json.dumps({"run": data["id"], "flow": data["flow"], "label": data["label"], "ts": data["started"] + span["start"], **span}) + "\n")
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_metrics():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Metrics()
+        return _shared
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+@contextmanager
+def using(trace):
+    # Make `trace` current on this thread (e.g. inside a worker of a traced run)
+    previous = current()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def traced_run(flow, label="", export=True):
+    """Trace every tool call and completion on this thread for the duration of a run."""
+    trace = Trace(flow, label)
+    try:
+        with using(trace):
+            yield trace
+    finally:
+        trace.finished = time.perf_counter()
+        metrics = shared_metrics()
+        metrics.record_run(flow)
+        if export:
+            try:
+                metrics.export(trace)
+            except Exception:
+                # Metrics I/O must never fail the run it describes
+                logger.exception("metrics export failed")
+
+
+def record(kind, name, started, **fields):
+    # `started` is a perf_counter() reading taken when the call began
+    duration = time.perf_counter() - started
+    trace = current()
+    span = {
+        "kind": kind,
+        "name": name,
+        "start": round(started - trace.started, 4) if trace else 0.0,
+        "duration": round(duration, 4),
+        **fields,
+    }
+    if trace is not None:
+        trace.add(span)
+    shared_metrics().record(span, trace.flow if trace else "")
+    return span
+
+
+def traced(func, name):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        bytes_in = len(json.dumps([args, kwargs], default=str))
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            record("tool", name, started, bytes_in=bytes_in, bytes_out=0, error=str(e))
+            raise
+        error = result[:200] if is_error_result(result) else None
+        record("tool", name, started, bytes_in=bytes_in, bytes_out=result_size(result), error=error)
+        return result
+
+    return wrapper
+
+
+def traced_tools(tools):
+    """Return a copy of a register_toolkits config whose calls are timed and recorded."""
+    return [{**tool, "function": traced(tool["function"], tool["name"])} for tool in tools]
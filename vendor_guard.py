@@ -0,0 +1,367 @@
+"""Latency budgets, circuit breakers and hedged fallbacks for the vendor data sources.
+
+Every Finnhub, yfinance, FMP and SEC call the tools make goes through
+shared_guard(). A call runs on the guard's threads and is given up once it
+exceeds its source's budget, so a hung endpoint costs one budget instead of
+the whole LLM timeout. FAILURE_THRESHOLD consecutive errors or timeouts open
+a source's breaker: for OPEN_SECONDS its calls fail at once, with a message
+telling the model not to retry, and then a single probe call decides whether
+it closes again. Data that two sources both carry (the company profile and
+basic financials, from Finnhub and from yfinance's quote summary) is hedged:
+the alternate starts as soon as the primary fails, is open, or is still
+running after HEDGE_AFTER seconds, and the first usable answer wins.
+"""
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait, FIRST_COMPLETED
+from typing import Annotated
+
+import tracing
+from tool_executor import carried
+
+# Seconds one call to each source may take
+SOURCE_BUDGETS = {
+    "finnhub": float(os.environ.get("FINROBOT_FINNHUB_BUDGET", "10")),
+    "yfinance": float(os.environ.get("FINROBOT_YFINANCE_BUDGET", "20")),
+    "fmp": float(os.environ.get("FINROBOT_FMP_BUDGET", "15")),
+    # A 10-K section download is the largest single vendor response
+    "sec": float(os.environ.get("FINROBOT_SEC_BUDGET", "30")),
+}
+# Consecutive failures (errors, timeouts, no answer) that open a source's breaker
+FAILURE_THRESHOLD = int(os.environ.get("FINROBOT_BREAKER_FAILURES", "3"))
+OPEN_SECONDS = float(os.environ.get("FINROBOT_BREAKER_OPEN_SECONDS", "60"))
+# Seconds the primary source of hedged data may run before the alternate starts too
+HEDGE_AFTER = float(os.environ.get("FINROBOT_HEDGE_AFTER", "2"))
+# Calls given up on keep their thread until the vendor returns
+GUARD_WORKERS = 32
+# Appended to every failure the model sees, so it does not spend turns re-asking a dead source
+NO_RETRY = "Do not retry it; continue with the other data."
+
+
+class VendorUnavailable(RuntimeError):
+    pass
+
+
+def is_usable(result):
+    # finrobot utils return None without an API key and "Failed to ..." text on vendor errors
+    return result is not None and not tracing.is_error_result(result)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one source: closed, open for OPEN_SECONDS, then one probe."""
+
+    def __init__(self, source, threshold=None, open_seconds=None):
+        self.source = source
+        self.threshold = threshold or FAILURE_THRESHOLD
+        self.open_seconds = open_seconds or OPEN_SECONDS
+        self.failures = 0
+        self.opened = None
+        self.probing = False
+        self.last_error = None
+        self.stats = {"calls": 0, "errors": 0, "timeouts": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened is not None:
+                if self.probing or time.monotonic() - self.opened < self.open_seconds:
+                    self.stats["rejected"] += 1
+                    return False
+                # Half-open: this call is the probe, everything else keeps failing fast
+                self.probing = True
+            self.stats["calls"] += 1
+            return True
+
+    def retry_in(self):
+        with self._lock:
+            if self.opened is None:
+                return 0.0
+            return max(self.opened + self.open_seconds - time.monotonic(), 0.0)
+
+    def succeeded(self):
+        with self._lock:
+            self.failures = 0
+            self.opened = None
+            self.probing = False
+
+    def failed(self, error, timed_out=False):
+        with self._lock:
+            self.failures += 1
+            self.stats["timeouts" if timed_out else "errors"] += 1
+            self.last_error = error
+            if self.probing or (self.opened is None and self.failures >= self.threshold):
+                if self.opened is None:
+                    self.stats["opened"] += 1
+                # A failed probe keeps it open for another OPEN_SECONDS
+                self.opened = time.monotonic()
+                self.probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened is None:
+                return "closed"
+            return "half-open" if self.probing else "open"
+
+    def summary(self):
+        retry_in = self.retry_in()
+        with self._lock:
+            return {"failures": self.failures, "last_error": self.last_error, "retry_in": round(retry_in, 1), **self.stats}
+
+
+class GuardedCall:
+    """One vendor call; its outcome is settled once, by the call returning or by its deadline, whichever is first."""
+
+    def __init__(self, source, breaker, budget):
+        self.source = source
+        self.breaker = breaker
+        self.budget = budget
+        self.started = time.perf_counter()
+        self.deadline = time.monotonic() + budget
+        self.future = None
+        self._settled = False
+        self._lock = threading.Lock()
+
+    def run(self, func, args, kwargs):
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.settle(f"{type(e).__name__}: {e}")
+            raise
+        self.settle(None if result is not None else "no answer (is the API key set?)")
+        return result
+
+    def settle(self, error=None, timed_out=False):
+        with self._lock:
+            if self._settled:
+                return
+            self._settled = True
+        if error:
+            self.breaker.failed(error, timed_out)
+        else:
+            self.breaker.succeeded()
+        tracing.record("vendor", self.source, self.started, error=error)
+
+    def expire(self):
+        if not self.future.done():
+            self.settle(f"no answer within {self.budget:g}s", timed_out=True)
+
+    def abandon(self):
+        # Nobody waits on it any more, but a hung call must still count against the breaker
+        timer = threading.Timer(max(self.deadline - time.monotonic(), 0), self.expire)
+        timer.daemon = True
+        timer.start()
+
+
+class VendorGuard:
+    """Per-source budgets and breakers, plus hedging between two sources of the same data."""
+
+    def __init__(self, budgets=None, hedge_after=None):
+        self.budgets = budgets or SOURCE_BUDGETS
+        self.hedge_after = HEDGE_AFTER if hedge_after is None else hedge_after
+        self.breakers = {source: CircuitBreaker(source) for source in self.budgets}
+        self.stats = {"hedged": 0, "fallbacks": 0, "alternate_wins": 0}
+        self.executor = ThreadPoolExecutor(max_workers=GUARD_WORKERS, thread_name_prefix="vendor")
+        self._lock = threading.Lock()
+
+    def _count(self, field):
+        with self._lock:
+            self.stats[field] += 1
+
+    def _rejection(self, source):
+        breaker = self.breakers[source]
+        if breaker.state == "half-open":
+            return f"{source} is failing ({breaker.last_error}) and is skipped while a probe call checks it"
+        return f"{source} is failing ({breaker.last_error}) and is skipped for the next {breaker.retry_in():.0f}s"
+
+    def _submit(self, source, func, args=(), kwargs=None):
+        """The started GuardedCall, or None if `source`'s breaker is open."""
+        breaker = self.breakers[source]
+        if not breaker.allow():
+            return None
+        call = GuardedCall(source, breaker, self.budgets[source])
+        # The queue wait counts against the budget too
+        call.future = self.executor.submit(carried(call.run), func, args, kwargs or {})
+        return call
+
+    def call(self, source, func, *args, **kwargs):
+        """func(*args, **kwargs) within `source`'s budget; raises VendorUnavailable if it is open, too slow or fails."""
+        call = self._submit(source, func, args, kwargs)
+        if call is None:
+            raise VendorUnavailable(f"{self._rejection(source)}. {NO_RETRY}")
+        try:
+            return call.future.result(timeout=call.budget)
+        except TimeoutError:
+            call.expire()
+            raise VendorUnavailable(f"{source} did not answer within {call.budget:g}s. {NO_RETRY}")
+        except Exception as e:
+            # Callers fall back on VendorUnavailable alone (e.g. to stored prices), whatever the vendor raised
+            raise VendorUnavailable(f"{source} failed: {type(e).__name__}: {e}. {NO_RETRY}") from e
+
+    def hedged(self, primary, alternate):
+        """First usable answer of two (source, func, args) calls for the same data.
+
+        The alternate starts once the primary has failed, is open, or has run for
+        hedge_after seconds; a call still running when the other wins is left to
+        finish on its own.
+        """
+        pending = []
+        errors = []
+        self._start(primary, pending, errors)
+        hedge_at = time.monotonic() + self.hedge_after
+        alternate_started = False
+        while True:
+            if not alternate_started and (not pending or time.monotonic() >= hedge_at):
+                alternate_started = True
+                self._count("hedged" if pending else "fallbacks")
+                self._start(alternate, pending, errors)
+            if not pending:
+                raise VendorUnavailable(f"No source answered ({'; '.join(errors)}). {NO_RETRY}")
+            until = min(call.deadline for call in pending)
+            if not alternate_started:
+                until = min(until, hedge_at)
+            wait([call.future for call in pending], timeout=max(until - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            for call in list(pending):
+                if call.future.done():
+                    pending.remove(call)
+                    try:
+                        result = call.future.result()
+                    except Exception as e:
+                        errors.append(f"{call.source}: {type(e).__name__}: {e}")
+                        continue
+                    if is_usable(result):
+                        for other in pending:
+                            other.abandon()
+                        if call.source == alternate[0]:
+                            self._count("alternate_wins")
+                        return result
+                    errors.append(f"{call.source}: {str(result)[:200]}")
+                elif time.monotonic() >= call.deadline:
+                    pending.remove(call)
+                    call.expire()
+                    errors.append(f"{call.source}: no answer within {call.budget:g}s")
+
+    def _start(self, request, pending, errors):
+        call = self._submit(*request)
+        if call is None:
+            errors.append(self._rejection(request[0]))
+        else:
+            pending.append(call)
+
+    def reset(self):
+        with self._lock:
+            self.breakers = {source: CircuitBreaker(source) for source in self.budgets}
+            self.stats = {field: 0 for field in self.stats}
+
+    def summary(self):
+        return {
+            "sources": {
+                source: {"state": breaker.state, "budget": self.budgets[source], **breaker.summary()}
+                for source, breaker in self.breakers.items()
+            },
+            **self.stats,
+        }
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_guard():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = VendorGuard()
+        return _shared
+
+
+# --- yfinance stand-ins for Finnhub data ---
+# Finnhub metric name -> (yfinance info key, scale to Finnhub's unit)
+YFINANCE_METRICS = {
+    "peTTM": ("trailingPE", 1),
+    "pb": ("priceToBook", 1),
+    "psTTM": ("priceToSalesTrailing12Months", 1),
+    "epsTTM": ("trailingEps", 1),
+    "beta": ("beta", 1),
+    "52WeekHigh": ("fiftyTwoWeekHigh", 1),
+    "52WeekLow": ("fiftyTwoWeekLow", 1),
+    "marketCapitalization": ("marketCap", 1e-6),
+    "enterpriseValue": ("enterpriseValue", 1e-6),
+    "10DayAverageTradingVolume": ("averageDailyVolume10Day", 1e-6),
+    "bookValuePerShareQuarterly": ("bookValue", 1),
+    "dividendPerShareTTM": ("trailingAnnualDividendRate", 1),
+    "payoutRatioTTM": ("payoutRatio", 100),
+    "roeTTM": ("returnOnEquity", 100),
+    "roaTTM": ("returnOnAssets", 100),
+    "grossMarginTTM": ("grossMargins", 100),
+    "operatingMarginTTM": ("operatingMargins", 100),
+    "netProfitMarginTTM": ("profitMargins", 100),
+    "revenueGrowthQuarterlyYoy": ("revenueGrowth", 100),
+    "epsGrowthQuarterlyYoy": ("earningsGrowth", 100),
+    "currentRatioQuarterly": ("currentRatio", 1),
+    "quickRatioQuarterly": ("quickRatio", 1),
+    "totalDebt/totalEquityQuarterly": ("debtToEquity", 0.01),
+}
+
+
+def yfinance_basic_financials(symbol, selected_columns=None):
+    from finrobot.data_source import YFinanceUtils
+
+    info = YFinanceUtils.get_stock_info(symbol) or {}
+    metrics = {
+        name: info[key] * scale
+        for name, (key, scale) in YFINANCE_METRICS.items()
+        if isinstance(info.get(key), (int, float)) and (not selected_columns or name in selected_columns)
+    }
+    if not metrics:
+        return f"Failed to find basic financials for symbol {symbol} from yfinance!"
+    return json.dumps(metrics, indent=2)
+
+
+def yfinance_profile(symbol):
+    from finrobot.data_source import YFinanceUtils
+
+    info = YFinanceUtils.get_stock_info(symbol) or {}
+    name = info.get("longName") or info.get("shortName")
+    if not name:
+        return f"Failed to find company profile for symbol {symbol} from yfinance!"
+    return (
+        f"[Company Introduction]:\n\n{name} operates in the {info.get('industry', 'N/A')} industry "
+        f"({info.get('sector', 'N/A')} sector). It has a market capitalization of {info.get('marketCap', 0) / 1e6:.2f} million "
+        f"{info.get('currency', '')}, with {info.get('sharesOutstanding', 0) / 1e6:.2f} million shares outstanding."
+        f"\n\n{name} is based in {info.get('country', 'N/A')} and trades under the ticker {symbol} on {info.get('exchange', 'N/A')}."
+        f"\n\n{(info.get('longBusinessSummary') or '')[:600]}"
+    ).strip()
+
+
+def finnhub_basic_financials(symbol, selected_columns=None):
+    from finrobot.data_source import FinnHubUtils
+
+    # finrobot's own column filter deletes from the dict it iterates, so it is applied here instead
+    result = FinnHubUtils.get_basic_financials(symbol)
+    if not selected_columns or not is_usable(result):
+        return result
+    return json.dumps({k: v for k, v in json.loads(result).items() if k in selected_columns}, indent=2)
+
+
+def get_company_profile(symbol: Annotated[str, "ticker symbol"]) -> str:
+    """get a company's profile information"""
+    from finrobot.data_source import FinnHubUtils
+
+    return shared_guard().hedged(("finnhub", FinnHubUtils.get_company_profile, (symbol,)), ("yfinance", yfinance_profile, (symbol,)))
+
+
+def get_basic_financials(
+    symbol: Annotated[str, "ticker symbol"],
+    selected_columns: Annotated[
+        list[str] | None,
+        "metrics to return, e.g. 'peTTM', 'pb', 'epsTTM', 'roeTTM', 'netProfitMarginTTM', 'beta', '52WeekHigh', '52WeekLow'; default: all",
+    ] = None,
+) -> str:
+    """get latest basic financials for a designated company"""
+    return shared_guard().hedged(
+        ("finnhub", finnhub_basic_financials, (symbol, selected_columns)),
+        ("yfinance", yfinance_basic_financials, (symbol, selected_columns)),
+    )